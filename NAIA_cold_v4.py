@@ -24,7 +24,10 @@ from core.search_result_model import SearchResultModel
 from core.autocomplete_manager import AutoCompleteManager
 from core.tag_data_manager import TagDataManager
 from core.wildcard_manager import WildcardManager
+from core.wildcard_watcher import WildcardWatcher
+from core.dynamic_wildcards import DynamicWildcardLoader
 from core.prompt_generation_controller import PromptGenerationController
+from core.weighted_sampler import WEIGHT_EXPRESSIONS
 
 cfg_validator = QDoubleValidator(1.0, 10.0, 1)
 step_validator = QIntValidator(1, 50)
@@ -121,9 +124,23 @@ class ModernMainWindow(QMainWindow):
 
         self.image_window = None 
         # [신규] 데이터 및 와일드카드 관리자 초기화
-        self.tag_data_manager = TagDataManager()
-        self.wildcard_manager = WildcardManager()
+        # [수정] 태그 데이터는 창이 표시된 뒤 백그라운드에서 로드 (첫 창 표시 시간에서 제외)
+        self.tag_data_manager = TagDataManager(lazy=True)
+        # [수정] 와일드카드 내용은 처음 참조될 때 읽음 (시작 시에는 이름 인덱스만 구성)
+        self.wildcard_manager = WildcardManager(lazy=True)
         self.app_context = AppContext(self, self.wildcard_manager)
+        # [신규] 와일드카드 폴더를 감시하여 바뀐 파일만 다시 읽음
+        self.wildcard_watcher = WildcardWatcher(self.wildcard_manager, self)
+        self.wildcard_watcher.wildcards_changed.connect(
+            lambda names: self.app_context.publish("wildcards_changed", names)
+        )
+        self.wildcard_watcher.start()
+        # [신규] 동적 와일드카드(.query 정의)는 백그라운드에서 코퍼스를 검색해 적용 (정의가 바뀌면 다시 검색)
+        self.dynamic_wildcard_thread = None
+        self.dynamic_wildcard_loader = None
+        self._dynamic_refresh_running = False
+        self._dynamic_refresh_pending = False
+        self.wildcard_watcher.definitions_changed.connect(self.refresh_dynamic_wildcards)
 
         self.init_ui()
         
@@ -142,6 +159,10 @@ class ModernMainWindow(QMainWindow):
         self.prompt_gen_controller = PromptGenerationController(self.app_context)
 
         self.connect_signals()
+        self.tag_data_manager.data_ready.connect(self.on_tag_data_ready)
+        # 이벤트 루프가 시작된 뒤(창 표시 후) 실행됨
+        QTimer.singleShot(0, self.tag_data_manager.start_background_load)
+        QTimer.singleShot(0, self.refresh_dynamic_wildcards)
 
         # ✅ 2. AutoCompleteManager 초기화 방식 변경
         print("🔍 AutoCompleteManager 전역 인스턴스 요청 중...")
@@ -386,6 +407,8 @@ class ModernMainWindow(QMainWindow):
             cb.setChecked(True) # 기본적으로 모두 체크
             rating_layout.addWidget(cb)
             self.rating_checkboxes[key] = cb
+            # [신규] 선택한 등급에 맞춰 자동완성 순위를 갱신
+            cb.toggled.connect(self.on_rating_filter_changed)
         
         rating_layout.addStretch(1)
 
@@ -703,6 +726,21 @@ class ModernMainWindow(QMainWindow):
             self.generation_checkboxes[cb_text] = cb
 
         gen_checkbox_layout.addStretch()
+
+        # [신규] 검색 결과 추출 가중치 선택
+        sampling_label = QLabel("추출 가중치:")
+        sampling_label.setStyleSheet(DARK_STYLES['label_style'])
+        self.sampling_weight_combo = QComboBox()
+        self.sampling_weight_combo.setStyleSheet(DARK_STYLES['compact_combobox'])
+        for key, (display_name, _) in WEIGHT_EXPRESSIONS.items():
+            self.sampling_weight_combo.addItem(display_name, key)
+        gen_checkbox_layout.addWidget(sampling_label)
+        gen_checkbox_layout.addWidget(self.sampling_weight_combo)
+        # [신규] 와일드카드 조합 순회 모드 (무작위 와일드카드의 모든 조합을 차례로 생성)
+        self.combination_mode_checkbox = QCheckBox("조합 순회")
+        self.combination_mode_checkbox.setStyleSheet(DARK_STYLES['dark_checkbox'])
+        self.combination_mode_checkbox.setToolTip("선행/후행 프롬프트의 무작위 와일드카드를 모든 조합으로 차례로 순회합니다.")
+        gen_checkbox_layout.addWidget(self.combination_mode_checkbox)
         gen_control_layout.addLayout(gen_checkbox_layout)
         
         container_layout.addWidget(generation_control_frame)
@@ -923,7 +961,9 @@ class ModernMainWindow(QMainWindow):
                     'auto_generate': True,
                     'turbo_mode': self.generation_checkboxes["터보 옵션"].isChecked(),
                     'wildcard_standalone': self.generation_checkboxes["와일드카드 단독 모드"].isChecked(),
-                    "auto_fit_resolution": self.auto_fit_resolution_checkbox.isChecked()
+                    "auto_fit_resolution": self.auto_fit_resolution_checkbox.isChecked(),
+                    'sampling_weight': self.sampling_weight_combo.currentData(),
+                    'wildcard_combination': self.combination_mode_checkbox.isChecked()
                 }
                 
                 # 프롬프트 생성 컨트롤러에 자동 생성 플래그 설정
@@ -981,6 +1021,46 @@ class ModernMainWindow(QMainWindow):
 
         self.search_controller.start_search(search_params)
 
+    def on_tag_data_ready(self):
+        """[신규] 백그라운드 태그 데이터 로드 완료"""
+        self.status_bar.showMessage("✅ 태그 데이터 로드 완료", 3000)
+
+    def refresh_dynamic_wildcards(self):
+        """
+        [신규] 동적 와일드카드 정의를 읽어 백그라운드 스레드에서 코퍼스 검색 결과로 만듭니다.
+        검색 결과는 샤드별로 캐시되므로 바뀐 정의나 샤드만 다시 검색합니다. 실행 중이면 끝난 뒤 한 번 더 실행합니다.
+        """
+        if self._dynamic_refresh_running:
+            self._dynamic_refresh_pending = True
+            return
+        self._dynamic_refresh_running = True
+        self.dynamic_wildcard_thread = QThread()
+        self.dynamic_wildcard_loader = DynamicWildcardLoader(self.wildcard_manager.wildcards_dir)
+        self.dynamic_wildcard_loader.moveToThread(self.dynamic_wildcard_thread)
+        self.dynamic_wildcard_thread.started.connect(self.dynamic_wildcard_loader.run)
+        self.dynamic_wildcard_loader.finished.connect(self.on_dynamic_wildcards_ready)
+        self.dynamic_wildcard_loader.finished.connect(self.dynamic_wildcard_thread.quit)
+        self.dynamic_wildcard_thread.finished.connect(self._on_dynamic_refresh_finished)
+        self.dynamic_wildcard_thread.start()
+
+    def on_dynamic_wildcards_ready(self, resolved: dict):
+        """[신규] 동적 와일드카드 검색 결과를 와일드카드 관리자에 반영합니다."""
+        changed = self.wildcard_manager.set_dynamic_wildcards(resolved)
+        if changed:
+            print(f"🔄 동적 와일드카드 {len(changed)}개 갱신: {', '.join(changed[:5])}{' ...' if len(changed) > 5 else ''}")
+            self.app_context.publish("wildcards_changed", changed)
+
+    def _on_dynamic_refresh_finished(self):
+        self._dynamic_refresh_running = False
+        if self._dynamic_refresh_pending:
+            self._dynamic_refresh_pending = False
+            self.refresh_dynamic_wildcards()
+
+    def on_rating_filter_changed(self):
+        """[신규] 등급 체크 상태를 자동완성 순위(등급별 태그 통계)에 반영합니다."""
+        enabled = {key for key, cb in self.rating_checkboxes.items() if cb.isChecked()}
+        self.tag_data_manager.set_enabled_ratings(enabled)
+
     def update_search_progress(self, completed: int, total: int):
         """검색 진행률에 따라 UI 업데이트"""
         percentage = int((completed / total) * 100) if total > 0 else 0
@@ -1117,7 +1197,9 @@ class ModernMainWindow(QMainWindow):
             'auto_generate': self.generation_checkboxes["자동 생성"].isChecked(),
             'turbo_mode': self.generation_checkboxes["터보 옵션"].isChecked(),
             'wildcard_standalone': self.generation_checkboxes["와일드카드 단독 모드"].isChecked(),
-            "auto_fit_resolution": self.auto_fit_resolution_checkbox.isChecked()
+            "auto_fit_resolution": self.auto_fit_resolution_checkbox.isChecked(),
+            'sampling_weight': self.sampling_weight_combo.currentData(),
+            'wildcard_combination': self.combination_mode_checkbox.isChecked()
         }
         self.app_context.publish("random_prompt_triggered")
 
@@ -1192,6 +1274,11 @@ class ModernMainWindow(QMainWindow):
         if self.automation_module:
             self.automation_module.automation_controller.stop_automation()
             
+        self.wildcard_watcher.stop()
+        if self.dynamic_wildcard_thread is not None:
+            self.dynamic_wildcard_thread.quit()
+            self.dynamic_wildcard_thread.wait()
+        self.wildcard_manager.save_cache()
         self.save_generation_parameters()
         # MiddleSectionController를 통해 모든 모듈의 설정 저장
         if self.middle_section_controller:
@@ -1215,6 +1302,8 @@ class ModernMainWindow(QMainWindow):
                 params_to_save[key] = checkbox.isChecked()
             params_to_save['random_resolution_checked'] = self.random_resolution_checkbox.isChecked()
             params_to_save['auto_fit_resolution_checked'] = self.auto_fit_resolution_checkbox.isChecked()
+            params_to_save['sampling_weight'] = self.sampling_weight_combo.currentData()
+            params_to_save['wildcard_combination'] = self.combination_mode_checkbox.isChecked()
             params_to_save['resolutions'] = self.resolutions
 
             save_dir = 'save'
@@ -1269,6 +1358,12 @@ class ModernMainWindow(QMainWindow):
             self.random_resolution_checkbox.setChecked(params.get('random_resolution_checked', False))
             self.auto_fit_resolution_checkbox.setChecked(params.get('auto_fit_resolution_checked', False))
 
+            # [신규] 추출 가중치 복원
+            weight_index = self.sampling_weight_combo.findData(params.get('sampling_weight', 'uniform'))
+            if weight_index >= 0:
+                self.sampling_weight_combo.setCurrentIndex(weight_index)
+            self.combination_mode_checkbox.setChecked(params.get('wildcard_combination', False))
+
             # NAID Option 체크박스 복원
             for option_key, checkbox in self.advanced_checkboxes.items():
                 checkbox.setChecked(params.get(option_key, False))
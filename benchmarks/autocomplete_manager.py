@@ -0,0 +1,74 @@
+# benchmarks/autocomplete_manager.py
+"""
+벤치마크: 자동완성 이벤트 필터의 이벤트당 오버헤드 (앱 실행에는 사용되지 않음)
+사용법: python -m benchmarks.autocomplete_manager
+"""
+
+import sys
+import time
+from PyQt6.QtCore import QEvent, QObject, QPointF, Qt, QTimer
+from PyQt6.QtGui import QMouseEvent
+from PyQt6.QtWidgets import QApplication, QLineEdit, QTextEdit, QWidget
+from core.autocomplete_manager import AutoCompleteManager
+
+
+def main():
+    app = QApplication.instance() or QApplication(sys.argv)
+    root = QWidget()
+    parent = root
+    for depth in range(8): # 실제 UI처럼 깊은 부모 체인을 구성
+        parent = QWidget(parent)
+        parent.setObjectName(f"container_{depth}")
+    line_edit = QLineEdit(parent)
+
+    class _Host(QObject):
+        tag_data_manager = None
+        wildcard_manager = None
+
+    manager = AutoCompleteManager(main_window=_Host())
+    mouse_move = QMouseEvent(QEvent.Type.MouseMove, QPointF(1, 1), QPointF(1, 1),
+                             Qt.MouseButton.NoButton, Qt.MouseButton.NoButton, Qt.KeyboardModifier.NoModifier)
+    focus_out = QEvent(QEvent.Type.FocusOut)
+    iterations = 200_000
+
+    def measure(label, watched, event, uncached=False):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            if uncached:
+                manager._ignore_cache.clear()
+            manager.eventFilter(watched, event)
+        print(f"  - {label}: {(time.perf_counter() - start) / iterations * 1e9:.0f}ns/이벤트")
+
+    def original_filter(watched, event):
+        """비교용: 변경 전 필터의 선두 부분 (매 이벤트마다 부모 체인 탐색)"""
+        if not isinstance(watched, (QLineEdit, QTextEdit)):
+            return QObject.eventFilter(manager, watched, event)
+        if manager._compute_should_ignore(watched):
+            return QObject.eventFilter(manager, watched, event)
+        event.type()
+        return QObject.eventFilter(manager, watched, event)
+
+    def measure_original(label, watched, event):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            original_filter(watched, event)
+        print(f"  - [기존] {label}: {(time.perf_counter() - start) / iterations * 1e9:.0f}ns/이벤트")
+
+    measure_original("입력 위젯이 아닌 객체의 이벤트", root, mouse_move)
+    measure_original("입력 위젯의 처리하지 않는 이벤트", line_edit, mouse_move)
+
+    manager.popup.hide()
+    manager._invalidate_completions = lambda: None # 측정에서 타이머/팝업 처리 제외
+    single_shot = QTimer.singleShot
+    QTimer.singleShot = staticmethod(lambda *args: None)
+    try:
+        measure("입력 위젯이 아닌 객체의 이벤트", root, mouse_move)
+        measure("입력 위젯의 처리하지 않는 이벤트", line_edit, mouse_move)
+        measure("FocusOut, 캐시 적중", line_edit, focus_out)
+        measure("FocusOut, 캐시 없음 (부모 체인 탐색)", line_edit, focus_out, uncached=True)
+    finally:
+        QTimer.singleShot = single_shot
+
+
+if __name__ == '__main__':
+    main()
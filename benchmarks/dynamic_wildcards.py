@@ -0,0 +1,22 @@
+# benchmarks/dynamic_wildcards.py
+"""
+벤치마크: wildcards/ 의 동적 와일드카드 정의를 처리하고 캐시 재사용 시간 비교 (앱 실행에는 사용되지 않음)
+사용법: 앱 폴더에서 python -m benchmarks.dynamic_wildcards (data/tags 필요)
+"""
+
+import time
+from core.dynamic_wildcards import find_definitions, resolve_dynamic_wildcards
+
+
+def main():
+    definitions = find_definitions('wildcards')
+    for label in ("첫 실행", "캐시 사용"):
+        start = time.perf_counter()
+        resolved = resolve_dynamic_wildcards(definitions)
+        print(f"  - {label}: {time.perf_counter() - start:.2f}s")
+    for name, lines in resolved.items():
+        print(f"  ▶ {name}: {len(lines)}줄 ({', '.join(lines[:5])}{' ...' if len(lines) > 5 else ''})")
+
+
+if __name__ == '__main__':
+    main()
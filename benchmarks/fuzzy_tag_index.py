@@ -0,0 +1,45 @@
+# benchmarks/fuzzy_tag_index.py
+"""
+벤치마크: 오타 허용 태그 검색 - 삭제 변형 인덱스 vs 검색 풀 전체 선형 스캔 (앱 실행에는 사용되지 않음)
+사용법: 앱 폴더에서 python -m benchmarks.fuzzy_tag_index (data/tag_dictionary.bin 필요)
+"""
+
+import time
+import numpy as np
+from core.fuzzy_tag_index import FuzzyTagIndex
+from core.tag_data_manager import TagDataManager
+
+
+def linear_search(index: FuzzyTagIndex, query: str, limit: int = 40):
+    """비교용: 검색 풀 전체에 대해 편집 거리를 직접 계산하는 선형 스캔"""
+    query = query.strip().lower()
+    distance = index._distance_for(len(query))
+    if distance == 0:
+        return []
+    distances = index.prefix_distances(query, index.names, distance)
+    candidates = np.flatnonzero(distances <= distance)
+    order = np.lexsort((-index.counts[candidates], distances[candidates]))[:limit]
+    return [(int(index.entries[candidates[i]]), int(distances[candidates[i]])) for i in order]
+
+
+def main():
+    manager = TagDataManager()
+    start = time.perf_counter()
+    index = FuzzyTagIndex(manager.tag_dictionary, manager.general_pool)
+    variants = sum(len(index._window(width)[0]) for width in range(index.MIN_QUERY_LENGTH, index.prefix_length + 1))
+    print(f"⚙️ 인덱스 구성: {time.perf_counter() - start:.2f}s ({len(index.names)}개 태그, 변형 {variants}개)")
+
+    queries = ["blnde hair", "lnog hair", "lookng at viewr", "smiel", "thighhihgs", "tiwntails", "red eyse", "shrot hair"]
+    results = {}
+    for label, method in (("인덱스", index.search), ("선형 스캔", lambda q: linear_search(index, q))):
+        start = time.perf_counter()
+        results[label] = [method(q) for q in queries]
+        elapsed = (time.perf_counter() - start) / len(queries) * 1000
+        print(f"  - {label}: 평균 {elapsed:.2f}ms")
+    for q, indexed, scanned in zip(queries, results["인덱스"], results["선형 스캔"]):
+        top = [manager.tag_dictionary.name(i) for i, _ in indexed[:3]]
+        print(f"  {q!r} → {top} (선형 스캔과 {'일치' if indexed == scanned else '불일치'})")
+
+
+if __name__ == '__main__':
+    main()
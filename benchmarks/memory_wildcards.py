@@ -0,0 +1,22 @@
+# benchmarks/memory_wildcards.py
+"""벤치마크 공용: 파일 대신 메모리의 줄 목록을 돌려주는 와일드카드 관리자"""
+
+from core.wildcard_graph import WildcardGraph
+
+
+class MemoryWildcards:
+    """WildcardManager와 같은 조회 인터페이스를 가진 벤치마크용 관리자 (flatten=False면 미리 펼치기를 끔)"""
+
+    def __init__(self, wildcards, flatten=True):
+        self.wildcards = wildcards
+        self.graph = WildcardGraph()
+        for name, lines in wildcards.items():
+            self.graph.update(name, lines)
+        if not flatten:
+            self.graph.flattened = lambda name: None
+
+    def get_lines(self, name):
+        return self.wildcards.get(name, [])
+
+    def get_alias_table(self, name):
+        return None
@@ -0,0 +1,75 @@
+# benchmarks/wildcard_cache.py
+"""
+벤치마크: 임시 폴더에 와일드카드 파일을 만들어 캐시/지연 로드의 시작 시간과 메모리 비교 (앱 실행에는 사용되지 않음)
+사용법: python -m benchmarks.wildcard_cache
+"""
+
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from core.wildcard_manager import WildcardManager
+
+
+@contextmanager
+def working_directory(path: str):
+    """WildcardManager는 현재 폴더의 wildcards/ 를 사용하므로 잠시 작업 폴더를 옮기고 되돌림"""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def main():
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as workdir, working_directory(workdir):
+        for i in range(5000):
+            folder = os.path.join('wildcards', f"group_{i % 50}")
+            os.makedirs(folder, exist_ok=True)
+            with open(os.path.join(folder, f"wildcard_{i}.txt"), 'w', encoding='utf-8') as f:
+                f.write('\n'.join(f"tag_{random.randint(0, 10000)}, tag_{random.randint(0, 10000)}" for _ in range(200)))
+        # 캐시를 쓴 직후의 수정 시각은 신뢰하지 않으므로 파일 시각을 과거로 옮김
+        past = time.time() - 60
+        for root, _, files in os.walk('wildcards'):
+            for file in files:
+                os.utime(os.path.join(root, file), (past, past))
+
+        for label in ("캐시 없음", "캐시 사용"):
+            start = time.perf_counter()
+            manager = WildcardManager()
+            print(f"  - {label}: {time.perf_counter() - start:.2f}s")
+        reference = dict(manager.wildcard_dict_tree)
+
+        modified = {f"group_{i % 50}/wildcard_{i}" for i in range(0, 5000, 500)}
+        for name in modified:
+            with open(os.path.join('wildcards', name + '.txt'), 'a', encoding='utf-8') as f:
+                f.write('\nchanged')
+        start = time.perf_counter()
+        manager = WildcardManager()
+        print(f"  - 10개 파일 수정 후: {time.perf_counter() - start:.2f}s "
+              f"(수정 반영: {all(manager.wildcard_dict_tree[n][-1] == 'changed' for n in modified)}, "
+              f"나머지 일치: {all(manager.wildcard_dict_tree[n] == v for n, v in reference.items() if n not in modified)})")
+        reference = dict(manager.wildcard_dict_tree)
+
+        # 지연 로드: 이름 인덱스만 구성하고 사용한 와일드카드만 메모리에 올림
+        for lazy in (False, True):
+            tracemalloc.start()
+            start = time.perf_counter()
+            manager = WildcardManager(lazy=lazy)
+            elapsed = time.perf_counter() - start
+            used = random.sample(sorted(reference), 20)
+            same = all(manager.get_lines(name) == reference[name] for name in used)
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"  - {'지연 로드' if lazy else '전체 로드'}: 시작 {elapsed:.2f}s, 메모리 {current / 1e6:.1f}MB, "
+                  f"와일드카드 {manager.wildcard_count}개 (메모리 내 {len(manager.wildcard_dict_tree)}개, 내용 일치: {same})")
+            if manager._cache is not None:
+                manager._cache.close() # 임시 폴더를 지울 수 있도록 mmap을 닫음
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# benchmarks/wildcard_graph.py
+"""
+벤치마크: 순환 참조 검사, 한 줄짜리 와일드카드가 깊게 이어진 라이브러리의 미리 펼치기 (앱 실행에는 사용되지 않음)
+사용법: python -m benchmarks.wildcard_graph
+"""
+
+import random
+import time
+from benchmarks.memory_wildcards import MemoryWildcards
+from core.prompt_context import PromptContext
+from core.wildcard_graph import WildcardGraph
+from core.wildcard_processor import WildcardProcessor
+
+
+def main():
+    random.seed(0)
+    wildcards = {}
+    # preset_i → 'look_i, __hair_i__, __outfit_i__' → 각각 한 줄짜리 와일드카드 2단계
+    for i in range(50):
+        wildcards[f"preset_{i}"] = [f"*look_{i}, __hair_{i}__, __outfit_{i}__"]
+        wildcards[f"hair_{i}"] = [f"__hair_color_{i}__ hair, *long hair"]
+        wildcards[f"hair_color_{i}"] = [f"color_{i}"]
+        wildcards[f"outfit_{i}"] = [f"__top_{i}__, skirt_{i}"]
+        wildcards[f"top_{i}"] = [f"top_{i}, *ribbon"]
+    wildcards["character"] = [f"<preset_{i}>" for i in range(50)]
+    wildcards["loop_a"] = ["__loop_b__"]
+    wildcards["loop_b"] = ["<loop_a>"]
+
+    cycles = WildcardGraph()
+    for name, lines in wildcards.items():
+        cycles.update(name, lines)
+    start = time.perf_counter()
+    found = cycles.report_cycles()
+    print(f"⚙️ 순환 참조 검사: {(time.perf_counter() - start) * 1000:.2f}ms ({len(found)}개)")
+
+    tags = ['1girl', '<character>', '<preset_3>', 'x __hair_7__ y']
+    # 미리 펼친 와일드카드는 random.choice를 호출하지 않으므로 결과 비교는 무작위 선택이 없는 태그로만 함
+    deterministic_tags = ['<preset_3>', 'x __hair_7__ y', '<loop_a>']
+    results = {}
+    for flatten in (False, True):
+        processor = WildcardProcessor(MemoryWildcards(wildcards, flatten))
+        start = time.perf_counter()
+        for _ in range(20000):
+            processor.expand_tags(tags, PromptContext(source_row=None, settings={}))
+        elapsed = time.perf_counter() - start
+        context = PromptContext(source_row=None, settings={})
+        results[flatten] = (processor.expand_tags(deterministic_tags, context), context.global_append_tags, context.wildcard_history)
+        print(f"  - {'미리 펼침' if flatten else '매번 재귀'}: {elapsed:.2f}s")
+    print(f"⚙️ 결과 일치: {results[False] == results[True]}")
+
+
+if __name__ == '__main__':
+    main()
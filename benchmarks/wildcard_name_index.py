@@ -0,0 +1,61 @@
+# benchmarks/wildcard_name_index.py
+"""
+벤치마크: 와일드카드 이름 경로 트라이 vs 선형 스캔 (앱 실행에는 사용되지 않음)
+사용법: python -m benchmarks.wildcard_name_index
+"""
+
+import random
+import time
+from core.wildcard_name_index import WildcardNameIndex
+
+
+def linear_match(name: str, query: str) -> bool:
+    """비교용: 이름의 어떤 세그먼트 위치에서 시작하는 경로가 쿼리와 일치하는지 직접 확인"""
+    parts = query.strip('/').lower().split('/')
+    segments = name.lower().split('/')
+    for i in range(len(segments) - len(parts) + 1):
+        window = segments[i:i + len(parts)]
+        if window[:-1] == parts[:-1] and window[-1].startswith(parts[-1]):
+            return True
+    return False
+
+
+def main():
+    random.seed(0)
+    words = ["characters", "outfits", "poses", "backgrounds", "styles", "hair", "eyes", "casual", "formal",
+             "fantasy", "school", "summer", "winter", "indoor", "outdoor", "colors", "artists", "expressions"]
+    names = sorted({"/".join(random.choice(words) + (f"_{random.randint(0, 300)}" if depth else "")
+                             for depth in range(random.randint(1, 4))) for _ in range(50000)})
+    sizes = {name: random.randint(1, 500) for name in names}
+
+    index = WildcardNameIndex()
+    start = time.perf_counter()
+    for name, size in sizes.items():
+        index.set(name, size)
+    print(f"⚙️ 인덱스 구성: {time.perf_counter() - start:.2f}s ({len(index)}개 와일드카드)")
+
+    queries = ["c", "out", "hair_1", "characters/", "poses/casual", "summer_2"]
+    start = time.perf_counter()
+    index.complete("")
+    print(f"⚙️ 상위 K개 캐시 구성: {(time.perf_counter() - start) * 1000:.1f}ms")
+    for query in queries:
+        start = time.perf_counter()
+        indexed = index.complete(query)
+        indexed_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        scanned = sorted(((n, s) for n, s in sizes.items() if linear_match(n, query)), key=lambda x: (-x[1], x[0]))[:40]
+        scanned_ms = (time.perf_counter() - start) * 1000
+        print(f"  {query!r}: 인덱스 {indexed_ms:.2f}ms / 선형 스캔 {scanned_ms:.2f}ms (결과 {'일치' if indexed == scanned else '불일치'})")
+
+    # 증분 갱신
+    start = time.perf_counter()
+    for name in names[:1000]:
+        index.remove(name)
+    for name in names[:1000]:
+        index.set(name, sizes[name] + 1)
+    index.complete("c")
+    print(f"⚙️ 와일드카드 2000건 증분 갱신 + 재조회: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+# benchmarks/wildcard_processor.py
+"""
+벤치마크: 200 x 200 x 200 조합 열거, 전체 조합은 만들지 않음 (앱 실행에는 사용되지 않음)
+사용법: python -m benchmarks.wildcard_processor
+"""
+
+import time
+import tracemalloc
+from benchmarks.memory_wildcards import MemoryWildcards
+from core.wildcard_processor import WildcardProcessor, COMBINATION_STATE_KEY
+
+
+def main():
+    processor = WildcardProcessor(MemoryWildcards({
+        'outfit': [f"outfit_{i}, *accessory_{i}" for i in range(200)],
+        'pose': [f"pose_{i}" for i in range(200)],
+        'background': [f"background_{i}, <day|night>" for i in range(200)],
+    }))
+    tags = ['1girl', '<outfit>', '<pose>', 'in __background__']
+    for shuffle in (False, True):
+        start = time.perf_counter()
+        seen = set()
+        for prompt in processor.enumerate_combinations(tags, shuffle=shuffle, seed=0):
+            seen.add(tuple(prompt.tags))
+            if len(seen) == 20000:
+                break
+        elapsed = time.perf_counter() - start
+        state = prompt.wildcard_state[COMBINATION_STATE_KEY]
+
+        # 생성기 자체의 메모리 (결과를 보관하지 않음)
+        tracemalloc.start()
+        for prompt in processor.enumerate_combinations(tags, shuffle=shuffle, seed=0, start=state['total'] - 20000):
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"⚙️ {'무작위 순서' if shuffle else '혼합 기수 순서'}: {len(seen)}개 {elapsed:.2f}s "
+              f"({state['current']} / {state['total']}, 중복 없음: {len(seen) == state['current']}, 생성기 최대 메모리 {peak / 1e3:.0f}KB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+# benchmarks/wildcard_template.py
+"""
+벤치마크: 템플릿 컴파일 1회 + 캐시된 트리 평가, 시드 고정 배치 확장 (앱 실행에는 사용되지 않음)
+사용법: python -m benchmarks.wildcard_template
+"""
+
+import random
+import time
+from benchmarks.memory_wildcards import MemoryWildcards
+from core.prompt_context import PromptContext
+from core.wildcard_processor import WildcardProcessor
+from core.wildcard_template import compile_template
+
+
+def main():
+    random.seed(0)
+    manager = MemoryWildcards({
+        'hair': ['long hair', 'short hair, *blue eyes', '<red|blue> hair, ahoge', '__color__ hair'],
+        'color': ['red', 'green', '<sky|navy> blue'],
+        'outfit': ['*dress, *hat, smile', 'shirt, pants, shoes', '__hair__ and __color__'],
+        'pose': [f"pose_{i}, <standing|sitting>" for i in range(200)],
+    })
+    processor = WildcardProcessor(manager)
+    tags = ['1girl', '<hair>', '<outfit>', '<a|<hair>|b>', 'x __pose__ y', '<*pose>', '<$pose:color>', 'masterpiece']
+
+    start = time.perf_counter()
+    for tag in tags:
+        compile_template(tag)
+    print(f"⚙️ 템플릿 컴파일: {(time.perf_counter() - start) * 1000:.2f}ms")
+    count = 20000
+    start = time.perf_counter()
+    for _ in range(count):
+        processor.expand_tags(tags, PromptContext(source_row=None, settings={}))
+    elapsed = time.perf_counter() - start
+    print(f"⚙️ 프롬프트 {count}개 확장: {elapsed:.2f}s ({count / elapsed:.0f}개/s, 캐시 {compile_template.cache_info().currsize}개)")
+
+    # 배치 확장 (시드 고정 NumPy 난수로 선택 번호를 미리 뽑음)
+    start = time.perf_counter()
+    batch = processor.expand_batch(tags, count, seed=0)
+    elapsed = time.perf_counter() - start
+    print(f"⚙️ 배치 확장 {count}개: {elapsed:.2f}s ({count / elapsed:.0f}개/s, "
+          f"같은 시드 재현: {processor.expand_batch(tags, 100, seed=0) == batch[:100]})")
+
+
+if __name__ == '__main__':
+    main()
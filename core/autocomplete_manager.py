@@ -1,7 +1,9 @@
 import re
-from PyQt6.QtCore import QObject, QEvent, Qt, QTimer
+import weakref
+from PyQt6.QtCore import QObject, QEvent, Qt, QTimer, QThread, pyqtSignal, pyqtSlot
 from PyQt6.QtWidgets import QApplication, QListWidget, QWidget, QLineEdit, QTextEdit
 from PyQt6.QtGui import QTextCursor, QKeyEvent
+from core.prompt_tokenizer import get_prompt_tokenizer, strip_brackets
 
 # ✅ 전역 인스턴스 (싱글턴 패턴 대체)
 _autocomplete_manager = None
@@ -36,6 +38,43 @@ def reset_autocomplete_manager():
         print("🔄 AutoCompleteManager 전역 인스턴스 리셋")
         _autocomplete_manager = None
 
+class CompletionWorker(QObject):
+    """
+    [신규] 자동완성 검색(find_top_matches)을 GUI 스레드 밖에서 수행하는 워커.
+    요청마다 세대 번호가 붙으며, 실행 전에 더 최신 요청이 들어와 있으면 검색을 건너뜁니다.
+    """
+    finished = pyqtSignal(int, object) # (generation, [(tag, count), ...])
+    error_occurred = pyqtSignal(int, str)
+
+    def __init__(self, tag_data_manager):
+        super().__init__()
+        self.tag_data_manager = tag_data_manager
+        self.latest_generation = 0 # GUI 스레드에서 갱신 (int 대입은 원자적)
+
+    @pyqtSlot(int, str, object)
+    def run(self, generation: int, target_text: str, additional_wildcards):
+        if generation != self.latest_generation:
+            return # 대기열에 쌓인 오래된 요청
+        try:
+            matches = self.tag_data_manager.find_top_matches(
+                target_text,
+                additional_wildcards=additional_wildcards
+            )
+            self.finished.emit(generation, matches)
+        except Exception as e:
+            self.error_occurred.emit(generation, f"자동완성 검색 중 오류: {e}")
+
+    @pyqtSlot(int, object)
+    def run_next_tags(self, generation: int, context_tags):
+        """[신규] 프롬프트의 기존 태그와 자주 함께 쓰이는 다음 태그를 추천합니다."""
+        if generation != self.latest_generation:
+            return
+        try:
+            self.finished.emit(generation, self.tag_data_manager.suggest_next_tags(context_tags))
+        except Exception as e:
+            self.error_occurred.emit(generation, f"다음 태그 추천 중 오류: {e}")
+
+
 class AutoCompleteManager(QObject):
     """
     애플리케이션 전체의 텍스트 입력 위젯에 대한 자동완성 기능을 관리하는 클래스.
@@ -48,6 +87,14 @@ class AutoCompleteManager(QObject):
     2. 위젯 이름을 ignored_widget_names에 추가
     3. 부모 위젯 이름을 ignored_parent_names에 추가
     """
+    completion_requested = pyqtSignal(int, str, object) # [신규] (generation, target_text, additional_wildcards)
+    next_tags_requested = pyqtSignal(int, object) # [신규] (generation, [context_tag, ...])
+    # [신규] 이벤트 필터가 처리하는 이벤트 종류 (나머지는 즉시 통과)
+    HANDLED_EVENT_TYPES = frozenset({
+        QEvent.Type.KeyPress, QEvent.Type.KeyRelease, QEvent.Type.FocusOut,
+        QEvent.Type.ParentChange, QEvent.Type.DynamicPropertyChange,
+    })
+    DEBOUNCE_MS = 60
 
     def __init__(self, app_context=None, main_window=None):
         """
@@ -92,6 +139,13 @@ class AutoCompleteManager(QObject):
         self.current_widget = None
         self.active_token_info = {}
 
+        # [신규] 백그라운드 검색 상태: 키 입력마다 세대를 올려 진행 중인 결과를 무효화
+        self._completion_generation = 0
+        self._pending_request = None # (generation, widget, token_info)
+        self._completion_thread = None
+        self._completion_worker = None
+        self._start_completion_worker()
+
         # 자동완성 제외 설정
         self.ignored_widget_names = {
             "password_input", 
@@ -107,6 +161,9 @@ class AutoCompleteManager(QObject):
             "password_dialog"
         }
 
+        # [신규] 위젯별 자동완성 제외 여부 캐시 (위젯이 삭제되면 자동으로 제거됨)
+        self._ignore_cache = weakref.WeakKeyDictionary()
+
         # 이벤트 필터 설치
         app_instance = QApplication.instance()
         if app_instance:
@@ -154,30 +211,70 @@ class AutoCompleteManager(QObject):
 
     def eventFilter(self, watched: QObject, event: QEvent) -> bool:
         """이벤트 필터: 텍스트 입력 위젯에서 자동완성 트리거"""
-        # 감시 대상이 QLineEdit 또는 QTextEdit인지 확인
+        # [수정] 애플리케이션 전체 이벤트가 지나가므로 가장 싼 검사(위젯 클래스)로 먼저 돌려보냄
+        # (PyQt6의 event.type()은 enum 객체를 만들기 때문에 isinstance보다 훨씬 비쌈)
         if not isinstance(watched, (QLineEdit, QTextEdit)):
             return super().eventFilter(watched, event)
-        
+
+        # 처리하지 않는 이벤트 종류는 즉시 통과
+        event_type = event.type()
+        if event_type not in self.HANDLED_EVENT_TYPES:
+            return super().eventFilter(watched, event)
+
+        # 위젯의 부모나 제외 속성이 바뀌면 캐시된 판정을 무효화
+        if event_type == QEvent.Type.ParentChange:
+            self._ignore_cache.pop(watched, None)
+            return super().eventFilter(watched, event)
+        if event_type == QEvent.Type.DynamicPropertyChange:
+            if event.propertyName() == b"autocomplete_ignore":
+                self._ignore_cache.pop(watched, None)
+            return super().eventFilter(watched, event)
+
         # 자동완성 제외 위젯 확인
         if self._should_ignore_widget(watched):
             return super().eventFilter(watched, event)
         
         # 팝업이 보이는 경우, 키보드 네비게이션을 최우선으로 처리
-        if self.popup.isVisible() and event.type() == QEvent.Type.KeyPress:
+        if self.popup.isVisible() and event_type == QEvent.Type.KeyPress:
             if self.handle_popup_navigation(event):
                 return True # 이벤트 소비
 
         # 이벤트 타입에 따라 처리
-        if event.type() == QEvent.Type.KeyRelease:
+        if event_type == QEvent.Type.KeyRelease:
             self.on_key_release(watched, event)
-        elif event.type() == QEvent.Type.FocusOut:
+        elif event_type == QEvent.Type.FocusOut:
+            self._invalidate_completions()
             # 약간의 지연을 주어, 팝업 클릭 시 바로 닫히지 않도록 함
             QTimer.singleShot(100, lambda: self.popup.hide() if not self.popup.hasFocus() else None)
 
         return super().eventFilter(watched, event)
 
     def _should_ignore_widget(self, widget: QWidget) -> bool:
-        """위젯이 자동완성을 무시해야 하는지 확인"""
+        """[수정] 위젯이 자동완성을 무시해야 하는지 확인 (부모 체인 탐색 결과를 캐시)"""
+        # 비밀번호 모드는 언제든 바뀔 수 있고 확인 비용이 작으므로 캐시하지 않음
+        if isinstance(widget, QLineEdit) and widget.echoMode() == QLineEdit.EchoMode.Password:
+            return True
+
+        try:
+            return self._ignore_cache[widget]
+        except KeyError:
+            pass
+        except TypeError:
+            return self._compute_should_ignore(widget) # 약한 참조를 지원하지 않는 객체
+
+        ignored = self._compute_should_ignore(widget)
+        self._ignore_cache[widget] = ignored
+        return ignored
+
+    def invalidate_ignore_cache(self):
+        """
+        [신규] 캐시된 제외 판정을 모두 버립니다.
+        위젯 자신의 부모/속성 변경은 자동으로 반영되지만, 조상 위젯의 이름 변경이나
+        재배치 후에는 이 메서드를 호출해야 합니다.
+        """
+        self._ignore_cache.clear()
+
+    def _compute_should_ignore(self, widget: QWidget) -> bool:
         # 1. 위젯 속성으로 직접 설정된 경우
         if widget.property("autocomplete_ignore"):
             return True
@@ -194,26 +291,25 @@ class AutoCompleteManager(QObject):
             if parent_name and parent_name in self.ignored_parent_names:
                 return True
             parent = parent.parent()
-        
-        # 4. 위젯이 비밀번호 입력 모드인 경우
-        if isinstance(widget, QLineEdit) and widget.echoMode() == QLineEdit.EchoMode.Password:
-            return True
             
         return False
     
     def add_ignored_widget_name(self, widget_name: str):
         """무시할 위젯 이름을 동적으로 추가"""
         self.ignored_widget_names.add(widget_name)
+        self.invalidate_ignore_cache()
         print(f"✅ '{widget_name}' 위젯이 자동완성 제외 목록에 추가되었습니다.")
     
     def remove_ignored_widget_name(self, widget_name: str):
         """무시할 위젯 이름을 제거"""
         self.ignored_widget_names.discard(widget_name)
+        self.invalidate_ignore_cache()
         print(f"✅ '{widget_name}' 위젯이 자동완성 제외 목록에서 제거되었습니다.")
     
     def add_ignored_parent_name(self, parent_name: str):
         """무시할 부모 위젯 이름을 동적으로 추가"""
         self.ignored_parent_names.add(parent_name)
+        self.invalidate_ignore_cache()
         print(f"✅ '{parent_name}' 부모 위젯이 자동완성 제외 목록에 추가되었습니다.")
 
     def on_key_release(self, widget: QWidget, event: QKeyEvent):
@@ -221,42 +317,90 @@ class AutoCompleteManager(QObject):
         nav_keys = [Qt.Key.Key_Up, Qt.Key.Key_Down, Qt.Key.Key_Enter, Qt.Key.Key_Return, Qt.Key.Key_Tab, Qt.Key.Key_Escape]
         if event.key() not in nav_keys:
             self.current_widget = widget
-            self.timer.start(200)
+            # [수정] 검색이 UI를 막지 않으므로 디바운스를 짧게 유지
+            self._invalidate_completions()
+            self.timer.start(self.DEBOUNCE_MS)
+
+    def _start_completion_worker(self):
+        """[신규] 자동완성 검색 전용 스레드를 시작합니다. (앱 종료 시까지 유지)"""
+        if not self.tag_data_manager:
+            return
+        self._completion_thread = QThread()
+        self._completion_worker = CompletionWorker(self.tag_data_manager)
+        self._completion_worker.moveToThread(self._completion_thread)
+
+        self.completion_requested.connect(self._completion_worker.run)
+        self.next_tags_requested.connect(self._completion_worker.run_next_tags)
+        self._completion_worker.finished.connect(self.on_completions_ready)
+        self._completion_worker.error_occurred.connect(self.on_completion_error)
+
+        app_instance = QApplication.instance()
+        if app_instance:
+            app_instance.aboutToQuit.connect(self._stop_completion_worker)
+        self._completion_thread.start()
+
+    def _stop_completion_worker(self):
+        if self._completion_thread is not None:
+            self._completion_thread.quit()
+            self._completion_thread.wait()
+            self._completion_thread = None
+
+    def _invalidate_completions(self):
+        """진행 중이거나 대기 중인 검색 결과를 모두 무효화합니다."""
+        self._completion_generation += 1
+        self._pending_request = None
+        if self._completion_worker is not None:
+            self._completion_worker.latest_generation = self._completion_generation
 
     def show_completions(self):
-        """자동완성 목록을 표시하는 메서드"""
+        """[수정] 현재 토큰으로 백그라운드 검색을 요청합니다. 결과는 on_completions_ready에서 표시됩니다."""
         if not self.current_widget: 
             return
             
         # 현재 활성 토큰 정보 가져오기
         token_info = self._get_active_token_info(self.current_widget)
-        if not token_info or len(token_info['stripped_text']) < 1:
+        if not token_info:
             self.popup.hide()
             return
-            
-        self.active_token_info = token_info
-        target_text = token_info['stripped_text']
+
+        if not self.tag_data_manager or self._completion_worker is None:
+            print("⚠️ tag_data_manager가 없습니다")
+            self.popup.hide()
+            return
+
+        # [신규] 콤마 뒤 빈 토큰이면 기존 태그와 자주 함께 쓰이는 태그를 추천
+        if len(token_info['stripped_text']) < 1:
+            context_tags = self._get_context_tags(self.current_widget, token_info)
+            if not context_tags:
+                self.popup.hide()
+                return
+            generation = self._completion_generation
+            self._pending_request = (generation, self.current_widget, token_info)
+            self.next_tags_requested.emit(generation, context_tags)
+            return
         
-        # wildcard_manager가 있다면 추가 와일드카드도 전달
+        # wildcard_manager가 있다면 추가 와일드카드도 전달 ([수정] 이름 인덱스가 있으면 인덱스를 전달)
         additional_wildcards = None
         if self.wildcard_manager:
-            additional_wildcards = getattr(self.wildcard_manager, 'wildcard_dict_tree', None)
-        
-        # TagDataManager를 통해 매칭 결과 가져오기
-        try:
-            if not self.tag_data_manager:
-                print("⚠️ tag_data_manager가 없습니다")
-                self.popup.hide()
-                return
-                
-            matches = self.tag_data_manager.find_top_matches(
-                target_text, 
-                additional_wildcards=additional_wildcards
-            )
-        except Exception as e:
-            print(f"⚠️ 자동완성 검색 중 오류: {e}")
-            self.popup.hide()
+            # 비어있는 이름 인덱스도 인덱스로 전달 (와일드카드 로드 전에 사전 전체 스캔으로 되돌아가지 않도록)
+            additional_wildcards = getattr(self.wildcard_manager, 'name_index', None)
+            if additional_wildcards is None:
+                additional_wildcards = getattr(self.wildcard_manager, 'wildcard_dict_tree', None)
+
+        generation = self._completion_generation
+        self._pending_request = (generation, self.current_widget, token_info)
+        self.completion_requested.emit(generation, token_info['stripped_text'], additional_wildcards)
+
+    def on_completions_ready(self, generation: int, matches):
+        """[신규] 최신 요청의 결과일 때만 팝업을 채웁니다."""
+        if self._pending_request is None or generation != self._pending_request[0]:
+            return # 이후 입력으로 무효화된 결과
+        _, widget, token_info = self._pending_request
+        self._pending_request = None
+        if widget is not self.current_widget:
             return
+
+        self.active_token_info = token_info
         
         # 매칭 결과가 없으면 팝업 숨기기
         if not matches:
@@ -268,6 +412,12 @@ class AutoCompleteManager(QObject):
         self._populate_popup_with_counts(matches)
         self.popup_at_cursor()
 
+    def on_completion_error(self, generation: int, message: str):
+        print(f"⚠️ {message}")
+        if self._pending_request is not None and generation == self._pending_request[0]:
+            self._pending_request = None
+            self.popup.hide()
+
     def popup_at_cursor(self):
         """커서 위치에 팝업을 표시"""
         if not self.current_widget:
@@ -373,8 +523,12 @@ class AutoCompleteManager(QObject):
         
     def _get_active_token_info(self, widget: QWidget) -> dict:
         """현재 커서 위치의 단어(토큰), 괄호, 시작/끝 위치를 반환"""
-        text = widget.toPlainText() if isinstance(widget, QTextEdit) else widget.text()
-        pos = widget.textCursor().position() if isinstance(widget, QTextEdit) else widget.cursorPosition()
+        # [수정] 여러 줄 편집기는 문서별 증분 토크나이저에서 O(log n)으로 조회
+        if isinstance(widget, QTextEdit):
+            return get_prompt_tokenizer(widget.document()).active_token_info(widget.textCursor().position())
+
+        text = widget.text()
+        pos = widget.cursorPosition()
 
         # 왼쪽 경계(콤마 또는 시작) 찾기
         start_pos = text.rfind(',', 0, pos)
@@ -405,23 +559,34 @@ class AutoCompleteManager(QObject):
             'end': end_pos
         }
 
+    def _get_context_tags(self, widget: QWidget, token_info: dict) -> list:
+        """
+        [신규] 콤마 바로 뒤의 빈 토큰일 때, 프롬프트에 이미 있는 태그 목록을 반환합니다. (그 외에는 빈 목록)
+        콤마 뒤에 공백이 없으면 완성 시 공백을 붙이도록 token_info의 prefix를 조정합니다.
+        """
+        tokenizer = get_prompt_tokenizer(widget.document()) if isinstance(widget, QTextEdit) else None
+        text = tokenizer.text if tokenizer else widget.text()
+        before = text[:token_info['start']]
+        if not before.rstrip().endswith(','):
+            return []
+        if before.endswith(','):
+            token_info['prefix'] = ' '
+
+        if tokenizer:
+            return [tag.replace('_', ' ') for tag in tokenizer.tags()]
+
+        context_tags = []
+        for part in re.split(r'[,\n]', text):
+            stripped, _, _ = self._strip_brackets(part)
+            tag = stripped.strip().replace('_', ' ')
+            if tag:
+                context_tags.append(tag)
+        return context_tags
+
     def _strip_brackets(self, keyword: str) -> tuple[str, str, str]:
         """단어 앞뒤의 괄호를 분리합니다."""
-        if not isinstance(keyword, str):
-            return "", "", ""
-
-        keyword_stripped = keyword.strip()
-        prefix_match = re.match(r'^[\{\[\(]+', keyword_stripped)
-        prefix = prefix_match.group(0) if prefix_match else ''
-        suffix_match = re.search(r'[\}\]\)]+$', keyword_stripped)
-        suffix = suffix_match.group(0) if suffix_match else ''
-        
-        if len(prefix) + len(suffix) > len(keyword_stripped):
-             return keyword_stripped, "", ""
-
-        stripped_keyword = keyword_stripped[len(prefix):len(keyword_stripped) - len(suffix)]
-        return stripped_keyword, prefix, suffix
+        return strip_brackets(keyword)
     
     def _restore_brackets(self, keyword, prefix, suffix):
         """분리했던 괄호를 다시 합칩니다."""
-        return f"{prefix}{keyword}{suffix}"
\ No newline at end of file
+        return f"{prefix}{keyword}{suffix}"
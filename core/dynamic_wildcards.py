@@ -0,0 +1,242 @@
+# core/dynamic_wildcards.py
+
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from collections import Counter
+from dataclasses import dataclass
+from multiprocessing import Pool, cpu_count
+from typing import Dict, List, Optional, Tuple
+from PyQt6.QtCore import QObject, pyqtSignal
+from core.search_engine import SearchEngine
+
+# wildcards 폴더 안의 동적 와일드카드 정의 파일 확장자 (이름은 .txt 와일드카드와 같은 규칙)
+DEFINITION_SUFFIX = '.query'
+DEFAULT_DYNAMIC_CACHE_PATH = os.path.join('data', 'dynamic_wildcard_cache.json')
+_CACHE_VERSION = 1
+
+# 값을 뽑을 수 있는 컬럼과, 검색용 태그 문자열을 만들 때 필요한 컬럼
+VALUE_COLUMNS = ('character', 'copyright', 'artist', 'general', 'meta')
+_SHARD_COLUMNS = ['general', 'character', 'copyright', 'artist', 'meta', 'rating']
+_ALL_RATINGS = ('g', 's', 'q', 'e')
+
+
+@dataclass(frozen=True)
+class DynamicWildcardDefinition:
+    """
+    [신규] 태그 코퍼스 검색으로 줄 목록을 만드는 동적 와일드카드 정의.
+    정의 파일(예: wildcards/characters/blue_archive.query)은 'key: value' 형식입니다.
+
+        query: blue archive
+        column: character
+        exclude: cosplay        (선택)
+        ratings: g, s           (선택, 기본값은 모든 등급)
+        min_count: 5            (선택, 이보다 게시물 수가 적은 값은 제외)
+    """
+    name: str
+    query: str
+    column: str = 'character'
+    exclude_query: str = ''
+    ratings: Tuple[str, ...] = _ALL_RATINGS
+    min_count: int = 1
+
+    @property
+    def cache_key(self) -> str:
+        """검색 결과를 결정하는 항목만으로 만든 캐시 키 (같은 검색을 하는 정의는 결과를 공유)"""
+        return json.dumps([self.query, self.exclude_query, self.column, sorted(self.ratings)], ensure_ascii=False)
+
+
+def parse_definition(file_path: str, name: str) -> Optional[DynamicWildcardDefinition]:
+    """정의 파일을 읽습니다. 형식이 잘못되었으면 경고를 출력하고 None을 반환합니다."""
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            fields = {}
+            for line in f:
+                key, separator, value = line.partition(':')
+                if separator and not line.lstrip().startswith('#'):
+                    fields[key.strip().lower()] = value.strip()
+    except OSError as e:
+        print(f"❌ 동적 와일드카드 정의 읽기 오류 {file_path}: {e}")
+        return None
+
+    column = fields.get('column', 'character').lower()
+    ratings = tuple(r for r in (part.strip().lower() for part in fields.get('ratings', '').split(',')) if r in _ALL_RATINGS)
+    try:
+        min_count = max(1, int(fields.get('min_count', 1)))
+    except ValueError:
+        min_count = 1
+    if not fields.get('query') or column not in VALUE_COLUMNS:
+        print(f"⚠️ 동적 와일드카드 정의에 query가 없거나 column이 잘못되었습니다 ({', '.join(VALUE_COLUMNS)}): {file_path}")
+        return None
+    return DynamicWildcardDefinition(name, fields['query'], column, fields.get('exclude', ''),
+                                     ratings or _ALL_RATINGS, min_count)
+
+
+def find_definitions(wildcards_dir: str) -> List[DynamicWildcardDefinition]:
+    """wildcards 폴더의 모든 정의 파일을 읽습니다."""
+    definitions = []
+    for root, _, files in os.walk(wildcards_dir):
+        for file in files:
+            if file.endswith(DEFINITION_SUFFIX):
+                file_path = os.path.join(root, file)
+                relative_path = os.path.relpath(file_path, wildcards_dir).replace(os.sep, '/')
+                definition = parse_definition(file_path, relative_path[:-len(DEFINITION_SUFFIX)])
+                if definition is not None:
+                    definitions.append(definition)
+    return definitions
+
+
+def corpus_fingerprint(tags_dir: str) -> Dict[str, Tuple[int, int]]:
+    """코퍼스 지문: 샤드 파일 이름 → (크기, 수정 시각 ns). 바뀐 샤드만 다시 검색하는 데 사용합니다."""
+    fingerprint = {}
+    with os.scandir(tags_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith('.parquet') and entry.is_file():
+                stat = entry.stat()
+                fingerprint[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    return fingerprint
+
+
+def scan_shard(file_path: str, definitions: List[DynamicWildcardDefinition]) -> Tuple[str, Dict[str, Dict[str, int]]]:
+    """
+    [map] 샤드 하나를 한 번 읽어 여러 정의의 값별 게시물 수를 셉니다.
+    반환: (샤드 파일 이름, {정의 캐시 키: {값: 게시물 수}})
+    """
+    shard = os.path.basename(file_path)
+    try:
+        df = pd.read_parquet(file_path, engine="pyarrow", columns=_SHARD_COLUMNS)
+    except Exception as e:
+        print(f"⚠️ 샤드를 읽지 못해 건너뜁니다: {file_path} ({e})")
+        return shard, {}
+
+    engine = SearchEngine()
+    tags_string = engine.build_tags_string(df)
+    rating = df['rating'].astype(str)
+    counts = {}
+    for definition in definitions:
+        matched = np.flatnonzero(rating.isin(definition.ratings).to_numpy())
+        mask = engine.query_mask(tags_string.iloc[matched], definition.query, definition.exclude_query)
+        values = df[definition.column].iloc[matched[mask]].dropna().astype(str)
+        exploded = values.str.split(',').explode().str.strip()
+        exploded = exploded[exploded != '']
+        # 한 게시물 안의 같은 값은 한 번만 셈
+        pairs = pd.DataFrame({'row': exploded.index, 'value': exploded.to_numpy()}).drop_duplicates()
+        counts[definition.cache_key] = {str(value): int(count) for value, count in pairs['value'].value_counts().items()}
+    return shard, counts
+
+
+def _scan_shard_args(args):
+    return scan_shard(*args)
+
+
+def _load_cache(cache_path: str) -> Dict[str, Dict[str, dict]]:
+    """{정의 캐시 키: {샤드 이름: {'size', 'mtime_ns', 'counts'}}}"""
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == _CACHE_VERSION:
+            return data.get('definitions', {})
+    except (OSError, ValueError) as e:
+        print(f"⚠️ 동적 와일드카드 캐시를 무시합니다: {e}")
+    return {}
+
+
+def _save_cache(cache_path: str, definitions: Dict[str, Dict[str, dict]]):
+    temp_path = f"{cache_path}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': _CACHE_VERSION, 'definitions': definitions}, f, ensure_ascii=False)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        print(f"⚠️ 동적 와일드카드 캐시 저장 실패: {e}")
+
+
+def resolve_dynamic_wildcards(definitions: List[DynamicWildcardDefinition], tags_dir: str = 'data/tags',
+                              cache_path: str = DEFAULT_DYNAMIC_CACHE_PATH,
+                              processes: Optional[int] = None) -> Dict[str, List[str]]:
+    """
+    [reduce] 동적 와일드카드들의 줄 목록(게시물 수 내림차순)을 만듭니다.
+    정의별·샤드별 결과를 코퍼스 지문(샤드 크기/수정 시각)과 함께 캐시하므로, 캐시에 없는 정의나
+    바뀌거나 새로 생긴 샤드만 검색하고, 사라진 샤드의 결과는 버립니다.
+    """
+    if not definitions:
+        return {}
+    if not os.path.isdir(tags_dir):
+        print(f"⚠️ 태그 코퍼스가 없어 동적 와일드카드를 만들 수 없습니다: {tags_dir}")
+        return {}
+
+    start = time.perf_counter()
+    fingerprint = corpus_fingerprint(tags_dir)
+    cached = _load_cache(cache_path)
+    unique = {definition.cache_key: definition for definition in definitions}
+
+    # 다시 검색해야 하는 (샤드, 정의) 묶음
+    stale: Dict[str, List[DynamicWildcardDefinition]] = {}
+    for key, definition in unique.items():
+        shards = cached.get(key, {})
+        for shard, (size, mtime_ns) in fingerprint.items():
+            entry = shards.get(shard)
+            if entry is None or entry['size'] != size or entry['mtime_ns'] != mtime_ns:
+                stale.setdefault(shard, []).append(definition)
+
+    results = {key: {shard: entry for shard, entry in cached.get(key, {}).items() if shard in fingerprint}
+               for key in unique}
+    if stale:
+        tasks = [(os.path.join(tags_dir, shard), shard_definitions) for shard, shard_definitions in sorted(stale.items())]
+        if processes is None:
+            processes = max(1, min(cpu_count() // 2, 8, len(tasks)))
+        if processes == 1:
+            scanned = map(_scan_shard_args, tasks)
+            pool = None
+        else:
+            pool = Pool(processes=processes)
+            scanned = pool.imap_unordered(_scan_shard_args, tasks)
+        try:
+            for shard, shard_counts in scanned:
+                size, mtime_ns = fingerprint[shard]
+                for key, counts in shard_counts.items():
+                    results[key][shard] = {'size': size, 'mtime_ns': mtime_ns, 'counts': counts}
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    if stale or set(cached) != set(results) or any(len(cached.get(k, {})) != len(v) for k, v in results.items()):
+        _save_cache(cache_path, results)
+
+    resolved = {}
+    for definition in definitions:
+        totals = Counter()
+        for entry in results[definition.cache_key].values():
+            totals.update(entry['counts'])
+        resolved[definition.name] = [value for value, count in sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+                                     if count >= definition.min_count]
+
+    print(f"✅ 동적 와일드카드 {len(resolved)}개 준비 완료. (샤드 {len(fingerprint)}개 중 {len(stale)}개 검색, "
+          f"{time.perf_counter() - start:.2f}s)")
+    return resolved
+
+
+class DynamicWildcardLoader(QObject):
+    """[신규] 동적 와일드카드 정의를 찾아 백그라운드 스레드에서 코퍼스 검색 결과로 만드는 워커"""
+    finished = pyqtSignal(dict)
+
+    def __init__(self, wildcards_dir: str, tags_dir: str = 'data/tags', cache_path: str = DEFAULT_DYNAMIC_CACHE_PATH):
+        super().__init__()
+        self.wildcards_dir = wildcards_dir
+        self.tags_dir = tags_dir
+        self.cache_path = cache_path
+
+    def run(self):
+        resolved = {}
+        try:
+            resolved = resolve_dynamic_wildcards(find_definitions(self.wildcards_dir), self.tags_dir, self.cache_path)
+        except Exception as e:
+            print(f"❌ 동적 와일드카드 생성 오류: {e}")
+        finally:
+            self.finished.emit(resolved)
@@ -0,0 +1,141 @@
+import numpy as np
+from typing import List, Tuple
+from core.tag_dictionary import CompactTagDictionary
+
+class FuzzyTagIndex:
+    """
+    오타를 허용하는 태그 자동완성 인덱스 (SymSpell 방식의 삭제 이웃 색인).
+
+    태그 이름의 앞 W글자(W = 3..prefix_length)에서 최대 max_distance개 글자를 지운 변형을 창 길이별로 색인해 두고,
+    쿼리도 같은 길이(min(쿼리 길이, prefix_length))로 잘라 같은 방식으로 변형하여 일치하는 후보만 모읍니다.
+    양쪽을 같은 길이로 자르면 편집 한 번이 양쪽에서 최대 한 글자 삭제로 대응되므로 후보가 누락되지 않습니다.
+    후보는 '쿼리와 이름 접두사 사이의 편집 거리'로 검증하며, 결과는 편집 거리 오름차순 → 개수 내림차순입니다.
+    """
+    MIN_QUERY_LENGTH = 3
+
+    def __init__(self, dictionary: CompactTagDictionary, pool: np.ndarray,
+                 max_distance: int = 2, prefix_length: int = 7, counts: np.ndarray = None):
+        self.dictionary = dictionary
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+
+        self.entries = np.flatnonzero(pool)
+        self.names = dictionary.names(self.entries)
+        self.update_counts(dictionary.counts if counts is None else counts)
+
+        # {창 길이: (변형 해시, 해시별 접두사 ID, 접두사별 항목 CSR)} - 해당 길이의 쿼리가 처음 들어올 때 구성
+        self._windows = {}
+
+    def update_counts(self, counts: np.ndarray):
+        """[신규] 동률 정렬에 쓰는 개수를 교체합니다. (삭제 변형 색인은 개수와 무관하므로 유지)"""
+        self.counts = counts[self.entries].astype(np.int64)
+
+    def _window(self, width: int) -> tuple:
+        window = self._windows.get(width)
+        if window is None:
+            window = self._build_window(width)
+            self._windows[width] = window
+        return window
+
+    def _build_window(self, width: int) -> tuple:
+        # 같은 접두사를 가진 이름끼리 묶어 변형 생성 횟수를 줄임
+        prefix_ids = {}
+        entry_prefix = np.empty(len(self.names), dtype=np.int64)
+        for i, name in enumerate(self.names):
+            entry_prefix[i] = prefix_ids.setdefault(name[:width], len(prefix_ids))
+
+        # 접두사 ID → 항목(로컬 번호) CSR
+        members = np.argsort(entry_prefix, kind='stable')
+        pointers = np.zeros(len(prefix_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(entry_prefix, minlength=len(prefix_ids)), out=pointers[1:])
+
+        # 삭제 변형의 해시 → 접두사 ID (해시로 정렬하여 이진 탐색)
+        hashes, owners = [], []
+        for prefix, prefix_id in prefix_ids.items():
+            variants = self._deletes(prefix, self._distance_for(width))
+            hashes.extend(map(hash, variants))
+            owners.extend([prefix_id] * len(variants))
+        hashes = np.asarray(hashes, dtype=np.int64)
+        order = np.argsort(hashes, kind='stable')
+        return hashes[order], np.asarray(owners, dtype=np.int64)[order], members, pointers
+
+    @staticmethod
+    def _deletes(word: str, max_distance: int) -> set:
+        """word에서 0~max_distance개 글자를 지운 모든 변형"""
+        variants = {word}
+        frontier = {word}
+        for _ in range(max_distance):
+            frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+            variants |= frontier
+        return variants
+
+    def _distance_for(self, length: int) -> int:
+        """쿼리 길이별 허용 오타 수. 짧은 쿼리는 줄여서 무관한 결과가 쏟아지지 않게 함"""
+        if length < self.MIN_QUERY_LENGTH:
+            return 0
+        if length <= 4:
+            return min(1, self.max_distance)
+        return self.max_distance
+
+    def _candidates(self, query: str, distance: int) -> np.ndarray:
+        width = min(len(query), self.prefix_length)
+        delete_hashes, delete_owners, members, pointers = self._window(width)
+        keys = np.fromiter((hash(v) for v in self._deletes(query[:width], distance)), dtype=np.int64)
+        keys.sort()
+        left = np.searchsorted(delete_hashes, keys, side='left')
+        right = np.searchsorted(delete_hashes, keys, side='right')
+        if not np.any(right > left):
+            return np.zeros(0, dtype=np.int64)
+        owners = np.concatenate([delete_owners[l:r] for l, r in zip(left, right) if r > l])
+        owners = np.unique(owners)
+        return np.concatenate([members[pointers[o]:pointers[o + 1]] for o in owners])
+
+    @staticmethod
+    def prefix_distances(query: str, names: List[str], max_distance: int) -> np.ndarray:
+        """
+        각 이름에 대해 '쿼리 ↔ 이름의 어떤 접두사' 최소 편집 거리를 계산합니다.
+        후보 전체를 한 번에 처리하도록 DP의 각 칸을 NumPy 벡터 연산으로 수행합니다.
+        """
+        width = len(query) + max_distance
+        if not names:
+            return np.zeros(0, dtype=np.int64)
+        matrix = np.full((len(names), width), -1, dtype=np.int64)
+        lengths = np.empty(len(names), dtype=np.int64)
+        for row, name in enumerate(names):
+            head = name[:width]
+            lengths[row] = len(head)
+            matrix[row, :len(head)] = [ord(c) for c in head]
+
+        previous = np.broadcast_to(np.arange(width + 1, dtype=np.int64), (len(names), width + 1)).copy()
+        for i, char in enumerate(query, start=1):
+            current = np.empty_like(previous)
+            current[:, 0] = i
+            mismatch = (matrix != ord(char)).astype(np.int64)
+            for j in range(1, width + 1):
+                current[:, j] = np.minimum(
+                    np.minimum(previous[:, j], current[:, j - 1]) + 1,
+                    previous[:, j - 1] + mismatch[:, j - 1]
+                )
+            previous = current
+
+        # 이름 길이를 넘는 칸은 접두사가 아니므로 제외
+        columns = np.arange(width + 1)
+        previous[columns[None, :] > lengths[:, None]] = np.iinfo(np.int64).max
+        return previous.min(axis=1)
+
+    def search(self, query: str, limit: int = 40) -> List[Tuple[int, int]]:
+        """오타를 허용하여 (사전 항목 번호, 편집 거리) 목록을 거리 → 개수 순으로 반환합니다."""
+        query = query.strip().lower()
+        distance = self._distance_for(len(query))
+        if distance == 0:
+            return []
+
+        candidates = self._candidates(query, distance)
+        if len(candidates) == 0:
+            return []
+        distances = self.prefix_distances(query, [self.names[i] for i in candidates], distance)
+        keep = distances <= distance
+        candidates, distances = candidates[keep], distances[keep]
+
+        order = np.lexsort((-self.counts[candidates], distances))[:limit]
+        return [(int(self.entries[candidates[i]]), int(distances[i])) for i in order]
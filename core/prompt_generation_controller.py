@@ -83,7 +83,7 @@ class PromptGenerationController(QObject):
             self.prompt_popped.emit(search_results.get_count()) # 남은 행 개수는 그대로 표시
         else:
             # 기존 로직: 검색 결과에서 프롬프트를 가져옵니다.
-            source_row = search_results.pop_random_row()
+            source_row = search_results.pop_random_row(settings.get('sampling_weight', 'uniform'))
             if source_row is None:
                 self.generation_error.emit("처리할 프롬프트가 더 이상 없습니다.")
                 return
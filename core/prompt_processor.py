@@ -1,15 +1,21 @@
 import pandas as pd
 from typing import Dict, Any
 from core.prompt_context import PromptContext
-from core.wildcard_processor import WildcardProcessor # 이전 단계에서 생성
+from core.wildcard_processor import WildcardProcessor, COMBINATION_STATE_KEY # 이전 단계에서 생성
 from core.context import AppContext
 
 class PromptProcessor:
     PIPELINE_NAME = "PromptProcessor"
+    # [신규] 조합 순회 시 선행/후행 태그를 나누는 구분자
+    _COMBINATION_SEPARATOR = '\x1f'
 
     def __init__(self, app_context: AppContext):
         self.app_context = app_context
         self.wildcard_processor = WildcardProcessor(app_context.main_window.wildcard_manager)
+        # [신규] 조합 순회 모드 상태: (순회 중인 태그 목록, 조합 생성기, 전체 조합 수)
+        self._combination_key = None
+        self._combinations = None
+        self._combination_total = 0
 
     def process(self) -> PromptContext:
         """
@@ -68,10 +74,43 @@ class PromptProcessor:
 
     def _step_3_expand_wildcards(self, context: PromptContext) -> PromptContext:
         """와일드카드를 실제 태그로 치환하는 단계"""
+        if context.settings.get('wildcard_combination', False):
+            return self._expand_next_combination(context)
         context.prefix_tags = self.wildcard_processor.expand_tags(context.prefix_tags, context)
         context.postfix_tags = self.wildcard_processor.expand_tags(context.postfix_tags, context)
         return context
 
+    def _expand_next_combination(self, context: PromptContext) -> PromptContext:
+        """
+        [신규] 조합 순회 모드: 선행/후행 태그의 무작위 와일드카드 조합을 생성할 때마다 하나씩 차례로 사용합니다.
+        태그 목록이 바뀌면 처음부터 다시 순회하고, 모든 조합을 사용하면 처음 조합으로 돌아갑니다.
+        """
+        key = (tuple(context.prefix_tags), tuple(context.postfix_tags))
+        expanded = None
+        if key == self._combination_key:
+            expanded = next(self._combinations, None)
+            if expanded is None and self._combination_total > 1:
+                print("🔁 와일드카드 조합을 모두 사용하여 처음 조합부터 다시 순회합니다.")
+        if expanded is None:
+            self._combination_key = key
+            # 선행/후행 태그를 한 번에 순회한 뒤 구분자 위치로 나눔 (구분자는 일반 태그로 그대로 확장됨)
+            self._combinations = self.wildcard_processor.enumerate_combinations(
+                context.prefix_tags + [self._COMBINATION_SEPARATOR] + context.postfix_tags)
+            expanded = next(self._combinations, None)
+            if expanded is None:
+                return context
+
+        split = expanded.tags.index(self._COMBINATION_SEPARATOR)
+        context.prefix_tags = expanded.tags[:split]
+        context.postfix_tags = expanded.tags[split + 1:]
+        context.global_append_tags.extend(expanded.append_tags)
+        context.wildcard_history.update(expanded.wildcard_history)
+        context.wildcard_state.update(expanded.wildcard_state)
+        state = expanded.wildcard_state[COMBINATION_STATE_KEY]
+        self._combination_total = state['total']
+        print(f"🔀 와일드카드 조합 {state['current']} / {state['total']}")
+        return context
+
     def _step_final_format(self, context: PromptContext) -> str:
         """모든 태그를 조합하여 최종 문자열로 포맷팅하는 단계"""
         
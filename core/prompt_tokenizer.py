@@ -0,0 +1,191 @@
+# core/prompt_tokenizer.py
+
+import re
+import weakref
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from PyQt6.QtCore import QObject
+from PyQt6.QtGui import QTextDocument, QTextCursor
+
+# 태그 구분자 (콤마와 줄바꿈)
+SEPARATORS = re.compile(r'[,\n]')
+# NAI 가중치 문법: 1.2::tag::
+_EXPLICIT_WEIGHT = re.compile(r'^(-?\d+(?:\.\d+)?)::(.*?)(?:::)?$', re.S)
+_PREFIX_BRACKETS = re.compile(r'^[\{\[\(]+')
+_SUFFIX_BRACKETS = re.compile(r'[\}\]\)]+$')
+# 중괄호 한 겹당 강조 배율 ({} 는 곱하고 [] 는 나눔)
+EMPHASIS_STEP = 1.05
+
+
+def strip_brackets(keyword: str) -> Tuple[str, str, str]:
+    """단어 앞뒤의 괄호를 분리합니다. (stripped, prefix, suffix)"""
+    if not isinstance(keyword, str):
+        return "", "", ""
+
+    keyword_stripped = keyword.strip()
+    prefix_match = _PREFIX_BRACKETS.match(keyword_stripped)
+    prefix = prefix_match.group(0) if prefix_match else ''
+    suffix_match = _SUFFIX_BRACKETS.search(keyword_stripped)
+    suffix = suffix_match.group(0) if suffix_match else ''
+
+    if len(prefix) + len(suffix) > len(keyword_stripped):
+        return keyword_stripped, "", ""
+
+    return keyword_stripped[len(prefix):len(keyword_stripped) - len(suffix)], prefix, suffix
+
+
+def token_weight(stripped: str, prefix: str) -> float:
+    """명시적 가중치(1.2::tag::) 또는 괄호 강조({}, [])로부터 태그 가중치를 계산합니다."""
+    match = _EXPLICIT_WEIGHT.match(stripped)
+    if match:
+        return float(match.group(1))
+    level = prefix.count('{') - prefix.count('[')
+    return EMPHASIS_STEP ** level
+
+
+@dataclass
+class TokenSpan:
+    """프롬프트 안의 태그 하나 (위치는 문서 기준 절대 위치)"""
+    start: int # 앞 공백을 제외한 토큰 시작
+    end: int # 다음 구분자 위치 (또는 문서 끝)
+    text: str
+    stripped_text: str
+    prefix: str
+    suffix: str
+    weight: float
+
+
+class PromptTokenizer(QObject):
+    """
+    QTextDocument의 태그 구간 목록을 증분 방식으로 유지하는 토크나이저.
+
+    문서를 구분자(콤마/줄바꿈) 단위 구간으로 나누어 각 구간의 시작 위치를 정렬된 리스트로 보관하고,
+    contentsChange가 오면 편집된 구간만 다시 분석합니다. (뒤쪽 구간은 위치만 이동)
+    커서 위치의 토큰은 이진 탐색으로 O(log n)에 찾습니다.
+    """
+
+    def __init__(self, document: QTextDocument):
+        super().__init__(document)
+        self.document = document
+        self._text = ""
+        self._starts: List[int] = [0] # 각 구간의 시작 위치
+        self._parsed: List[tuple] = [] # 구간별 (앞 공백 길이, 토큰 원문, stripped, prefix, suffix, weight)
+        self.rebuild()
+        document.contentsChange.connect(self._on_contents_change)
+
+    # --- 구간 관리 ---
+    @staticmethod
+    def _parse_segment(segment: str) -> tuple:
+        lead = len(segment) - len(segment.lstrip())
+        token = segment[lead:]
+        stripped, prefix, suffix = strip_brackets(token)
+        stripped = stripped.strip()
+        return (lead, token, stripped, prefix, suffix, token_weight(stripped, prefix))
+
+    def _split(self, offset: int, segment_text: str) -> Tuple[List[int], List[tuple]]:
+        """offset에서 시작하는 텍스트를 구간 시작 위치 목록과 분석 결과로 나눕니다."""
+        starts, parsed = [offset], []
+        previous = 0
+        for match in SEPARATORS.finditer(segment_text):
+            parsed.append(self._parse_segment(segment_text[previous:match.start()]))
+            previous = match.end()
+            starts.append(offset + previous)
+        parsed.append(self._parse_segment(segment_text[previous:]))
+        return starts, parsed
+
+    def _segment_end(self, index: int) -> int:
+        return self._starts[index + 1] - 1 if index + 1 < len(self._starts) else len(self._text)
+
+    def rebuild(self):
+        """문서 전체를 다시 분석합니다."""
+        self._text = self.document.toPlainText()
+        self._starts, self._parsed = self._split(0, self._text)
+
+    def _on_contents_change(self, position: int, removed: int, added: int):
+        old_length = len(self._text)
+        new_length = self.document.characterCount() - 1 # 마지막 블록 구분자 제외
+        if position + removed > old_length or old_length - removed + added != new_length:
+            # setPlainText 등 문서 전체 교체 시 Qt가 보고하는 범위가 실제와 다를 수 있음
+            self.rebuild()
+            return
+
+        # 편집 범위에 걸친 구간들(first..last)만 다시 분석하고, 뒤쪽 구간은 delta만큼 이동
+        delta = added - removed
+        first = bisect_right(self._starts, position) - 1
+        last = bisect_right(self._starts, position + removed) - 1
+        region_start = self._starts[first]
+        region_end = self._segment_end(last) + delta # 텍스트 갱신 전의 끝 위치 기준
+
+        cursor = QTextCursor(self.document)
+        cursor.setPosition(position)
+        cursor.setPosition(position + added, QTextCursor.MoveMode.KeepAnchor)
+        inserted = cursor.selectedText().replace('\u2029', '\n') # 문단 구분자를 줄바꿈으로
+        self._text = self._text[:position] + inserted + self._text[position + removed:]
+
+        starts, parsed = self._split(region_start, self._text[region_start:region_end])
+
+        tail = [start + delta for start in self._starts[last + 1:]]
+        self._starts[first:] = starts + tail
+        self._parsed[first:last + 1] = parsed
+
+    # --- 조회 ---
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def _span(self, index: int) -> TokenSpan:
+        lead, token, stripped, prefix, suffix, weight = self._parsed[index]
+        start = self._starts[index] + lead
+        return TokenSpan(start, self._segment_end(index), token, stripped, prefix, suffix, weight)
+
+    def span_at(self, position: int) -> TokenSpan:
+        """위치가 속한 구간의 토큰. O(log n)"""
+        return self._span(bisect_right(self._starts, position) - 1)
+
+    def tags(self) -> List[str]:
+        """비어있지 않은 모든 태그 (괄호 제거됨)"""
+        return [parsed[2] for parsed in self._parsed if parsed[2]]
+
+    def active_token_info(self, position: int) -> dict:
+        """
+        자동완성용 커서 토큰 정보.
+        커서가 공백 바로 뒤에 있으면 빈 토큰으로 취급하는 기존 규칙을 그대로 따릅니다.
+        """
+        span = self.span_at(position)
+        segment_start = self._starts[bisect_right(self._starts, position) - 1]
+        if position > segment_start and self._text[position - 1] == ' ':
+            start = position
+            while start < span.end and self._text[start].isspace():
+                start += 1
+            token = self._text[start:span.end]
+            stripped, prefix, suffix = strip_brackets(token)
+            stripped = stripped.strip()
+        else:
+            start, token, stripped, prefix, suffix = span.start, span.text, span.stripped_text, span.prefix, span.suffix
+
+        return {
+            'text': token,
+            'stripped_text': stripped,
+            'prefix': prefix,
+            'suffix': suffix,
+            'start': start,
+            'end': span.end
+        }
+
+
+# 문서별로 하나의 토크나이저를 공유 (문서가 삭제되면 함께 제거됨)
+_tokenizers = weakref.WeakKeyDictionary()
+
+def get_prompt_tokenizer(document: QTextDocument) -> Optional[PromptTokenizer]:
+    """문서에 연결된 토크나이저를 반환하며, 없으면 새로 만듭니다."""
+    if document is None:
+        return None
+    tokenizer = _tokenizers.get(document)
+    if tokenizer is None:
+        tokenizer = PromptTokenizer(document)
+        _tokenizers[document] = tokenizer
+    return tokenizer
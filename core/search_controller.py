@@ -31,7 +31,11 @@ class SearchWorker(QObject):
             return
 
         engine = SearchEngine()
-        process_args = [(file, self.search_params) for file in files_to_search]
+        # [신규] 등급별 태그 통계로 키워드 평가 순서를 정하도록 키워드 빈도를 한 번만 조회하여 전달
+        ratings = [r for r in ('e', 'q', 's', 'g') if self.search_params.get(f'rating_{r}')]
+        search_params = dict(self.search_params)
+        search_params['keyword_frequencies'] = engine.keyword_frequencies(search_params['query'], ratings)
+        process_args = [(file, search_params) for file in files_to_search]
         total_files = len(files_to_search)
         completed_count = 0
         total_rows = 0
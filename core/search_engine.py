@@ -1,6 +1,9 @@
+import os
+import numpy as np
 import pandas as pd
 import re
 from typing import Dict, List, Any, Optional
+from core.tag_dictionary import CompactTagDictionary, DEFAULT_DICTIONARY_PATH
 
 class SearchEngine:
     """Parquet 파일에서 태그를 검색하는 로직을 수행하는 핵심 엔진"""
@@ -32,73 +35,127 @@ class SearchEngine:
             
         return parsed
 
-    def _apply_filters(self, df: pd.DataFrame, query: str, exclude_query: str) -> pd.DataFrame:
+    def _apply_filters(self, df: pd.DataFrame, query: str, exclude_query: str,
+                       keyword_frequencies: Optional[Dict[str, int]] = None) -> pd.DataFrame:
         """파싱된 쿼리에 따라 데이터프레임에 필터를 순차적으로 적용합니다."""
         if df.empty:
             return df
-            
-        # 긍정 쿼리 파싱 및 필터링
-        search_params = self._parse_query(query)
 
         # [수정] 필터링 전에 'tags_string' 컬럼이 없으면 생성
         if 'tags_string' not in df.columns:
-            df['tags_string'] = df[['copyright', 'character', 'artist', 'meta', 'general']].apply(
-                lambda x: ','.join(x.dropna().astype(str)), axis=1
-            )
-            
+            df['tags_string'] = self.build_tags_string(df)
+
+        return df[self.query_mask(df['tags_string'], query, exclude_query, keyword_frequencies)]
+
+    def build_tags_string(self, df: pd.DataFrame) -> pd.Series:
+        """
+        모든 태그 컬럼을 하나의 문자열 컬럼으로 결합합니다.
+        [수정] 행 단위 apply 대신 컬럼 단위 문자열 연산으로 결합 (NaN은 건너뜀)
+        """
+        combined = np.full(len(df), '', dtype=object)
+        has_value = np.zeros(len(df), dtype=bool)
+        for column in ['copyright', 'character', 'artist', 'meta', 'general']:
+            valid = df[column].notna().to_numpy()
+            part = df[column].astype(str).to_numpy(dtype=object)
+            part[~valid] = ''
+            separator = np.where(has_value & valid, ',', '').astype(object)
+            combined = combined + separator + part
+            has_value |= valid
+        return pd.Series(combined, index=df.index, dtype=object)
+
+    @staticmethod
+    def _order_by_selectivity(keywords: List[str], keyword_frequencies: Optional[Dict[str, int]]) -> List[str]:
+        """
+        [신규] 게시물 수가 적은(선택도가 높은) 키워드부터 평가하도록 정렬합니다.
+        빈도를 모르는 키워드는 부분 문자열로 여러 태그와 일치할 수 있으므로 원래 순서대로 뒤에 둡니다.
+        """
+        if not keyword_frequencies:
+            return keywords
+        unknown = float('inf')
+        return sorted(keywords, key=lambda k: keyword_frequencies.get(k, unknown))
+
+    def query_mask(self, tags_string: pd.Series, query: str, exclude_query: str,
+                   keyword_frequencies: Optional[Dict[str, int]] = None) -> np.ndarray:
+        """
+        [신규] 검색/제외 쿼리를 만족하는 행의 불리언 마스크를 반환합니다.
+        각 조건은 아직 남아있는 행에 대해서만 평가하여 기존의 순차 필터링과 같은 비용으로 동작합니다.
+        keyword_frequencies(키워드 → 게시물 수)가 주어지면 AND 조건을 드문 키워드부터 평가하여 남은 행을 빨리 줄입니다.
+        """
+        mask = np.ones(len(tags_string), dtype=bool)
+
+        def narrow(predicate) -> bool:
+            """남아있는 행에만 predicate를 평가하여 마스크를 좁히고, 남은 행이 있는지 반환"""
+            remaining = np.flatnonzero(mask)
+            keep = np.asarray(predicate(tags_string.iloc[remaining]), dtype=bool)
+            mask[remaining[~keep]] = False
+            return bool(mask.any())
+
+        def contains(series: pd.Series, pattern: str) -> np.ndarray:
+            return series.str.contains(pattern, na=False, regex=True).to_numpy(dtype=bool)
+
+        # 긍정 쿼리 파싱 및 필터링
+        search_params = self._parse_query(query)
+
         # 1. Normal (AND)
-        if search_params['normal']:
-            for keyword in search_params['normal']:
-                # 정규식 특수문자 이스케이프
-                safe_keyword = re.escape(keyword)
-                mask = df['tags_string'].str.contains(safe_keyword, na=False, regex=True)
-                df = df[mask]
-                if df.empty: return df
+        for keyword in self._order_by_selectivity(search_params['normal'], keyword_frequencies):
+            # 정규식 특수문자 이스케이프
+            safe_keyword = re.escape(keyword)
+            if not narrow(lambda s: contains(s, safe_keyword)): return mask
 
         # 2. OR
         if 'or' in search_params and search_params['or']:
-            final_or_mask = pd.Series(False, index=df.index)
-            for group in search_params['or']:
-                group_mask = pd.Series(True, index=df.index)
-                for and_keywords in group:
-                    part_mask = pd.Series(True, index=df.index)
-                    for keyword in and_keywords:
-                        safe_keyword = re.escape(keyword.strip())
-                        part_mask &= df['tags_string'].str.contains(safe_keyword, na=False, regex=True)
-                    group_mask &= part_mask
-                final_or_mask |= group_mask
-            df = df[final_or_mask]
-            if df.empty: return df
-        
+            def or_predicate(s: pd.Series) -> np.ndarray:
+                final_or_mask = np.zeros(len(s), dtype=bool)
+                for group in search_params['or']:
+                    group_mask = np.ones(len(s), dtype=bool)
+                    for and_keywords in group:
+                        for keyword in and_keywords:
+                            group_mask &= contains(s, re.escape(keyword.strip()))
+                    final_or_mask |= group_mask
+                return final_or_mask
+            if not narrow(or_predicate): return mask
+
         # 3. Exact (*)
-        if search_params['exact']:
-            for keyword in search_params['exact']:
-                safe_keyword = re.escape(keyword)
-                # 완전한 단어(태그)를 찾기 위한 정규식
-                mask = df['tags_string'].str.contains(f'(?<![^, ]){safe_keyword}(?![^, ])', na=False, regex=True)
-                df = df[mask]
-                if df.empty: return df
+        for keyword in self._order_by_selectivity(search_params['exact'], keyword_frequencies):
+            safe_keyword = re.escape(keyword)
+            # 완전한 단어(태그)를 찾기 위한 정규식
+            if not narrow(lambda s: contains(s, f'(?<![^, ]){safe_keyword}(?![^, ])')): return mask
 
         # 부정 쿼리 파싱 및 필터링
         exclude_params = self._parse_query(exclude_query)
-        
+
         # 4. Normal Exclude
-        if exclude_params['normal']:
-            for keyword in exclude_params['normal']:
-                safe_keyword = re.escape(keyword)
-                mask = ~df['tags_string'].str.contains(safe_keyword, na=False, regex=True)
-                df = df[mask]
-                if df.empty: return df
-                
+        for keyword in exclude_params['normal']:
+            safe_keyword = re.escape(keyword)
+            if not narrow(lambda s: ~contains(s, safe_keyword)): return mask
+
         # 5. Exact Exclude (~)
-        if exclude_params['not_exact']:
-            for keyword in exclude_params['not_exact']:
-                safe_keyword = re.escape(keyword)
-                mask = ~df['tags_string'].str.contains(f'(?<![^, ]){safe_keyword}(?![^, ])', na=False, regex=True)
-                df = df[mask]
-                if df.empty: return df
+        for keyword in exclude_params['not_exact']:
+            safe_keyword = re.escape(keyword)
+            if not narrow(lambda s: ~contains(s, f'(?<![^, ]){safe_keyword}(?![^, ])')): return mask
 
-        return df
+        return mask
+
+    def keyword_frequencies(self, query: str, ratings, dictionary_path: str = DEFAULT_DICTIONARY_PATH) -> Dict[str, int]:
+        """
+        [신규] 쿼리 플래너용: AND/정확 일치 키워드별 게시물 수를 태그 사전의 등급별 통계에서 조회합니다.
+        사전이 없으면 빈 딕셔너리를 반환하며, 이 경우 키워드는 입력 순서대로 평가됩니다.
+        """
+        if not os.path.exists(dictionary_path):
+            return {}
+        try:
+            dictionary = CompactTagDictionary(dictionary_path)
+        except (OSError, ValueError):
+            return {}
+        counts = dictionary.counts_for_ratings(ratings)
+        parsed = self._parse_query(query)
+        frequencies = {}
+        for keyword in parsed['normal'] + parsed['exact']:
+            entries = dictionary.lookup(keyword)
+            if entries:
+                frequencies[keyword] = max(int(counts[i]) for i in entries)
+        dictionary.close()
+        return frequencies
 
     def search_in_file(self, file_path: str, search_params: Dict[str, Any]) -> Optional[pd.DataFrame]:
         """단일 Parquet 파일 내에서 검색을 수행합니다."""
@@ -119,12 +176,11 @@ class SearchEngine:
             return None
 
         # 성능 개선을 위해 모든 태그를 하나의 문자열 컬럼으로 결합
-        df['tags_string'] = df[['copyright', 'character', 'artist', 'meta', 'general']].apply(
-            lambda x: ','.join(x.dropna().astype(str)), axis=1
-        )
+        df['tags_string'] = self.build_tags_string(df)
         
         # 필터링 적용
-        filtered_df = self._apply_filters(df, search_params['query'], search_params['exclude_query'])
+        filtered_df = self._apply_filters(df, search_params['query'], search_params['exclude_query'],
+                                          search_params.get('keyword_frequencies'))
         
         if filtered_df.empty:
             return None
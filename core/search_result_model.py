@@ -1,5 +1,8 @@
+import random
+import numpy as np
 import pandas as pd
 from typing import Dict, Any, Optional, List
+from core.weighted_sampler import FenwickSampler, compute_weights
 
 class SearchResultModel:
     """검색 결과를 래핑하고 관리하는 데이터 모델 클래스"""
@@ -10,49 +13,115 @@ class SearchResultModel:
         else:
             self.df = dataframe.reset_index(drop=True)
 
+        # [신규] 가중치 샘플링 상태 (데이터가 바뀌면 다음 추출 시 지연 재구성, 행 위치 기준)
+        self._sampler: Optional[FenwickSampler] = None
+        self._sampler_mode: Optional[str] = None
+        # [신규] 아직 추출되지 않은 행 위치 풀. 추출한 행은 풀에서만 빼고(O(1)), 데이터프레임에서는
+        # 남은 행이 절반 아래로 줄거나 데이터프레임이 필요할 때 한 번에 제거합니다. (None이면 추출한 행 없음)
+        self._pool: Optional[np.ndarray] = None # 앞쪽 _pool_size칸이 남은 행 위치
+        self._slot: Optional[np.ndarray] = None # 행 위치 → 풀 안의 칸
+        self._pool_size = 0
+
+    def _invalidate_sampler(self):
+        """데이터프레임이 변경되었을 때 샘플러를 무효화합니다."""
+        self._sampler = None
+        self._sampler_mode = None
+
+    def _compact(self):
+        """[신규] 추출한 행을 데이터프레임에서 한 번에 제거합니다. (행 레이블은 유지)"""
+        if self._pool is None:
+            return
+        if self._pool_size < len(self.df):
+            self.df = self.df.iloc[np.sort(self._pool[:self._pool_size])]
+            self._invalidate_sampler() # 행 위치가 바뀜
+        self._pool = None
+        self._slot = None
+        self._pool_size = 0
+
     def append_dataframe(self, new_df: pd.DataFrame):
         """기존 결과에 새로운 데이터프레임을 추가합니다."""
         if new_df is None or new_df.empty:
             return
+        self._compact()
         self.df = pd.concat([self.df, new_df], ignore_index=True)
+        self._invalidate_sampler()
 
     def get_dataframe(self) -> pd.DataFrame:
         """결과 데이터프레임을 반환합니다."""
+        self._compact()
         return self.df
 
     def get_count(self) -> int:
         """결과의 총 개수를 반환합니다."""
-        return len(self.df)
+        return len(self.df) if self._pool is None else self._pool_size
 
     def is_empty(self) -> bool:
         """결과가 비어있는지 확인합니다."""
-        return self.df.empty
+        return self.df.empty or self.get_count() == 0
 
     def get_prompt_at(self, index: int) -> Optional[Dict[str, Any]]:
         """특정 인덱스의 프롬프트 데이터를 딕셔너리 형태로 반환합니다."""
+        self._compact()
         if not self.is_empty() and 0 <= index < self.get_count():
             return self.df.iloc[index].to_dict()
         return None
     
     # [신규] 무작위 행을 추출하고 제거하는 메서드
-    def pop_random_row(self) -> Optional[pd.Series]:
+    def pop_random_row(self, weight_mode: str = 'uniform') -> Optional[pd.Series]:
         """
         데이터프레임에서 무작위로 행 하나를 선택하여 반환하고, 원본에서는 제거합니다.
+        weight_mode가 'uniform'이 아니면 WEIGHT_EXPRESSIONS의 가중치에 비례하여 선택합니다.
+        [수정] 추출한 행은 남은 행 위치 풀에서만 빼고 데이터프레임은 지연 압축하므로, 추출 한 번이
+        균등 모드 O(1), 가중치 모드 O(log n)입니다. (압축 비용은 남은 행이 절반으로 줄 때마다 한 번)
         """
         if self.is_empty():
             return None
-        
-        # 무작위 인덱스 선택
-        random_index = self.df.index.to_series().sample(n=1).iloc[0]
-        
-        # 해당 행 데이터 추출 및 원본에서 삭제
-        popped_row = self.df.loc[random_index].copy()
-        self.df.drop(random_index, inplace=True)
-        
+        if self._pool is None:
+            count = len(self.df)
+            self._pool = np.arange(count)
+            self._slot = np.arange(count)
+            self._pool_size = count
+
+        if weight_mode and weight_mode != 'uniform':
+            position = self._pop_weighted_position(weight_mode)
+        else:
+            position = None
+
+        # 무작위 위치 선택 (균등 모드 또는 가중치 계산 불가 시)
+        if position is None:
+            position = int(self._pool[random.randrange(self._pool_size)])
+            if self._sampler is not None:
+                self._sampler.remove(position)
+
+        # 해당 행 데이터 추출 후 풀에서 제외 (마지막 칸과 자리를 바꿔 O(1))
+        popped_row = self.df.iloc[position].copy()
+        slot, last = self._slot[position], self._pool_size - 1
+        moved = self._pool[last]
+        self._pool[slot], self._slot[moved] = moved, slot
+        self._pool[last], self._slot[position] = position, last
+        self._pool_size = last
+
+        if self._pool_size * 2 < len(self.df):
+            self._compact()
         return popped_row
 
+    def _pop_weighted_position(self, weight_mode: str) -> Optional[int]:
+        """Fenwick 트리 샘플러로 행 위치 하나를 O(log n)에 추출합니다."""
+        if self._sampler is None or self._sampler_mode != weight_mode:
+            weights = compute_weights(self.df, weight_mode)
+            if weights is None:
+                return None
+            alive = np.zeros(len(self.df), dtype=bool)
+            alive[self._pool[:self._pool_size]] = True
+            self._sampler = FenwickSampler(np.where(alive, weights, 0.0)) # 이미 추출한 행은 제외
+            self._sampler_mode = weight_mode
+
+        position = self._sampler.pop()
+        return None if position is None else int(position)
+
     def deduplicate(self, subset: Optional[List[str]] = None):
         """데이터프레임의 중복된 행을 제거합니다."""
+        self._compact()
         if self.is_empty():
             return
         
@@ -61,4 +130,5 @@ class SearchResultModel:
             subset = ['general']
             
         self.df.drop_duplicates(subset=subset, keep='first', inplace=True)
-        self.df.reset_index(drop=True, inplace=True)
\ No newline at end of file
+        self.df.reset_index(drop=True, inplace=True)
+        self._invalidate_sampler()
\ No newline at end of file
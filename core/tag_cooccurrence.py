@@ -0,0 +1,297 @@
+# core/tag_cooccurrence.py
+
+import mmap
+import os
+import time
+import numpy as np
+import pandas as pd
+from multiprocessing import Pool, cpu_count
+from typing import Iterable, List, Optional, Tuple
+from core.tag_dictionary import (
+    CompactTagDictionary, DEFAULT_DICTIONARY_PATH,
+    CATEGORY_GENERAL, CATEGORY_COPYRIGHT, CATEGORY_CHARACTER
+)
+
+DEFAULT_COOCCURRENCE_PATH = os.path.join('data', 'tag_cooccurrence.bin')
+
+# 파일 구조 (리틀 엔디언)
+#   헤더: magic(8) | version(u4) | vocab_count(u4) | neighbour_count(u8) | blob_size(u8)
+#   offsets   : u4[vocab_count + 1]  각 이름의 blob 내 시작 위치
+#   frequency : u4[vocab_count]      태그가 등장한 게시물 수
+#   pointers  : u4[vocab_count + 1]  태그별 이웃 목록 시작 위치 (CSR)
+#   neighbours: u4[neighbour_count]  이웃 태그 ID (점수 내림차순)
+#   scores    : f4[neighbour_count]  P(이웃 | 태그)
+#   blob      : 이름을 UTF-8 바이트 순으로 정렬하여 '\0'으로 이어붙인 문자열 (태그 ID = 정렬 순서)
+_MAGIC = b'NAIACOOC'
+_VERSION = 1
+_HEADER = np.dtype([('magic', 'S8'), ('version', '<u4'), ('count', '<u4'),
+                    ('neighbours', '<u8'), ('blob_size', '<u8')])
+
+# 동시 등장을 집계할 태그 컬럼 (작가/메타 태그는 다음 태그 추천 대상에서 제외)
+TAG_COLUMNS = ['copyright', 'character', 'general']
+VOCABULARY_CATEGORIES = (CATEGORY_GENERAL, CATEGORY_COPYRIGHT, CATEGORY_CHARACTER)
+
+
+class TagCooccurrenceIndex:
+    """
+    태그별 동시 등장 상위 K개 이웃을 mmap으로 열어 제공하는 클래스.
+    프롬프트에 있는 태그들의 이웃 목록(각각 K개)을 합산하여 다음 태그를 추천합니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"비어있는 동시 등장 파일입니다: {path}")
+
+        header = np.frombuffer(self._mmap, dtype=_HEADER, count=1)[0]
+        if header['magic'] != _MAGIC or header['version'] != _VERSION:
+            self._mmap.close()
+            self._file.close()
+            raise ValueError(f"지원하지 않는 동시 등장 파일 형식입니다: {path}")
+
+        count = int(header['count'])
+        total = int(header['neighbours'])
+        offset = _HEADER.itemsize
+        self.offsets = np.frombuffer(self._mmap, dtype='<u4', count=count + 1, offset=offset)
+        offset += self.offsets.nbytes
+        self.frequency = np.frombuffer(self._mmap, dtype='<u4', count=count, offset=offset)
+        offset += self.frequency.nbytes
+        self.pointers = np.frombuffer(self._mmap, dtype='<u4', count=count + 1, offset=offset)
+        offset += self.pointers.nbytes
+        self.neighbours = np.frombuffer(self._mmap, dtype='<u4', count=total, offset=offset)
+        offset += self.neighbours.nbytes
+        self.scores = np.frombuffer(self._mmap, dtype='<f4', count=total, offset=offset)
+        offset += self.scores.nbytes
+        self.blob = memoryview(self._mmap)[offset:offset + int(header['blob_size'])]
+
+    @classmethod
+    def open(cls, path: str = DEFAULT_COOCCURRENCE_PATH) -> Optional['TagCooccurrenceIndex']:
+        """파일이 없거나 읽을 수 없으면 None을 반환합니다."""
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 동시 등장 데이터를 불러오지 못했습니다: {e}")
+            return None
+
+    def __len__(self) -> int:
+        return len(self.frequency)
+
+    def name_bytes(self, tag_id: int) -> bytes:
+        return bytes(self.blob[self.offsets[tag_id]:self.offsets[tag_id + 1] - 1])
+
+    def name(self, tag_id: int) -> str:
+        return self.name_bytes(tag_id).decode('utf-8')
+
+    def lookup(self, name: str) -> int:
+        """태그 이름의 ID (없으면 -1)"""
+        target = name.encode('utf-8')
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.name_bytes(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self) and self.name_bytes(lo) == target else -1
+
+    def suggest(self, tags: Iterable[str], limit: int = 40) -> List[Tuple[str, float]]:
+        """주어진 태그들과 자주 함께 쓰이는 태그를 점수 합계 내림차순으로 반환합니다."""
+        context_ids = {tag_id for tag_id in (self.lookup(tag) for tag in tags) if tag_id >= 0}
+        if not context_ids:
+            return []
+
+        totals = {}
+        for tag_id in context_ids:
+            start, end = self.pointers[tag_id], self.pointers[tag_id + 1]
+            for neighbour, score in zip(self.neighbours[start:end].tolist(), self.scores[start:end].tolist()):
+                if neighbour not in context_ids:
+                    totals[neighbour] = totals.get(neighbour, 0.0) + score
+
+        ranked = sorted(totals.items(), key=lambda x: x[1], reverse=True)[:limit]
+        return [(self.name(tag_id), score) for tag_id, score in ranked]
+
+
+# --- 오프라인 집계 (map-reduce) ---
+
+_vocabulary_index = None
+
+def _init_worker(vocabulary: List[str]):
+    """워커 프로세스마다 한 번 어휘 색인을 구성합니다."""
+    global _vocabulary_index
+    _vocabulary_index = pd.Index(vocabulary)
+
+def _merge_counts(keys: List[np.ndarray], counts: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """(키, 개수) 조각들을 키별로 합칩니다. 결과는 키 오름차순입니다."""
+    keys = np.concatenate(keys)
+    counts = np.concatenate(counts)
+    if len(keys) == 0:
+        return keys, counts
+    order = np.argsort(keys, kind='stable')
+    keys, counts = keys[order], counts[order]
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    return keys[starts], np.add.reduceat(counts, starts)
+
+def _count_chunk(rows: np.ndarray, ids: np.ndarray, vocab_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """한 묶음의 (행, 태그 ID)에서 같은 행 안의 모든 순서쌍을 세어 반환합니다."""
+    lengths = np.bincount(rows)
+    lengths = lengths[lengths > 0]
+    row_starts = np.cumsum(lengths) - lengths
+
+    occurrence_lengths = np.repeat(lengths, lengths)
+    occurrence_starts = np.repeat(row_starts, lengths)
+    total = int(occurrence_lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    # 각 태그를 같은 행의 태그 수만큼 반복하고, 같은 행의 태그 목록과 짝지음
+    first = np.repeat(ids, occurrence_lengths)
+    within = np.arange(total) - np.repeat(np.cumsum(occurrence_lengths) - occurrence_lengths, occurrence_lengths)
+    second = ids[np.repeat(occurrence_starts, occurrence_lengths) + within]
+
+    distinct = first != second
+    keys = first[distinct] * vocab_size + second[distinct]
+    return _merge_counts([keys], [np.ones(len(keys), dtype=np.int64)])
+
+def count_shard(file_path: str, chunk_rows: int = 2000) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    [map] Parquet 샤드 하나에서 태그 빈도와 동시 등장 쌍 개수를 집계합니다.
+    반환: (빈도 배열, 쌍 키 = 태그*V + 이웃, 쌍 개수)
+    """
+    vocab_size = len(_vocabulary_index)
+    frequency = np.zeros(vocab_size, dtype=np.int64)
+    try:
+        df = pd.read_parquet(file_path, engine="pyarrow", columns=TAG_COLUMNS)
+    except Exception as e:
+        print(f"⚠️ 샤드를 읽지 못해 건너뜁니다: {file_path} ({e})")
+        return frequency, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    # 모든 태그 컬럼을 (행, 태그 ID) 목록으로 펼침
+    row_parts, id_parts = [], []
+    for column in TAG_COLUMNS:
+        split = df[column].fillna('').astype(str).str.split(',')
+        lengths = split.str.len().to_numpy(dtype=np.int64)
+        ids = _vocabulary_index.get_indexer(split.explode().astype(str).str.strip())
+        rows = np.repeat(np.arange(len(df), dtype=np.int64), lengths)
+        known = ids >= 0
+        row_parts.append(rows[known])
+        id_parts.append(ids[known].astype(np.int64))
+
+    # 행 순으로 정렬하고, 여러 컬럼에 중복된 태그는 한 번만 셈
+    combined = np.concatenate(row_parts) * vocab_size + np.concatenate(id_parts)
+    combined = np.sort(combined)
+    combined = combined[np.concatenate(([True], combined[1:] != combined[:-1]))]
+    rows, ids = combined // vocab_size, combined % vocab_size
+    frequency += np.bincount(ids, minlength=vocab_size)
+
+    keys, counts = [], []
+    boundaries = np.searchsorted(rows, np.arange(0, len(df) + chunk_rows, chunk_rows))
+    for start, end in zip(boundaries[:-1], boundaries[1:]):
+        if end - start < 2:
+            continue
+        chunk_keys, chunk_counts = _count_chunk(rows[start:end] - rows[start], ids[start:end], vocab_size)
+        keys.append(chunk_keys)
+        counts.append(chunk_counts)
+    if not keys:
+        return frequency, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    keys, counts = _merge_counts(keys, counts)
+    return frequency, keys, counts
+
+def _load_vocabulary(dictionary_path: str, min_count: int) -> List[str]:
+    """태그 사전에서 추천 대상 태그 이름을 UTF-8 바이트 순으로 정렬하여 가져옵니다."""
+    dictionary = CompactTagDictionary(dictionary_path)
+    selected = np.flatnonzero(np.isin(dictionary.categories, VOCABULARY_CATEGORIES) & (dictionary.counts >= min_count))
+    # 사전이 이미 이름순이므로 중복(카테고리만 다른 같은 이름)만 제거
+    names = []
+    for name in dictionary.names(selected):
+        if not names or names[-1] != name:
+            names.append(name)
+    dictionary.close()
+    return names
+
+def build_cooccurrence(tags_dir: str = 'data/tags', output_path: str = DEFAULT_COOCCURRENCE_PATH,
+                       dictionary_path: str = DEFAULT_DICTIONARY_PATH, top_k: int = 50,
+                       min_tag_count: int = 100, min_pair_count: int = 3,
+                       processes: Optional[int] = None) -> int:
+    """
+    [reduce] 모든 샤드의 집계를 합쳐 태그별 상위 top_k 이웃을 계산하고 바이너리 파일로 저장합니다.
+    이웃 점수는 조건부 확률 P(이웃 | 태그) = 동시 등장 수 / 태그 빈도입니다. 저장된 이웃 총 수를 반환합니다.
+    """
+    files = sorted(os.path.join(tags_dir, f) for f in os.listdir(tags_dir) if f.endswith('.parquet'))
+    if not files:
+        raise ValueError(f"집계할 .parquet 파일이 없습니다: {tags_dir}")
+
+    vocabulary = _load_vocabulary(dictionary_path, min_tag_count)
+    vocab_size = len(vocabulary)
+    if processes is None:
+        processes = max(1, min(cpu_count() // 2, 8))
+
+    frequency = np.zeros(vocab_size, dtype=np.int64)
+    keys, counts = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    pending_keys, pending_counts, pending_size = [], [], 0
+    with Pool(processes=processes, initializer=_init_worker, initargs=(vocabulary,)) as pool:
+        for done, (shard_frequency, shard_keys, shard_counts) in enumerate(pool.imap_unordered(count_shard, files), start=1):
+            frequency += shard_frequency
+            pending_keys.append(shard_keys)
+            pending_counts.append(shard_counts)
+            pending_size += len(shard_keys)
+            # 메모리를 제한하기 위해 쌓인 조각을 주기적으로 합침
+            if pending_size > 20_000_000:
+                keys, counts = _merge_counts([keys] + pending_keys, [counts] + pending_counts)
+                pending_keys, pending_counts, pending_size = [], [], 0
+            print(f"  - 샤드 집계 {done}/{len(files)}")
+    keys, counts = _merge_counts([keys] + pending_keys, [counts] + pending_counts)
+
+    # 드문 쌍을 제외하고 태그별 상위 K개 이웃 선택
+    frequent = counts >= min_pair_count
+    keys, counts = keys[frequent], counts[frequent]
+    tags, neighbours = keys // vocab_size, keys % vocab_size
+    scores = counts / np.maximum(frequency[tags], 1)
+    order = np.lexsort((-scores, tags))
+    tags, neighbours, scores = tags[order], neighbours[order], scores[order]
+    group_starts = np.searchsorted(tags, np.arange(vocab_size))
+    rank = np.arange(len(tags)) - group_starts[tags]
+    keep = rank < top_k
+    tags, neighbours, scores = tags[keep], neighbours[keep], scores[keep]
+
+    pointers = np.zeros(vocab_size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(tags, minlength=vocab_size), out=pointers[1:])
+    _write_cooccurrence(output_path, vocabulary, frequency, pointers, neighbours, scores)
+    return len(neighbours)
+
+def _write_cooccurrence(path: str, vocabulary: List[str], frequency: np.ndarray,
+                        pointers: np.ndarray, neighbours: np.ndarray, scores: np.ndarray):
+    encoded = [name.encode('utf-8') + b'\x00' for name in vocabulary]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    blob = b''.join(encoded)
+
+    header = np.zeros(1, dtype=_HEADER)
+    header['magic'] = _MAGIC
+    header['version'] = _VERSION
+    header['count'] = len(vocabulary)
+    header['neighbours'] = len(neighbours)
+    header['blob_size'] = len(blob)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(header.tobytes())
+        f.write(offsets.astype('<u4').tobytes())
+        f.write(np.clip(frequency, 0, np.iinfo(np.uint32).max).astype('<u4').tobytes())
+        f.write(pointers.astype('<u4').tobytes())
+        f.write(neighbours.astype('<u4').tobytes())
+        f.write(scores.astype('<f4').tobytes())
+        f.write(blob)
+    os.replace(temp_path, path)
+
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    total = build_cooccurrence()
+    print(f"✅ 동시 등장 이웃 {total}개를 {DEFAULT_COOCCURRENCE_PATH}에 저장했습니다. ({time.perf_counter() - start:.1f}s)")
@@ -1,52 +1,300 @@
-class TagDataManager:
-    def __init__(self):
-        # 데이터 파일이 없으므로, 임시 더미 데이터로 초기화합니다.
-        # 실제 파일이 있다면 아래 import 문을 활성화하세요.
+import copy
+import os
+import threading
+import numpy as np
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+from core.tag_dictionary import (
+    CompactTagDictionary, convert_tag_modules, DEFAULT_DICTIONARY_PATH,
+    CATEGORY_GENERAL, CATEGORY_ARTIST, CATEGORY_CHARACTER, RATINGS
+)
+from core.tag_search_index import TagSearchIndex
+from core.fuzzy_tag_index import FuzzyTagIndex
+from core.tag_cooccurrence import TagCooccurrenceIndex, DEFAULT_COOCCURRENCE_PATH
+from core.wildcard_name_index import WildcardNameIndex
+
+class TagDataLoader(QObject):
+    """[신규] 태그 데이터를 백그라운드 스레드에서 로드하는 워커"""
+    finished = pyqtSignal()
+
+    def __init__(self, manager: 'TagDataManager'):
+        super().__init__()
+        self.manager = manager
+
+    def run(self):
         try:
-            from result_dupl import generals
-            from artist_dictionary import artist_dict
-            from result_dict_copyright import copyright_dict
-            from danbooru_character import character_dict_count
-            print("✅ Tag data files loaded successfully.")
-        except ImportError:
-            print("⚠️ Tag data files not found. Using dummy data.")
-            generals, artist_dict, copyright_dict, character_dict_count = {}, {}, {}, {}
-
-        # find_top_matches 로직에 필요한 통합 딕셔너리 생성
-        self.limited_generals = dict(list(generals.items())[:16000])
-        self.limited_generals.update(dict(list(character_dict_count.items())[:15000]))
-        self.limited_generals.update(artist_dict)
-        
-        self.artist_dict = artist_dict
-        self.character_dict_count = character_dict_count
+            self.manager.load()
+        finally:
+            self.finished.emit()
+
+
+class TagDataManager(QObject):
+    # 일반 태그 검색에 포함할 카테고리별 상위 개수 (artist는 전체)
+    GENERAL_LIMIT = 16000
+    CHARACTER_LIMIT = 15000
+    # 같은 이름이 여러 카테고리에 있을 때 우선하는 순서 (기존 dict.update 순서와 동일)
+    CATEGORY_PRIORITY = {CATEGORY_GENERAL: 0, CATEGORY_CHARACTER: 1, CATEGORY_ARTIST: 2}
+
+    # [신규] 백그라운드 로드 중 자동완성 요청이 로드 완료를 기다리는 최대 시간 (초)
+    READY_WAIT_SECONDS = 0.2
+
+    # [신규] 태그 데이터 로드 완료 시그널
+    data_ready = pyqtSignal()
+
+    def __init__(self, dictionary_path: str = DEFAULT_DICTIONARY_PATH,
+                 cooccurrence_path: str = DEFAULT_COOCCURRENCE_PATH, lazy: bool = False):
+        """
+        lazy=True이면 태그 데이터를 바로 읽지 않습니다. start_background_load()로 백그라운드 로드를 시작하거나,
+        첫 자동완성 요청 때 로드됩니다. 로드 전에는 빈 사전을 사용합니다.
+        """
+        super().__init__()
+        self.dictionary_path = dictionary_path
+        self.cooccurrence_path = cooccurrence_path
+
+        # [신규] 일치하는 태그가 없을 때 오타를 허용하는 검색으로 대체 (인덱스는 첫 사용 시 구성)
+        self.fuzzy_fallback = True
+        # [신규] 자동완성 순위에 쓰는 등급 (코퍼스 통계가 있는 사전이면 선택한 등급의 게시물 수로 순위를 매김)
+        self.enabled_ratings = frozenset(RATINGS)
+
+        self._ready = threading.Event()
+        self._load_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._loader_thread = None
+        self._loader = None
+        self._set_data(CompactTagDictionary.empty(), None)
+
+        if not lazy:
+            self.load()
+
+    def load(self):
+        """태그 사전과 동시 등장 데이터를 읽습니다. 여러 스레드에서 호출해도 한 번만 로드합니다."""
+        with self._load_lock:
+            if self._ready.is_set():
+                return
+
+            # [수정] 거대한 파이썬 딕셔너리 모듈 대신 바이너리 태그 사전을 mmap으로 로드합니다.
+            # 사전 파일이 없으면 기존 모듈에서 한 번 변환하여 생성합니다.
+            if not os.path.exists(self.dictionary_path):
+                print("⚙️ 바이너리 태그 사전이 없어 기존 태그 모듈에서 변환합니다...")
+                try:
+                    convert_tag_modules(self.dictionary_path)
+                except Exception as e:
+                    print(f"❌ 태그 사전 변환 실패: {e}")
+
+            try:
+                tag_dictionary = CompactTagDictionary(self.dictionary_path)
+                print(f"✅ Tag data files loaded successfully. ({len(tag_dictionary)}개 태그)")
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Tag data files not found. Using dummy data. ({e})")
+                tag_dictionary = CompactTagDictionary.empty()
+
+            # [신규] 다음 태그 추천용 동시 등장 데이터 (python -m core.tag_cooccurrence 로 생성, 없으면 추천 비활성화)
+            cooccurrence = TagCooccurrenceIndex.open(self.cooccurrence_path)
+            if cooccurrence is None:
+                print("ℹ️ 동시 등장 데이터가 없어 다음 태그 추천을 사용하지 않습니다.")
+
+            self._set_data(tag_dictionary, cooccurrence)
+            self._ready.set()
+        self.data_ready.emit()
+
+    def _set_data(self, tag_dictionary: CompactTagDictionary, cooccurrence):
+        with self._state_lock:
+            self.tag_dictionary = tag_dictionary
+            self.cooccurrence = cooccurrence
+
+            # find_top_matches 로직에 필요한 통합 검색 대상 (기존 limited_generals와 동일 구성)
+            categories = tag_dictionary.categories
+            ranks = tag_dictionary.ranks
+            self.general_pool = (
+                ((categories == CATEGORY_GENERAL) & (ranks < self.GENERAL_LIMIT)) |
+                ((categories == CATEGORY_CHARACTER) & (ranks < self.CHARACTER_LIMIT)) |
+                (categories == CATEGORY_ARTIST)
+            )
+
+            # [신규] 검색 모드별 n-gram 인덱스 (상위 K개를 미리 계산하여 키 입력마다 전체를 스캔하지 않음)
+            # 시작 시간을 늘리지 않도록 각 모드의 첫 검색 때 구성합니다.
+            self.search_pools = {
+                'general': self.general_pool,
+                'artist': categories == CATEGORY_ARTIST,
+                'character': categories == CATEGORY_CHARACTER,
+            }
+            self.search_indexes = {}
+            self.fuzzy_indexes = {}
+            self.effective_counts = tag_dictionary.counts_for_ratings(self.enabled_ratings)
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start_background_load(self):
+        """[신규] 태그 데이터를 백그라운드 스레드에서 로드합니다. 완료되면 data_ready가 발생합니다."""
+        if self._ready.is_set() or self._loader_thread is not None:
+            return
+        self._loader_thread = QThread()
+        self._loader = TagDataLoader(self)
+        self._loader.moveToThread(self._loader_thread)
+        self._loader_thread.started.connect(self._loader.run)
+        self._loader.finished.connect(self._loader_thread.quit)
+        self._loader_thread.finished.connect(self._loader.deleteLater)
+        self._loader_thread.finished.connect(self._loader_thread.deleteLater)
+        self._loader_thread.start()
+
+    def _ensure_ready(self) -> bool:
+        """
+        자동완성 요청 전에 데이터가 준비되었는지 확인합니다.
+        백그라운드 로드 중이면 잠시 기다리고, 로드를 시작한 적이 없으면 호출한 스레드에서 바로 로드합니다.
+        """
+        if self._ready.is_set():
+            return True
+        if self._loader_thread is None:
+            self.load()
+            return True
+        return self._ready.wait(self.READY_WAIT_SECONDS)
+
+    def _search_state(self) -> tuple:
+        """
+        [수정] 검색 한 번에 사용할 (태그 사전, 검색 대상, 개수, 검색 인덱스, 오타 인덱스)를 잠금 안에서 함께 가져옵니다.
+        검색 도중 GUI 스레드에서 등급이 바뀌어도 한 검색 안에서는 같은 등급 기준의 개수와 인덱스만 사용합니다.
+        """
+        with self._state_lock:
+            return (self.tag_dictionary, self.search_pools, self.effective_counts,
+                    self.search_indexes, self.fuzzy_indexes)
+
+    def _search_index(self, state: tuple, mode: str) -> TagSearchIndex:
+        tag_dictionary, search_pools, counts, search_indexes, _ = state
+        index = search_indexes.get(mode)
+        if index is None:
+            index = TagSearchIndex(tag_dictionary, search_pools[mode], counts=counts)
+            # 구성하는 동안 등급이 바뀌었으면 이전 개수로 만든 인덱스이므로 이번 검색에만 사용하고 저장하지 않음
+            with self._state_lock:
+                if search_indexes is self.search_indexes:
+                    index = search_indexes.setdefault(mode, index)
+        return index
+
+    def _fuzzy_index(self, state: tuple, mode: str) -> FuzzyTagIndex:
+        tag_dictionary, search_pools, counts, _, fuzzy_indexes = state
+        index = fuzzy_indexes.get(mode)
+        if index is None:
+            index = FuzzyTagIndex(tag_dictionary, search_pools[mode], counts=counts)
+            with self._state_lock:
+                if fuzzy_indexes is self.fuzzy_indexes:
+                    index = fuzzy_indexes.setdefault(mode, index)
+        return index
+
+    def set_enabled_ratings(self, ratings):
+        """
+        [신규] 자동완성 순위에 반영할 등급을 설정합니다. (예: {'g', 's'})
+        등급별 통계가 없는 사전이면 순위는 그대로이며, 바뀐 경우 검색 인덱스를 다음 검색 때 다시 구성합니다.
+        """
+        ratings = frozenset(r for r in ratings if r in RATINGS)
+        with self._state_lock:
+            if ratings == self.enabled_ratings:
+                return
+            self.enabled_ratings = ratings
+            if self.tag_dictionary.rating_counts is None:
+                return
+            self.effective_counts = self.tag_dictionary.counts_for_ratings(ratings)
+            self.search_indexes = {}
+            # 진행 중인 검색이 쓰는 인덱스는 그대로 두고, 삭제 변형 색인을 공유하는 사본의 개수만 교체
+            fuzzy_indexes = {}
+            for mode, index in self.fuzzy_indexes.items():
+                index = copy.copy(index)
+                index.update_counts(self.effective_counts)
+                fuzzy_indexes[mode] = index
+            self.fuzzy_indexes = fuzzy_indexes
+
+    def _decode(self, state: tuple, indices: np.ndarray) -> list:
+        """인덱스가 반환한 상위 항목을 (이름, 개수, 카테고리)로 디코딩합니다."""
+        tag_dictionary, _, counts, _, _ = state
+        return [
+            (tag_dictionary.name(int(i)), int(counts[i]), int(tag_dictionary.categories[i]))
+            for i in indices
+        ]
 
     def find_top_matches(self, target_element, additional_wildcards=None):
         matching_items = []
         target_clean = target_element.strip()
+        is_wildcard = (target_clean.startswith("wildcard:") or target_clean.startswith("from:")) and additional_wildcards is not None
+
+        # [신규] 태그 데이터가 아직 로드 중이면 빈 결과 (와일드카드 이름 검색은 태그 데이터와 무관)
+        if not is_wildcard and not self._ensure_ready():
+            return []
+        state = self._search_state()
 
         # 각 접두사에 따른 검색 로직
         if target_clean.startswith("artist:"):
             query = target_clean.replace("artist:", "")
-            for key, value in self.artist_dict.items():
-                if query in key:
-                    matching_items.append((f"artist:{key}", value))
+            hits = self._search_index(state, 'artist').search(query)
+            matching_items = [(f"artist:{name}", count) for name, count, _ in self._decode(state, hits)]
         elif target_clean.startswith("character:"):
             query = target_clean.replace("character:", "")
-            for key, value in self.character_dict_count.items():
-                if query in key:
-                    matching_items.append((key, value)) # character: 접두어는 결과에 포함하지 않음
-        elif (target_clean.startswith("wildcard:") or target_clean.startswith("from:")) and additional_wildcards:
-            # 와일드카드 검색 로직 (기존 코드 참고)
-            # 이 부분은 wildcard_dict_tree 구조에 따라 상세 구현이 필요
+            hits = self._search_index(state, 'character').search(query)
+            # character: 접두어는 결과에 포함하지 않음
+            matching_items = [(name, count) for name, count, _ in self._decode(state, hits)]
+        elif is_wildcard:
             query = target_clean.replace("wildcard:", "").replace("from:", "")
+            if isinstance(additional_wildcards, WildcardNameIndex):
+                # [수정] 경로 트라이에서 세그먼트 접두사로 검색 (줄 수 내림차순, 상위 40개)
+                return additional_wildcards.complete(query, limit=40)
+            # 와일드카드 딕셔너리가 직접 전달된 경우 (기존 방식)
             for key in additional_wildcards.keys():
                 if query in key:
                     matching_items.append((key, len(additional_wildcards[key])))
         else:
             # 일반 태그 검색
-            for key, value in self.limited_generals.items():
-                if target_clean in key:
-                    matching_items.append((key, value))
-        
+            # 카테고리 중복 이름을 고려하여 인덱스는 결과 수의 두 배를 반환
+            hits = self._search_index(state, 'general').search(target_clean)
+            merged = {}
+            for name, count, category in self._decode(state, hits):
+                previous = merged.get(name)
+                if previous is None or self.CATEGORY_PRIORITY[category] > previous[1]:
+                    merged[name] = (count, self.CATEGORY_PRIORITY[category])
+            matching_items = [(name, count) for name, (count, _) in merged.items()]
+
+        if not matching_items and self.fuzzy_fallback and target_clean:
+            return self.find_fuzzy_matches(target_clean)
+
         matching_items.sort(key=lambda x: x[1], reverse=True)
-        return matching_items[:40]
\ No newline at end of file
+        return matching_items[:40]
+
+    def find_fuzzy_matches(self, target_element):
+        """
+        [신규] 오타를 허용하는 태그 검색. (예: "blnde hair" → "blonde hair")
+        결과는 편집 거리 오름차순, 같은 거리에서는 개수 내림차순입니다.
+        """
+        target_clean = target_element.strip()
+        if target_clean.startswith("artist:"):
+            mode, query, label = 'artist', target_clean.replace("artist:", ""), "artist:"
+        elif target_clean.startswith("character:"):
+            mode, query, label = 'character', target_clean.replace("character:", ""), ""
+        elif target_clean.startswith("wildcard:") or target_clean.startswith("from:"):
+            return []
+        else:
+            mode, query, label = 'general', target_clean, ""
+
+        state = self._search_state()
+        tag_dictionary, _, counts, _, _ = state
+        matching_items = []
+        seen = set()
+        for entry, _ in self._fuzzy_index(state, mode).search(query, limit=80):
+            name = tag_dictionary.name(entry)
+            if name in seen:
+                continue
+            seen.add(name)
+            matching_items.append((f"{label}{name}", int(counts[entry])))
+        return matching_items[:40]
+
+    def suggest_next_tags(self, context_tags, limit=40):
+        """
+        [신규] 프롬프트에 이미 있는 태그들과 자주 함께 쓰이는 태그를 추천합니다.
+        결과는 동시 등장 점수 순이며, 표시용 개수는 태그 사전의 (선택한 등급 기준) 게시물 수입니다.
+        """
+        if not self._ensure_ready() or self.cooccurrence is None:
+            return []
+
+        tag_dictionary, _, counts, _, _ = self._search_state()
+        matching_items = []
+        for name, _ in self.cooccurrence.suggest(context_tags, limit=limit):
+            entries = tag_dictionary.lookup(name)
+            count = max((int(counts[i]) for i in entries), default=0)
+            matching_items.append((name, count))
+        return matching_items
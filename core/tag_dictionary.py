@@ -0,0 +1,277 @@
+# core/tag_dictionary.py
+
+import importlib
+import mmap
+import os
+import numpy as np
+from typing import Iterable, List, Optional, Tuple
+
+# Danbooru 태그 카테고리 코드
+CATEGORY_GENERAL = 0
+CATEGORY_ARTIST = 1
+CATEGORY_COPYRIGHT = 3
+CATEGORY_CHARACTER = 4
+
+DEFAULT_DICTIONARY_PATH = os.path.join('data', 'tag_dictionary.bin')
+
+# 코퍼스 통계의 등급 순서 (rating_counts의 열 순서)
+RATINGS = ('g', 's', 'q', 'e')
+
+# 파일 구조 (리틀 엔디언)
+#   헤더: magic(8) | version(u4) | entry_count(u4) | blob_size(u8)
+#   offsets  : u4[entry_count + 1]  각 이름의 blob 내 시작 위치
+#   counts   : u4[entry_count]      게시물 수
+#   ranks    : u4[entry_count]      카테고리 내 원본 순서 (사용량 내림차순)
+#   rating_counts: u4[entry_count * 4]  (버전 2 이상) 코퍼스의 등급별 게시물 수 (RATINGS 순서)
+#   categories: u1[entry_count]     카테고리 코드
+#   blob     : 이름을 UTF-8 바이트 순으로 정렬하여 '\0'으로 이어붙인 문자열
+_MAGIC = b'NAIATAGD'
+_VERSION = 2
+_SUPPORTED_VERSIONS = (1, 2)
+_HEADER = np.dtype([('magic', 'S8'), ('version', '<u4'), ('count', '<u4'), ('blob_size', '<u8')])
+_SEPARATOR = b'\x00'
+
+# 변환 대상 모듈: (모듈명, 딕셔너리 변수명, 카테고리)
+SOURCE_MODULES = [
+    ('result_dupl', 'generals', CATEGORY_GENERAL),
+    ('artist_dictionary', 'artist_dict', CATEGORY_ARTIST),
+    ('result_dict_copyright', 'copyright_dict', CATEGORY_COPYRIGHT),
+    ('danbooru_character', 'character_dict_count', CATEGORY_CHARACTER),
+]
+
+
+class CompactTagDictionary:
+    """
+    바이너리 태그 사전을 mmap으로 열어 NumPy 배열 뷰로 제공하는 클래스.
+    이름 문자열은 필요할 때만 디코딩하므로 거대한 파이썬 딕셔너리를 만들지 않습니다.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._file = None
+        self._mmap = None
+
+        if path is None:
+            self._init_empty()
+            return
+
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 빈 파일은 mmap할 수 없음
+            self._file.close()
+            raise ValueError(f"비어있는 태그 사전 파일입니다: {path}")
+
+        header = np.frombuffer(self._mmap, dtype=_HEADER, count=1)[0]
+        if header['magic'] != _MAGIC or header['version'] not in _SUPPORTED_VERSIONS:
+            self.close()
+            raise ValueError(f"지원하지 않는 태그 사전 형식입니다: {path}")
+
+        count = int(header['count'])
+        offset = _HEADER.itemsize
+        self.offsets = np.frombuffer(self._mmap, dtype='<u4', count=count + 1, offset=offset)
+        offset += self.offsets.nbytes
+        self.counts = np.frombuffer(self._mmap, dtype='<u4', count=count, offset=offset)
+        offset += self.counts.nbytes
+        self.ranks = np.frombuffer(self._mmap, dtype='<u4', count=count, offset=offset)
+        offset += self.ranks.nbytes
+        # [신규] 등급별 개수 (코퍼스 통계를 적용하지 않은 사전이면 None)
+        self.rating_counts = None
+        if header['version'] >= 2:
+            self.rating_counts = np.frombuffer(
+                self._mmap, dtype='<u4', count=count * len(RATINGS), offset=offset
+            ).reshape(count, len(RATINGS))
+            offset += self.rating_counts.nbytes
+        self.categories = np.frombuffer(self._mmap, dtype='u1', count=count, offset=offset)
+        offset += self.categories.nbytes
+
+        self._blob_start = offset
+        self._blob_end = offset + int(header['blob_size'])
+        self.blob = memoryview(self._mmap)[self._blob_start:self._blob_end]
+        self.blob_array = np.frombuffer(self.blob, dtype=np.uint8)
+
+    def _init_empty(self):
+        self.offsets = np.zeros(1, dtype='<u4')
+        self.counts = np.zeros(0, dtype='<u4')
+        self.ranks = np.zeros(0, dtype='<u4')
+        self.rating_counts = None
+        self.categories = np.zeros(0, dtype='u1')
+        self.blob = memoryview(b'')
+        self.blob_array = np.zeros(0, dtype=np.uint8)
+
+    @classmethod
+    def empty(cls) -> 'CompactTagDictionary':
+        """데이터가 없을 때 사용할 빈 사전"""
+        return cls(None)
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def close(self):
+        self._init_empty()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass # 아직 배열 뷰가 참조 중이면 GC에 맡김
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def counts_for_ratings(self, ratings: Iterable[str]) -> np.ndarray:
+        """
+        [신규] 지정한 등급들로 한정한 항목별 게시물 수.
+        [수정] 모든 등급을 선택한 경우에도 코퍼스 등급별 통계의 합을 사용하여, 등급을 켜고 끌 때 개수의 기준이 바뀌지 않도록 합니다.
+        코퍼스 통계가 없으면 전체 개수를 그대로 반환합니다.
+        """
+        if self.rating_counts is None:
+            return self.counts
+        columns = [RATINGS.index(r) for r in set(ratings) if r in RATINGS]
+        if not columns:
+            return np.zeros(len(self), dtype=np.int64)
+        return self.rating_counts[:, sorted(columns)].sum(axis=1, dtype=np.int64)
+
+    def name_bytes(self, index: int) -> bytes:
+        # 각 이름 뒤에는 구분자(\0)가 붙어있음
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1] - 1])
+
+    def name(self, index: int) -> str:
+        return self.name_bytes(index).decode('utf-8')
+
+    def names(self, indices: Iterable[int]) -> List[str]:
+        return [self.name(int(i)) for i in indices]
+
+    def find_substring(self, query: str) -> np.ndarray:
+        """이름에 query가 포함된 항목의 인덱스 배열을 반환합니다. (blob을 C 수준에서 스캔)"""
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.int64)
+        if not query:
+            return np.arange(len(self), dtype=np.int64)
+        pattern = np.frombuffer(query.encode('utf-8'), dtype=np.uint8)
+        data = self.blob_array
+        if len(pattern) > len(data):
+            return np.zeros(0, dtype=np.int64)
+
+        # 첫 바이트가 일치하는 위치를 구한 뒤, 나머지 바이트로 후보를 벡터 단위로 좁힘
+        # (쿼리에 구분자가 없으므로 이름 경계를 넘는 일치는 생기지 않음)
+        positions = np.flatnonzero(data[:len(data) - len(pattern) + 1] == pattern[0])
+        for k in range(1, len(pattern)):
+            if len(positions) == 0:
+                break
+            positions = positions[data[positions + k] == pattern[k]]
+        if len(positions) == 0:
+            return positions.astype(np.int64)
+        entries = np.searchsorted(self.offsets, positions, side='right') - 1
+        # 위치가 오름차순이므로 인접 중복만 제거하면 됨
+        keep = np.ones(len(entries), dtype=bool)
+        keep[1:] = entries[1:] != entries[:-1]
+        return entries[keep]
+
+    def lookup(self, name: str) -> List[int]:
+        """정확히 일치하는 이름의 항목 인덱스 목록 (카테고리별로 여러 개일 수 있음)"""
+        target = name.encode('utf-8')
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.name_bytes(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        result = []
+        while lo < len(self) and self.name_bytes(lo) == target:
+            result.append(lo)
+            lo += 1
+        return result
+
+
+def write_tag_dictionary(path: str, entries: Iterable[Tuple[str, int, int, int]]) -> int:
+    """
+    (이름, 카테고리, 개수, 순위) 목록을 바이너리 태그 사전으로 저장합니다.
+    이름은 UTF-8 바이트 순으로 정렬되며, 임시 파일에 쓴 뒤 교체합니다.
+    """
+    encoded = sorted(
+        ((name.encode('utf-8'), category, count, rank) for name, category, count, rank in entries),
+        key=lambda e: (e[0], e[1])
+    )
+    count = len(encoded)
+
+    lengths = np.fromiter((len(e[0]) + 1 for e in encoded), dtype=np.int64, count=count)
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    if offsets[-1] > np.iinfo(np.uint32).max:
+        raise ValueError("태그 이름 데이터가 4GB를 초과합니다.")
+
+    blob = b''.join(e[0] + _SEPARATOR for e in encoded)
+    counts = np.clip(np.fromiter((e[2] for e in encoded), dtype=np.int64, count=count), 0, np.iinfo(np.uint32).max)
+    ranks = np.fromiter((e[3] for e in encoded), dtype=np.int64, count=count)
+    categories = np.fromiter((e[1] for e in encoded), dtype=np.uint8, count=count)
+    _write_dictionary_file(path, offsets, counts, ranks, categories, blob)
+    return count
+
+
+def _write_dictionary_file(path: str, offsets: np.ndarray, counts: np.ndarray, ranks: np.ndarray,
+                           categories: np.ndarray, blob: bytes, rating_counts: Optional[np.ndarray] = None):
+    """사전 배열들을 파일로 씁니다. 임시 파일에 쓴 뒤 교체합니다."""
+    header = np.zeros(1, dtype=_HEADER)
+    header['magic'] = _MAGIC
+    header['version'] = _VERSION if rating_counts is not None else 1
+    header['count'] = len(counts)
+    header['blob_size'] = len(blob)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(header.tobytes())
+        f.write(offsets.astype('<u4').tobytes())
+        f.write(counts.astype('<u4').tobytes())
+        f.write(ranks.astype('<u4').tobytes())
+        if rating_counts is not None:
+            f.write(np.clip(rating_counts, 0, np.iinfo(np.uint32).max).astype('<u4').tobytes())
+        f.write(categories.astype('u1').tobytes())
+        f.write(blob)
+    os.replace(temp_path, path)
+
+
+def attach_rating_counts(path: str, rating_counts: np.ndarray):
+    """
+    [신규] 기존 사전 파일에 등급별 개수(항목 수 x len(RATINGS))를 추가하여 다시 저장합니다.
+    사전을 mmap으로 열고 있는 프로그램이 없을 때 실행해야 합니다.
+    """
+    dictionary = CompactTagDictionary(path)
+    if rating_counts.shape != (len(dictionary), len(RATINGS)):
+        dictionary.close()
+        raise ValueError(f"등급별 개수 배열의 크기가 사전과 다릅니다: {rating_counts.shape}")
+    arrays = (dictionary.offsets.copy(), dictionary.counts.copy(), dictionary.ranks.copy(),
+              dictionary.categories.copy(), bytes(dictionary.blob))
+    dictionary.close()
+    _write_dictionary_file(path, *arrays, rating_counts=rating_counts)
+
+
+def convert_tag_modules(output_path: str = DEFAULT_DICTIONARY_PATH) -> int:
+    """
+    기존 파이썬 딕셔너리 모듈(result_dupl 등)을 바이너리 태그 사전으로 변환합니다.
+    없는 모듈은 건너뛰며, 변환된 항목 수를 반환합니다. (0이면 파일을 만들지 않음)
+    """
+    entries = []
+    for module_name, variable_name, category in SOURCE_MODULES:
+        try:
+            module = importlib.import_module(module_name)
+            tag_dict = getattr(module, variable_name)
+        except (ImportError, AttributeError):
+            print(f"⚠️ 태그 모듈을 찾을 수 없어 건너뜁니다: {module_name}")
+            continue
+
+        # 딕셔너리 삽입 순서(사용량 내림차순)를 순위로 보존
+        entries.extend((name, category, int(count), rank) for rank, (name, count) in enumerate(tag_dict.items()))
+        print(f"  - {module_name}: {len(tag_dict)}개 태그")
+
+    if not entries:
+        return 0
+    return write_tag_dictionary(output_path, entries)
+
+
+if __name__ == '__main__':
+    total = convert_tag_modules()
+    print(f"✅ {total}개 태그를 {DEFAULT_DICTIONARY_PATH}에 저장했습니다.")
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+class _CategoryFacet:
+    """
+    한 카테고리 컬럼의 태그를 정수 ID 배열(CSR 형식)로 보관하고,
+    행 마스크에 대한 태그별 개수를 벡터 연산으로 계산합니다.
+    """
+
+    def __init__(self, series: pd.Series):
+        values = series.fillna('').astype(str)
+        split = values.str.split(',')
+        lengths = split.str.len().to_numpy(dtype=np.int64)
+        flat = split.explode().astype(str).str.strip().to_numpy(dtype=object)
+
+        # 행 번호를 태그 등장 순서대로 펼친 뒤, 빈 태그 제거
+        occurrence_rows = np.repeat(np.arange(len(values), dtype=np.int64), lengths)
+        keep = flat != ''
+        codes, uniques = pd.factorize(flat[keep])
+
+        self.vocabulary = np.asarray(uniques, dtype=object)
+        self.tag_ids = codes.astype(np.int32)
+        self.row_ptr = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(occurrence_rows[keep], minlength=len(values)), out=self.row_ptr[1:])
+
+        self.counts = np.zeros(len(self.vocabulary), dtype=np.int64)
+
+    def _gather(self, rows: np.ndarray) -> np.ndarray:
+        """지정된 행들의 태그 ID를 한 번에 모읍니다. O(행 수 + 태그 수)"""
+        if len(rows) == 0:
+            return self.tag_ids[:0]
+        starts = self.row_ptr[rows]
+        lengths = self.row_ptr[rows + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return self.tag_ids[:0]
+        output_starts = np.cumsum(lengths) - lengths
+        offsets = np.repeat(starts - output_starts, lengths) + np.arange(total)
+        return self.tag_ids[offsets]
+
+    def _bincount(self, rows: np.ndarray) -> np.ndarray:
+        return np.bincount(self._gather(rows), minlength=len(self.vocabulary))
+
+    def recount(self, rows: np.ndarray):
+        self.counts = self._bincount(rows)
+
+    def apply_delta(self, added_rows: np.ndarray, removed_rows: np.ndarray):
+        if len(added_rows):
+            self.counts += self._bincount(added_rows)
+        if len(removed_rows):
+            self.counts -= self._bincount(removed_rows)
+
+    def top(self, n: int) -> List[Tuple[str, int]]:
+        counts = self.counts
+        if len(counts) == 0:
+            return []
+        if len(counts) > n:
+            candidates = np.argpartition(-counts, n)[:n]
+        else:
+            candidates = np.arange(len(counts))
+        candidates = candidates[np.argsort(-counts[candidates], kind='stable')]
+        return [(self.vocabulary[i], int(counts[i])) for i in candidates if counts[i] > 0]
+
+
+class TagFacetIndex:
+    """
+    검색 결과 데이터프레임의 카테고리별 태그 개수(패싯)를 관리하는 인덱스.
+    필터 마스크가 바뀌면 이전 마스크와의 차이(추가/제거된 행)만 반영하여 개수를 갱신합니다.
+    """
+    CATEGORIES = ['artist', 'character', 'copyright', 'general']
+
+    def __init__(self, df: pd.DataFrame):
+        self.num_rows = len(df)
+        self.facets: Dict[str, _CategoryFacet] = {
+            category: _CategoryFacet(df[category])
+            for category in self.CATEGORIES if category in df.columns
+        }
+        self._mask: Optional[np.ndarray] = None
+
+    def update(self, mask: np.ndarray):
+        """현재 뷰 마스크로 태그 개수를 갱신합니다."""
+        mask = np.asarray(mask, dtype=bool)
+        previous = self._mask
+
+        if previous is None or len(previous) != len(mask):
+            rows = np.flatnonzero(mask)
+            for facet in self.facets.values():
+                facet.recount(rows)
+        else:
+            added = np.flatnonzero(mask & ~previous)
+            removed = np.flatnonzero(previous & ~mask)
+            visible = int(mask.sum())
+            if len(added) + len(removed) >= visible:
+                # 변경량이 현재 행 수보다 많으면 전체 재계산이 더 저렴
+                rows = np.flatnonzero(mask)
+                for facet in self.facets.values():
+                    facet.recount(rows)
+            else:
+                for facet in self.facets.values():
+                    facet.apply_delta(added, removed)
+
+        self._mask = mask.copy()
+
+    def top(self, category: str, n: int = 30) -> List[Tuple[str, int]]:
+        """카테고리의 상위 n개 (태그, 개수)를 반환합니다."""
+        facet = self.facets.get(category)
+        return facet.top(n) if facet else []
@@ -0,0 +1,122 @@
+import numpy as np
+from typing import Tuple
+from core.tag_dictionary import CompactTagDictionary
+
+class TagSearchIndex:
+    """
+    태그 사전의 일부 항목(검색 풀)에 대한 부분 문자열 검색 인덱스.
+
+    - 1~2바이트 쿼리: 해당 n-gram을 포함하는 항목의 상위 K개(개수 내림차순)를 미리 계산해 둡니다.
+    - 3바이트 이상 쿼리: 트라이그램 역색인에서 가장 짧은 포스팅 리스트를 개수 내림차순으로 훑으며
+      실제 포함 여부를 확인하고, K개를 찾으면 즉시 중단합니다.
+
+    UTF-8은 자기 동기화 인코딩이므로 바이트 단위 부분 문자열 일치는 문자 단위 일치와 같습니다.
+    이름이 정렬된 사전이므로 접두사 일치도 부분 문자열 일치에 포함되어 함께 처리됩니다.
+    """
+
+    def __init__(self, dictionary: CompactTagDictionary, pool: np.ndarray, top_k: int = 80,
+                 counts: np.ndarray = None):
+        self.dictionary = dictionary
+        self.top_k = top_k
+
+        entries = np.flatnonzero(pool)
+        # [수정] 순위 기준 개수 (등급을 제한한 코퍼스 통계 등). 생략하면 사전의 전체 개수
+        counts = (dictionary.counts if counts is None else counts).astype(np.int64)
+        # 개수 내림차순 순위 (동률은 이름 순). 정렬 키에 순위를 넣어 포스팅 리스트가 바로 개수 순이 되게 함
+        by_count = entries[np.argsort(-counts[entries], kind='stable')]
+        count_rank = np.zeros(len(dictionary), dtype=np.int64)
+        count_rank[by_count] = np.arange(len(by_count))
+        rank_bits = max(int(len(by_count)).bit_length(), 1)
+
+        # 풀 전체의 상위 K개 (빈 쿼리용)
+        self._top_all = by_count[:top_k]
+
+        self._ngrams = {}
+        for n in (1, 2, 3):
+            keys, entry_ids = self._extract_ngrams(dictionary, pool, n)
+            # (n-gram, 개수 순위)를 하나의 정수로 묶어 정렬하면서 같은 이름의 중복 n-gram도 제거
+            combined = np.sort((keys << rank_bits) | count_rank[entry_ids])
+            distinct = np.ones(len(combined), dtype=bool)
+            distinct[1:] = combined[1:] != combined[:-1]
+            combined = combined[distinct]
+            keys = combined >> rank_bits
+            entry_ids = by_count[combined & ((1 << rank_bits) - 1)]
+
+            if n < 3:
+                # 짧은 n-gram은 버킷별 상위 K개만 보관
+                starts = self._group_starts(keys)
+                rank = np.arange(len(keys)) - np.repeat(starts, np.diff(np.append(starts, len(keys))))
+                keys, entry_ids = keys[rank < top_k], entry_ids[rank < top_k]
+
+            starts = self._group_starts(keys)
+            pointers = np.append(starts, len(keys)).astype(np.int64)
+            self._ngrams[n] = (keys[starts], pointers, entry_ids.astype(np.int32))
+
+    @staticmethod
+    def _group_starts(sorted_keys: np.ndarray) -> np.ndarray:
+        """정렬된 키 배열에서 각 키 그룹이 시작하는 위치"""
+        group_start = np.ones(len(sorted_keys), dtype=bool)
+        group_start[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        return np.flatnonzero(group_start)
+
+    @staticmethod
+    def _extract_ngrams(dictionary: CompactTagDictionary, pool: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """blob 전체에서 이름 경계를 넘지 않는 n-gram 키와 해당 항목 번호를 벡터 연산으로 추출합니다."""
+        data = dictionary.blob_array
+        if len(data) < n:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        # 풀에 속한 이름의 바이트 위치만 남김
+        lengths = np.diff(dictionary.offsets.astype(np.int64))
+        in_pool = np.repeat(pool, lengths)
+
+        length = len(data) - n + 1
+        valid = in_pool[:length].copy()
+        keys = np.zeros(length, dtype=np.int64)
+        for k in range(n):
+            window = data[k:k + length]
+            valid &= window != 0 # 구분자(\0)를 포함하면 이름 경계를 넘는 것
+            keys = (keys << 8) | window
+
+        positions = np.flatnonzero(valid)
+        entry_ids = np.repeat(np.arange(len(dictionary), dtype=np.int64), lengths)[positions]
+        return keys[positions], entry_ids
+
+    def _posting(self, n: int, key: int) -> np.ndarray:
+        unique_keys, pointers, entry_ids = self._ngrams[n]
+        i = np.searchsorted(unique_keys, key)
+        if i >= len(unique_keys) or unique_keys[i] != key:
+            return entry_ids[:0]
+        return entry_ids[pointers[i]:pointers[i + 1]]
+
+    def search(self, query: str, limit: int = None) -> np.ndarray:
+        """query를 포함하는 항목을 개수 내림차순으로 최대 limit개 반환합니다."""
+        limit = limit or self.top_k
+        encoded = query.encode('utf-8')
+        if not encoded:
+            return self._top_all[:limit]
+
+        if len(encoded) < 3:
+            key = int.from_bytes(encoded, 'big')
+            return self._posting(len(encoded), key)[:limit]
+
+        # 가장 짧은 트라이그램 포스팅 리스트를 후보로 사용
+        shortest = None
+        for i in range(len(encoded) - 2):
+            posting = self._posting(3, int.from_bytes(encoded[i:i + 3], 'big'))
+            if len(posting) == 0:
+                return posting
+            if shortest is None or len(posting) < len(shortest):
+                shortest = posting
+
+        if len(encoded) == 3:
+            return shortest[:limit]
+
+        # 후보는 이미 개수 내림차순이므로 앞에서부터 검증하다 limit개가 차면 중단
+        results = []
+        for entry in shortest:
+            if encoded in self.dictionary.name_bytes(entry):
+                results.append(entry)
+                if len(results) >= limit:
+                    break
+        return np.asarray(results, dtype=np.int64)
@@ -0,0 +1,109 @@
+# core/tag_statistics.py
+
+import os
+import time
+import numpy as np
+import pandas as pd
+from multiprocessing import Pool, cpu_count
+from typing import Dict, List, Optional
+from core.tag_dictionary import (
+    CompactTagDictionary, attach_rating_counts, DEFAULT_DICTIONARY_PATH, RATINGS,
+    CATEGORY_GENERAL, CATEGORY_ARTIST, CATEGORY_COPYRIGHT, CATEGORY_CHARACTER
+)
+
+# 샤드 컬럼 → 태그 사전 카테고리 (같은 이름이 여러 카테고리에 있어도 컬럼별로 따로 셈)
+COLUMN_CATEGORIES = {
+    'general': CATEGORY_GENERAL,
+    'artist': CATEGORY_ARTIST,
+    'copyright': CATEGORY_COPYRIGHT,
+    'character': CATEGORY_CHARACTER,
+}
+
+
+# --- 오프라인 집계 (map-reduce) ---
+
+_entry_indexes = None
+_entry_count = 0
+
+def _init_worker(names_by_category: Dict[int, List[str]], entries_by_category: Dict[int, np.ndarray], entry_count: int):
+    """워커 프로세스마다 한 번 카테고리별 '이름 → 사전 항목 번호' 색인을 구성합니다."""
+    global _entry_indexes, _entry_count
+    _entry_indexes = {
+        category: (pd.Index(names), entries_by_category[category])
+        for category, names in names_by_category.items()
+    }
+    _entry_count = entry_count
+
+def count_shard(file_path: str) -> np.ndarray:
+    """
+    [map] Parquet 샤드 하나에서 사전 항목별·등급별 게시물 수를 집계합니다.
+    반환: (항목 수 x len(RATINGS)) 개수 배열
+    """
+    counts = np.zeros(_entry_count * len(RATINGS), dtype=np.int64)
+    try:
+        df = pd.read_parquet(file_path, engine="pyarrow", columns=list(COLUMN_CATEGORIES) + ['rating'])
+    except Exception as e:
+        print(f"⚠️ 샤드를 읽지 못해 건너뜁니다: {file_path} ({e})")
+        return counts.reshape(-1, len(RATINGS))
+
+    rating_codes = pd.Index(RATINGS).get_indexer(df['rating'].astype(str))
+    for column, category in COLUMN_CATEGORIES.items():
+        names, entries = _entry_indexes[category]
+        split = df[column].fillna('').astype(str).str.split(',')
+        lengths = split.str.len().to_numpy(dtype=np.int64)
+        positions = names.get_indexer(split.explode().astype(str).str.strip())
+        ratings = np.repeat(rating_codes, lengths)
+        known = (positions >= 0) & (ratings >= 0)
+        # 한 게시물에 같은 태그가 중복되어도 한 번만 셈
+        if not known.any():
+            continue
+        rows = np.repeat(np.arange(len(df), dtype=np.int64), lengths)[known]
+        combined = np.sort(rows * len(names) + positions[known])
+        combined = combined[np.concatenate(([True], combined[1:] != combined[:-1]))]
+        rows, positions = combined // len(names), combined % len(names)
+        slots = entries[positions] * len(RATINGS) + rating_codes[rows]
+        counts += np.bincount(slots, minlength=len(counts))
+    return counts.reshape(-1, len(RATINGS))
+
+def _load_category_names(dictionary: CompactTagDictionary):
+    """카테고리별 (이름 목록, 항목 번호 배열)"""
+    names_by_category, entries_by_category = {}, {}
+    for category in COLUMN_CATEGORIES.values():
+        entries = np.flatnonzero(dictionary.categories == category)
+        names_by_category[category] = dictionary.names(entries)
+        entries_by_category[category] = entries
+    return names_by_category, entries_by_category
+
+def build_rating_statistics(tags_dir: str = 'data/tags', dictionary_path: str = DEFAULT_DICTIONARY_PATH,
+                            processes: Optional[int] = None) -> np.ndarray:
+    """
+    [reduce] 모든 샤드를 한 번 병렬로 훑어 사전 항목별·등급별 게시물 수를 계산하고 태그 사전에 저장합니다.
+    자동완성 순위와 검색 쿼리의 키워드 평가 순서가 이 통계를 사용합니다. 집계된 배열을 반환합니다.
+    """
+    files = sorted(os.path.join(tags_dir, f) for f in os.listdir(tags_dir) if f.endswith('.parquet'))
+    if not files:
+        raise ValueError(f"집계할 .parquet 파일이 없습니다: {tags_dir}")
+
+    dictionary = CompactTagDictionary(dictionary_path)
+    entry_count = len(dictionary)
+    names_by_category, entries_by_category = _load_category_names(dictionary)
+    dictionary.close()
+    if processes is None:
+        processes = max(1, min(cpu_count() // 2, 8))
+
+    rating_counts = np.zeros((entry_count, len(RATINGS)), dtype=np.int64)
+    initargs = (names_by_category, entries_by_category, entry_count)
+    with Pool(processes=processes, initializer=_init_worker, initargs=initargs) as pool:
+        for done, shard_counts in enumerate(pool.imap_unordered(count_shard, files), start=1):
+            rating_counts += shard_counts
+            print(f"  - 샤드 집계 {done}/{len(files)}")
+
+    attach_rating_counts(dictionary_path, rating_counts)
+    return rating_counts
+
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    totals = build_rating_statistics().sum(axis=0)
+    summary = ", ".join(f"{rating}={int(total)}" for rating, total in zip(RATINGS, totals))
+    print(f"✅ 등급별 태그 통계를 {DEFAULT_DICTIONARY_PATH}에 저장했습니다. ({summary}, {time.perf_counter() - start:.1f}s)")
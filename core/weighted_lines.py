@@ -0,0 +1,83 @@
+# core/weighted_lines.py
+
+import random
+import re
+import numpy as np
+from typing import List, Optional, Sequence, Tuple
+
+# '5::red dress', '0.5::blue dress' (접두사가 없는 줄은 가중치 1)
+# 나머지 부분에 '::'가 또 있으면 NAI 강조 구문('1.2::red dress::')이므로 가중치로 보지 않음
+_WEIGHT_PATTERN = re.compile(r'^(\d+(?:\.\d+)?|\.\d+)::((?:(?!::).)*)$')
+WEIGHT_SEPARATOR = '::'
+
+
+def parse_weighted_lines(lines: List[str]) -> Tuple[List[str], Optional[List[float]]]:
+    """
+    와일드카드 줄에서 가중치 접두사를 분리합니다. (줄 목록, 가중치 목록)을 반환하며,
+    가중치 접두사가 하나도 없으면 가중치 목록은 None입니다. (기존 균등 선택 그대로)
+    가중치가 0인 줄과 접두사만 있고 내용이 빈 줄은 제외합니다.
+    [수정] NAI 강조 구문이 들어 있는 줄('1.2::red dress::')은 접두사로 분리하지 않고 그대로 둡니다.
+    """
+    # 대부분의 파일은 가중치가 없으므로 줄마다 검사하지 않고 한 번에 확인
+    if WEIGHT_SEPARATOR not in '\n'.join(lines):
+        return lines, None
+
+    choices, weights, weighted = [], [], False
+    for line in lines:
+        match = _WEIGHT_PATTERN.match(line) if WEIGHT_SEPARATOR in line else None
+        if match is None:
+            choices.append(line)
+            weights.append(1.0)
+            continue
+        weighted = True
+        weight, text = float(match.group(1)), match.group(2).strip()
+        if weight > 0 and text:
+            choices.append(text)
+            weights.append(weight)
+    return (choices, weights) if weighted else (lines, None)
+
+
+class AliasTable:
+    """
+    Walker/Vose 별칭 방법(alias method) 샘플러. 구성은 O(n), 추출은 줄 수와 무관하게 O(1)입니다.
+    (균등하게 칸 하나를 고른 뒤, 칸의 확률에 따라 그 칸 또는 칸의 별칭을 반환)
+    """
+    __slots__ = ('prob', 'alias', '_prob_list', '_alias_list')
+
+    def __init__(self, weights: Sequence[float]):
+        weights = np.asarray(weights, dtype=np.float64)
+        count = len(weights)
+        if count == 0 or not np.isfinite(weights).all() or (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError("별칭 테이블에는 합이 0보다 큰 유한한 가중치가 필요합니다.")
+
+        scaled = (weights * (count / weights.sum())).tolist()
+        prob = [1.0] * count
+        alias = list(range(count))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            prob[less] = scaled[less]
+            alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # 남은 칸은 부동소수점 오차를 무시하고 확률 1로 둠
+
+        self.prob = np.asarray(prob, dtype=np.float64)
+        self.alias = np.asarray(alias, dtype=np.int64)
+        # 한 번에 하나씩 뽑을 때는 NumPy 스칼라 인덱싱보다 리스트가 빠름
+        self._prob_list = prob
+        self._alias_list = alias
+
+    def __len__(self) -> int:
+        return len(self._prob_list)
+
+    def sample(self) -> int:
+        """random 모듈로 번호 하나를 뽑습니다."""
+        i = random.randrange(len(self._prob_list))
+        return i if random.random() < self._prob_list[i] else self._alias_list[i]
+
+    def sample_many(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        """NumPy 생성기로 번호 size개를 한 번에 뽑습니다."""
+        slots = rng.integers(0, len(self._prob_list), size=size)
+        return np.where(rng.random(size) < self.prob[slots], slots, self.alias[slots])
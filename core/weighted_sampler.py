@@ -0,0 +1,158 @@
+import random
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, Optional
+
+class FenwickSampler:
+    """
+    Fenwick 트리(Binary Indexed Tree)를 이용한 비복원 가중치 샘플러.
+    추출과 삭제가 모두 O(log n)이며, 삭제는 가중치를 0으로 만드는 지연 삭제 방식입니다.
+    """
+
+    def __init__(self, weights: np.ndarray):
+        weights = np.asarray(weights, dtype=np.float64)
+        # 음수/NaN/무한대 가중치는 0으로 처리
+        weights = np.where(np.isfinite(weights) & (weights > 0), weights, 0.0)
+        self._weights = weights.copy()
+        self._size = len(weights)
+        self._tree = self._build_tree(weights)
+        self._remaining = int(np.count_nonzero(weights))
+
+        # 이진 하강 탐색의 시작 비트 (n 이하의 최대 2의 거듭제곱)
+        self._top_bit = 1 << (self._size.bit_length() - 1) if self._size > 0 else 0
+
+    @staticmethod
+    def _build_tree(weights: np.ndarray) -> np.ndarray:
+        """누적합을 이용해 O(n)으로 트리를 구성합니다. (1-based 인덱스)"""
+        n = len(weights)
+        prefix = np.zeros(n + 1, dtype=np.float64)
+        np.cumsum(weights, out=prefix[1:])
+        idx = np.arange(1, n + 1)
+        tree = np.zeros(n + 1, dtype=np.float64)
+        tree[1:] = prefix[idx] - prefix[idx - (idx & -idx)]
+        return tree
+
+    def __len__(self) -> int:
+        """아직 추출되지 않은(가중치가 0보다 큰) 항목 수를 반환합니다."""
+        return self._remaining
+
+    def total(self) -> float:
+        """남은 항목의 가중치 총합을 반환합니다. O(log n)"""
+        return self._prefix_sum(self._size)
+
+    def _prefix_sum(self, i: int) -> float:
+        s = 0.0
+        tree = self._tree
+        while i > 0:
+            s += tree[i]
+            i -= i & -i
+        return s
+
+    def _add(self, i: int, delta: float):
+        """0-based 인덱스 i의 가중치에 delta를 더합니다."""
+        i += 1
+        tree = self._tree
+        n = self._size
+        while i <= n:
+            tree[i] += delta
+            i += i & -i
+
+    def _find(self, target: float) -> int:
+        """누적 가중치가 target을 초과하는 첫 번째 0-based 인덱스를 찾습니다."""
+        pos = 0
+        tree = self._tree
+        bit = self._top_bit
+        while bit:
+            nxt = pos + bit
+            if nxt <= self._size and tree[nxt] <= target:
+                pos = nxt
+                target -= tree[nxt]
+            bit >>= 1
+        return min(pos, self._size - 1)
+
+    def sample(self, rng: Optional[random.Random] = None) -> Optional[int]:
+        """가중치에 비례하여 인덱스 하나를 선택합니다. (제거하지 않음)"""
+        if self._remaining == 0:
+            return None
+
+        total = self.total()
+        if total <= 0:
+            # 부동소수점 오차 누적 시 트리를 재구성
+            self._tree = self._build_tree(self._weights)
+            total = self.total()
+            if total <= 0:
+                return None
+
+        rand = rng.random if rng else random.random
+        index = self._find(rand() * total)
+        if self._weights[index] <= 0:
+            # 오차로 인해 이미 삭제된 칸에 떨어진 경우, 트리를 재구성하고 다시 시도
+            self._tree = self._build_tree(self._weights)
+            index = self._find(rand() * self.total())
+            if self._weights[index] <= 0:
+                index = int(np.flatnonzero(self._weights)[0])
+        return index
+
+    def remove(self, index: int):
+        """인덱스를 추출 대상에서 제외합니다. (지연 삭제)"""
+        weight = self._weights[index]
+        if weight <= 0:
+            return
+        self._weights[index] = 0.0
+        self._add(index, -weight)
+        self._remaining -= 1
+
+    def pop(self, rng: Optional[random.Random] = None) -> Optional[int]:
+        """가중치 비례로 인덱스를 선택하고 즉시 제외합니다."""
+        index = self.sample(rng)
+        if index is not None:
+            self.remove(index)
+        return index
+
+
+def _score_column(df: pd.DataFrame) -> Optional[np.ndarray]:
+    if 'score' not in df.columns:
+        return None
+    score = pd.to_numeric(df['score'], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+    return np.clip(score, 0, None)
+
+def _weight_score(df: pd.DataFrame) -> Optional[np.ndarray]:
+    """score에 비례 (score 0 이하 게시물도 뽑힐 수 있도록 +1)"""
+    score = _score_column(df)
+    return None if score is None else score + 1.0
+
+def _weight_log_score(df: pd.DataFrame) -> Optional[np.ndarray]:
+    """log(1 + score)에 비례하여 고득점 게시물의 쏠림을 완화"""
+    score = _score_column(df)
+    return None if score is None else np.log1p(score) + 1.0
+
+def _weight_inverse_tags(df: pd.DataFrame) -> Optional[np.ndarray]:
+    """general 태그 수에 반비례 (짧은 프롬프트 우선)"""
+    if 'general' not in df.columns:
+        return None
+    tag_counts = df['general'].fillna('').astype(str).str.count(',').to_numpy(dtype=np.float64) + 1.0
+    return 1.0 / tag_counts
+
+# 선택 가능한 가중치 식: {이름: (표시명, 계산 함수)}
+WEIGHT_EXPRESSIONS: Dict[str, tuple[str, Callable[[pd.DataFrame], Optional[np.ndarray]]]] = {
+    'uniform': ("균등", lambda df: None),
+    'score': ("Score 비례", _weight_score),
+    'log_score': ("log(Score) 비례", _weight_log_score),
+    'inverse_tags': ("태그 수 반비례", _weight_inverse_tags),
+}
+
+def compute_weights(df: pd.DataFrame, mode: str) -> Optional[np.ndarray]:
+    """
+    지정된 가중치 식으로 행별 가중치를 계산합니다.
+    균등 모드이거나 계산에 필요한 컬럼이 없으면 None을 반환합니다.
+    """
+    entry = WEIGHT_EXPRESSIONS.get(mode)
+    if entry is None:
+        print(f"⚠️ 알 수 없는 가중치 식입니다: {mode}")
+        return None
+    weights = entry[1](df)
+    if weights is None:
+        return None
+    if not np.any(np.isfinite(weights) & (weights > 0)):
+        return None
+    return weights
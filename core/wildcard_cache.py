@@ -0,0 +1,201 @@
+# core/wildcard_cache.py
+
+import mmap
+import os
+import shutil
+import time
+import numpy as np
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+DEFAULT_WILDCARD_CACHE_PATH = os.path.join('data', 'wildcard_cache.bin')
+
+# 파일 구조 (리틀 엔디언)
+#   헤더: magic(8) | version(u4) | file_count(u4) | line_count(u8) | written_ns(i8) | paths_size(u8) | lines_size(u8)
+#         | references_size(u8)
+#   sizes    : u8[file_count]      파일 크기 (바이트)
+#   mtimes   : i8[file_count]      파일 수정 시각 (ns)
+#   pointers : u8[file_count + 1]  파일별 줄 목록 시작 위치 (CSR, 빈 파일은 0줄)
+#   offsets  : u8[file_count + 1]  (버전 2) 파일별 lines 내 바이트 시작 위치 - 파일 하나만 디코딩할 때 사용
+#   reference_offsets : u8[file_count + 1]  (버전 3) 파일별 references 내 바이트 시작 위치
+#   paths    : 와일드카드 폴더 기준 상대 경로(posix)를 '\0'으로 이어붙인 UTF-8 문자열
+#   lines    : 모든 줄 뒤에 '\n'을 붙여 이어붙인 UTF-8 문자열 (줄은 strip된 비어있지 않은 문자열)
+#   references : (버전 3) 파일별로 참조하는 와일드카드 이름 뒤에 '\n'을 붙여 이어붙인 UTF-8 문자열
+#                (지연 로드 모드에서 내용을 읽지 않고 참조 그래프를 구성하는 데 사용)
+_MAGIC = b'NAIAWCCH'
+_VERSION = 3
+_HEADER = np.dtype([('magic', 'S8'), ('version', '<u4'), ('file_count', '<u4'), ('line_count', '<u8'),
+                    ('written_ns', '<i8'), ('paths_size', '<u8'), ('lines_size', '<u8'), ('references_size', '<u8')])
+
+# 캐시를 쓴 시각과 이만큼 가까운 수정 시각은 같은 시각 안에 다시 수정되었을 수 있으므로 신뢰하지 않음
+_RACY_WINDOW_NS = 2_000_000_000
+
+# {상대 경로: (크기, 수정 시각 ns, 줄 목록)}
+CacheEntries = Dict[str, Tuple[int, int, List[str]]]
+
+
+class WildcardCache:
+    """
+    와일드카드 캐시 파일을 mmap으로 열어 파일 목록(매니페스트)과 파일별 줄 목록을 제공하는 클래스.
+    줄 내용은 요청한 파일의 바이트 구간만 디코딩하므로, 필요한 와일드카드만 메모리에 올릴 수 있습니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"비어있는 와일드카드 캐시입니다: {path}")
+
+        header = np.frombuffer(self._mmap, dtype=_HEADER, count=1)[0] if len(self._mmap) >= _HEADER.itemsize else None
+        if header is None or header['magic'] != _MAGIC or header['version'] != _VERSION:
+            self.close()
+            raise ValueError(f"지원하지 않는 와일드카드 캐시 형식입니다: {path}")
+
+        count = int(header['file_count'])
+        self.line_total = int(header['line_count'])
+        offset = _HEADER.itemsize
+        self.sizes = np.frombuffer(self._mmap, dtype='<u8', count=count, offset=offset).tolist()
+        offset += count * 8
+        self.mtimes = np.frombuffer(self._mmap, dtype='<i8', count=count, offset=offset).tolist()
+        offset += count * 8
+        self.pointers = np.frombuffer(self._mmap, dtype='<u8', count=count + 1, offset=offset).tolist()
+        offset += (count + 1) * 8
+        self.offsets = np.frombuffer(self._mmap, dtype='<u8', count=count + 1, offset=offset).tolist()
+        offset += (count + 1) * 8
+        self.reference_offsets = np.frombuffer(self._mmap, dtype='<u8', count=count + 1, offset=offset).tolist()
+        offset += (count + 1) * 8
+        paths_end = offset + int(header['paths_size'])
+        self.paths = self._mmap[offset:paths_end].decode('utf-8').split('\0') if count else []
+        self._lines_start = paths_end
+        self._lines_end = paths_end + int(header['lines_size'])
+        self._references_start = self._lines_end
+        self._references_end = self._lines_end + int(header['references_size'])
+        if len(self.paths) != count or self._references_end > len(self._mmap) or self.pointers[-1] != self.line_total:
+            self.close()
+            raise ValueError(f"손상된 와일드카드 캐시입니다: {path}")
+
+        self._positions = {relative_path: i for i, relative_path in enumerate(self.paths)}
+        self._trusted_before = int(header['written_ns']) - _RACY_WINDOW_NS
+
+    @classmethod
+    def open(cls, path: str = DEFAULT_WILDCARD_CACHE_PATH) -> Optional['WildcardCache']:
+        """파일이 없거나 읽을 수 없으면 None을 반환합니다."""
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 와일드카드 캐시를 무시합니다: {e}")
+            return None
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def entry(self, relative_path: str) -> Optional[Tuple[int, int, int]]:
+        """
+        상대 경로의 (크기, 수정 시각, 캐시 내 번호). 없으면 None.
+        캐시를 쓴 직후에 수정된 파일은 크기/시각이 같아도 내용이 다를 수 있어 None을 반환합니다. (다시 읽게 됨)
+        """
+        i = self._positions.get(relative_path)
+        if i is None or self.mtimes[i] >= self._trusted_before:
+            return None
+        return self.sizes[i], self.mtimes[i], i
+
+    def line_count(self, i: int) -> int:
+        return self.pointers[i + 1] - self.pointers[i]
+
+    def lines(self, i: int) -> List[str]:
+        """캐시 내 번호 i 파일의 줄 목록 (해당 바이트 구간만 디코딩)"""
+        start = self._lines_start + self.offsets[i]
+        end = self._lines_start + self.offsets[i + 1]
+        return self._mmap[start:end].decode('utf-8').split('\n')[:-1]
+
+    def references(self, i: int) -> FrozenSet[str]:
+        """[신규] 캐시 내 번호 i 파일이 참조하는 와일드카드 이름 (줄 내용은 디코딩하지 않음)"""
+        start = self._references_start + self.reference_offsets[i]
+        end = self._references_start + self.reference_offsets[i + 1]
+        if start == end:
+            return frozenset()
+        return frozenset(self._mmap[start:end].decode('utf-8').split('\n')[:-1])
+
+    def all_lines(self) -> List[str]:
+        """모든 파일의 줄을 한 번에 디코딩합니다. (pointers로 파일별 구간을 나눔)"""
+        if not self.line_total:
+            return []
+        return self._mmap[self._lines_start:self._lines_end].decode('utf-8').split('\n')[:-1]
+
+
+def read_wildcard_cache(path: str = DEFAULT_WILDCARD_CACHE_PATH) -> CacheEntries:
+    """
+    캐시 파일 전체를 한 번에 읽어 {상대 경로: (크기, 수정 시각, 줄 목록)}을 반환합니다.
+    파일이 없거나 형식이 맞지 않으면 빈 딕셔너리를 반환합니다.
+    """
+    cache = WildcardCache.open(path)
+    if cache is None:
+        return {}
+    try:
+        lines = cache.all_lines()
+        entries = {}
+        for relative_path in cache.paths:
+            entry = cache.entry(relative_path)
+            if entry is not None:
+                size, mtime, i = entry
+                entries[relative_path] = (size, mtime, lines[cache.pointers[i]:cache.pointers[i + 1]])
+        return entries
+    finally:
+        cache.close()
+
+
+def write_wildcard_cache(path: str, entries: Iterable[Tuple[str, int, int, List[str], Iterable[str]]]):
+    """
+    (상대 경로, 크기, 수정 시각, 줄 목록, 참조하는 와일드카드 이름)을 상대 경로 순으로 받아 path에 캐시 파일을 씁니다.
+    줄 내용은 보조 파일로 흘려 쓰므로 모든 와일드카드를 한꺼번에 메모리에 올리지 않습니다.
+    열려 있는 캐시를 교체할 수 있도록 파일 교체(os.replace)는 호출하는 쪽에서 합니다.
+    """
+    relative_paths, sizes, mtimes, pointers, offsets = [], [], [], [0], [0]
+    references_blob, reference_offsets = [], [0]
+    lines_path = f"{path}.lines"
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(lines_path, 'wb') as blob:
+        for relative_path, size, mtime, lines, references in entries:
+            data = ''.join(line + '\n' for line in lines).encode('utf-8')
+            blob.write(data)
+            relative_paths.append(relative_path)
+            sizes.append(size)
+            mtimes.append(mtime)
+            pointers.append(pointers[-1] + len(lines))
+            offsets.append(offsets[-1] + len(data))
+            # 참조 목록은 작으므로 메모리에 모아 두었다가 마지막에 씀
+            data = ''.join(name + '\n' for name in sorted(references)).encode('utf-8')
+            references_blob.append(data)
+            reference_offsets.append(reference_offsets[-1] + len(data))
+
+    paths_blob = '\0'.join(relative_paths).encode('utf-8')
+    header = np.zeros(1, dtype=_HEADER)
+    header['magic'] = _MAGIC
+    header['version'] = _VERSION
+    header['file_count'] = len(relative_paths)
+    header['line_count'] = pointers[-1]
+    header['written_ns'] = time.time_ns()
+    header['paths_size'] = len(paths_blob)
+    header['lines_size'] = offsets[-1]
+    header['references_size'] = reference_offsets[-1]
+
+    with open(path, 'wb') as f:
+        f.write(header.tobytes())
+        f.write(np.asarray(sizes, dtype='<u8').tobytes())
+        f.write(np.asarray(mtimes, dtype='<i8').tobytes())
+        f.write(np.asarray(pointers, dtype='<u8').tobytes())
+        f.write(np.asarray(offsets, dtype='<u8').tobytes())
+        f.write(np.asarray(reference_offsets, dtype='<u8').tobytes())
+        f.write(paths_blob)
+        with open(lines_path, 'rb') as blob:
+            shutil.copyfileobj(blob, f, 1 << 20)
+        f.writelines(references_blob)
+    os.remove(lines_path)
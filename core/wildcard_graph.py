@@ -0,0 +1,228 @@
+# core/wildcard_graph.py
+
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+from core.wildcard_template import (
+    compile_template, place_tags, Literal, Composite, WildcardReference, MODE_RANDOM
+)
+
+# 미리 펼친 확장 결과: (제자리에 남는 태그, 뒤로 보낼 태그, 와일드카드 히스토리 [(이름, 줄)], 필요한 깊이)
+# 필요한 깊이는 참조 위치의 깊이에 더해지는, 재귀 확장 시 가장 깊은 깊이 검사까지의 거리입니다.
+# 참조 깊이 + 필요한 깊이가 MAX_DEPTH를 넘으면 재귀 확장과 같은 결과(깊이 제한으로 원문 유지)를 위해 사용하지 않습니다.
+Flattened = Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[Tuple[str, str], ...], int]
+
+_NO_REFERENCES: FrozenSet[str] = frozenset()
+
+
+def references_in(lines: List[str]) -> FrozenSet[str]:
+    """와일드카드 줄들이 참조하는 와일드카드 이름 (<name>, <*name>, <$master:name>, __name__)"""
+    text = '\n'.join(lines)
+    if '<' not in text and '__' not in text:
+        return _NO_REFERENCES
+    names = set()
+    for line in lines:
+        if '<' in line or '__' in line:
+            compile_template(line).collect_references(names)
+    return frozenset(names)
+
+
+class WildcardGraph:
+    """
+    [신규] 와일드카드 파일 간 참조 그래프.
+
+    - 와일드카드를 불러올 때(지연 로드 모드에서는 시작할 때 캐시의 참조 목록으로) 참조 관계를 기록하고,
+      순환 참조(강한 연결 요소)는 새로 생길 때 한 번만 알립니다.
+    - 결과가 항상 같은 와일드카드(한 줄짜리이고, 그 줄이 정적이거나 같은 성질의 와일드카드만 참조)는
+      처음 사용할 때 끝까지 펼친 결과를 계산해 두고, 확장 시 재귀 없이 그대로 적용합니다.
+      와일드카드가 바뀌면 그것을 (간접적으로) 참조하는 와일드카드의 펼친 결과만 무효화합니다.
+    """
+
+    def __init__(self):
+        self._edges: Dict[str, FrozenSet[str]] = {} # 알려진 와일드카드 → 참조하는 이름
+        self._dependents: Dict[str, Set[str]] = {} # 이름 → 그 이름을 참조하는 와일드카드 (없는 이름 포함)
+        self._single_lines: Dict[str, str] = {} # 한 줄짜리 와일드카드 → 그 줄
+        self._flattened: Dict[str, Optional[Flattened]] = {}
+        self._cyclic: Set[str] = set()
+        self._cycles_dirty = False
+        self._reported: Set[FrozenSet[str]] = set()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._edges
+
+    # --- 갱신 ---
+    def update(self, name: str, lines: List[str]):
+        """와일드카드 하나의 내용(가중치 접두사를 뗀 줄)을 반영합니다."""
+        self._invalidate(name)
+        if len(lines) == 1:
+            self._single_lines[name] = lines[0]
+        else:
+            self._single_lines.pop(name, None)
+        self._set_edges(name, references_in(lines))
+
+    def set_references(self, name: str, references: FrozenSet[str]):
+        """[신규] 내용을 읽지 않은 와일드카드의 참조 관계만 반영합니다. (줄 내용은 처음 읽을 때 update로 반영)"""
+        self._invalidate(name)
+        self._single_lines.pop(name, None)
+        self._set_edges(name, frozenset(references))
+
+    def references(self, name: str) -> Optional[FrozenSet[str]]:
+        """[신규] 와일드카드가 참조하는 이름. 그래프에 없는 와일드카드면 None"""
+        return self._edges.get(name)
+
+    def remove(self, name: str):
+        if name not in self._edges:
+            return
+        self._invalidate(name)
+        self._single_lines.pop(name, None)
+        self._set_edges(name, _NO_REFERENCES)
+        del self._edges[name]
+
+    def _set_edges(self, name: str, references: FrozenSet[str]):
+        old = self._edges.get(name, _NO_REFERENCES)
+        self._edges[name] = references
+        if references == old:
+            return
+        for target in old - references:
+            dependents = self._dependents.get(target)
+            if dependents is not None:
+                dependents.discard(name)
+                if not dependents:
+                    del self._dependents[target]
+        for target in references - old:
+            self._dependents.setdefault(target, set()).add(name)
+        self._cycles_dirty = True
+
+    def _invalidate(self, name: str):
+        """name과 name을 (간접적으로) 참조하는 와일드카드의 펼친 결과를 지웁니다."""
+        stack = [name]
+        visited = set()
+        while stack:
+            current = stack.pop()
+            if current in visited:
+                continue
+            visited.add(current)
+            self._flattened.pop(current, None)
+            stack.extend(self._dependents.get(current, ()))
+
+    # --- 순환 참조 ---
+    def _find_cycles(self) -> List[List[str]]:
+        """순환을 이루는 강한 연결 요소 목록 (Tarjan, 반복 구현). 자기 자신을 참조하는 와일드카드 포함"""
+        index, lowlink, on_stack = {}, {}, set()
+        stack, cycles = [], []
+        counter = 0
+        for root in self._edges:
+            if root in index:
+                continue
+            work = [(root, iter(self._edges[root]))]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, targets = work[-1]
+                advanced = False
+                for target in targets:
+                    if target not in self._edges:
+                        continue # 없는 와일드카드 참조
+                    if target not in index:
+                        index[target] = lowlink[target] = counter
+                        counter += 1
+                        stack.append(target)
+                        on_stack.add(target)
+                        work.append((target, iter(self._edges[target])))
+                        advanced = True
+                        break
+                    if target in on_stack:
+                        lowlink[node] = min(lowlink[node], index[target])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in self._edges[node]:
+                        cycles.append(sorted(component))
+        return cycles
+
+    def _refresh_cycles(self) -> List[List[str]]:
+        cycles = self._find_cycles()
+        self._cyclic = {name for cycle in cycles for name in cycle}
+        self._cycles_dirty = False
+        self._flattened.clear()
+        return cycles
+
+    def report_cycles(self) -> List[List[str]]:
+        """참조 관계가 바뀌었으면 순환 참조를 다시 찾고, 처음 발견된 순환만 출력합니다. 현재 순환 목록을 반환합니다."""
+        if not self._cycles_dirty:
+            return [cycle for cycle in map(sorted, self._reported)]
+        cycles = self._refresh_cycles()
+        current = {frozenset(cycle) for cycle in cycles}
+        for cycle in cycles:
+            if frozenset(cycle) not in self._reported:
+                print(f"⚠️ 와일드카드 순환 참조: {' ↔ '.join(cycle)} (최대 깊이에서 원문이 그대로 남을 수 있습니다)")
+        self._reported = current
+        return cycles
+
+    # --- 미리 펼치기 ---
+    def flattened(self, name: str) -> Optional[Flattened]:
+        """결과가 항상 같은 와일드카드의 펼친 결과. 무작위 선택이나 순차/종속 참조가 섞여 있으면 None"""
+        result = self._flattened.get(name, False)
+        if result is not False:
+            return result
+        if self._cycles_dirty:
+            self.report_cycles()
+        return self._flatten(name)
+
+    def _flatten(self, name: str) -> Optional[Flattened]:
+        if name in self._flattened:
+            return self._flattened[name]
+        result = None
+        line = self._single_lines.get(name)
+        if line is not None and name not in self._cyclic:
+            resolved = self._resolve(compile_template(line))
+            if resolved is not None:
+                tags, appended, history, depth = resolved
+                placed, own_appended = place_tags(tags)
+                # 고른 줄은 참조보다 한 단계 깊게 확장됨 (정적인 줄은 깊이 검사 없음)
+                result = (tuple(placed), tuple(appended + own_appended), ((name, line),) + tuple(history), depth + 1)
+        self._flattened[name] = result
+        return result
+
+    def _resolve(self, template) -> Optional[Tuple[List[str], List[str], List[Tuple[str, str]], int]]:
+        """
+        템플릿을 무작위 선택 없이 끝까지 확장한 (태그, 뒤로 보낼 태그, 히스토리, 필요한 깊이). 불가능하면 None
+        필요한 깊이는 템플릿 자신의 깊이 검사를 0으로 본 가장 깊은 검사의 거리이며, 검사가 없는 정적 태그는 -1입니다.
+        """
+        kind = type(template)
+        if kind is Literal:
+            return [template.source], [], [], -1
+        if kind is WildcardReference:
+            if template.mode != MODE_RANDOM:
+                return None # 순차/종속 참조는 호출마다 상태가 바뀜
+            flattened = self._flatten(template.name)
+            if flattened is None:
+                return None
+            placed, appended, history, depth = flattened
+            return list(placed), list(appended), list(history), depth
+        if kind is Composite:
+            pieces, appended, history, depth = [], [], [], 0
+            for part in template.parts:
+                if type(part) is str:
+                    pieces.append(part)
+                    continue
+                resolved = self._resolve(part)
+                if resolved is None:
+                    return None
+                pieces.append(', '.join(resolved[0]))
+                appended.extend(resolved[1])
+                history.extend(resolved[2])
+                depth = max(depth, resolved[3] + 1)
+            return [', '.join(pieces)], appended, history, depth
+        return None # 인라인 선택 (무작위)
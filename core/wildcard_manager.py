@@ -1,50 +1,428 @@
 # core/wildcard_manager.py
 
 import os
+import time
+from collections import OrderedDict
 from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+from core.wildcard_name_index import WildcardNameIndex
+from core.wildcard_cache import WildcardCache, read_wildcard_cache, write_wildcard_cache, DEFAULT_WILDCARD_CACHE_PATH
+from core.weighted_lines import AliasTable, parse_weighted_lines
+from core.wildcard_graph import WildcardGraph, references_in
 
 class WildcardManager:
-    def __init__(self):
+    def __init__(self, cache_path: str = DEFAULT_WILDCARD_CACHE_PATH, lazy: bool = False, max_resident: int = 256):
+        """
+        lazy=True이면 시작 시 이름 인덱스만 구성하고, 와일드카드 내용은 처음 참조될 때(get_lines) 캐시 또는 파일에서 읽습니다.
+        이때 wildcard_dict_tree는 최근 사용한 와일드카드 최대 max_resident개만 보관하는 LRU입니다.
+        """
         self.wildcards_dir = os.path.join(os.getcwd(), 'wildcards')
-        self.wildcard_dict_tree = {}
+        self.lazy = lazy
+        self.max_resident = max_resident
+        self.wildcard_dict_tree = OrderedDict() if lazy else {}
+        # [신규] 와일드카드 이름 자동완성용 경로 트라이 (파일 단위로 증분 갱신)
+        self.name_index = WildcardNameIndex()
+        # [신규] 시작 시간 단축용 바이너리 캐시와 파일 목록 (상대 경로 → (크기, 수정 시각 ns), 빈 파일 포함)
+        self.cache_path = cache_path
+        self._file_stats: Dict[str, Tuple[int, int]] = {}
+        self._cache_dirty = False
+        # [신규] 지연 로드 모드에서 열어 두는 캐시와, 캐시 내용이 유효한 파일의 캐시 내 번호
+        self._cache: Optional[WildcardCache] = None
+        self._cached_index: Dict[str, int] = {}
+        # [신규] 가중치 줄('5::red dress')이 있는 와일드카드: 이름 → (파일의 원래 줄 목록, 별칭 테이블)
+        # wildcard_dict_tree에는 가중치 접두사를 뗀 줄이 들어감
+        self._weighted: Dict[str, Tuple[List[str], AliasTable]] = {}
+        # [신규] 와일드카드 간 참조 그래프 (순환 참조 검사, 결과가 고정된 와일드카드 미리 펼치기)
+        # [수정] 지연 로드 모드에서도 시작할 때 캐시의 참조 목록으로 모든 와일드카드를 포함하며, 메모리에서 내려도 유지됨
+        self.graph = WildcardGraph()
+        # [신규] 태그 코퍼스 검색으로 만든 동적 와일드카드: 이름 → 줄 목록 (같은 이름의 .txt 파일이 있으면 파일이 우선)
+        self._dynamic: Dict[str, List[str]] = {}
         self.activate_wildcards()
 
+    @property
+    def wildcard_count(self) -> int:
+        """[신규] 사용 가능한 와일드카드 수 (지연 로드 모드에서도 메모리에 올라온 수가 아닌 전체 수)"""
+        return len(self.name_index)
+
+    def get_lines(self, wildcard_name: str) -> Optional[List[str]]:
+        """
+        [신규] 와일드카드의 줄 목록. 지연 로드 모드에서는 처음 참조할 때 캐시(해당 파일 구간만) 또는 파일에서 읽고,
+        메모리에 남기는 와일드카드 수가 max_resident를 넘으면 가장 오래 사용하지 않은 것부터 내립니다.
+        """
+        lines = self.wildcard_dict_tree.get(wildcard_name)
+        if lines is not None:
+            if self.lazy:
+                self.wildcard_dict_tree.move_to_end(wildcard_name)
+            return lines
+        if not self.lazy or wildcard_name not in self.name_index:
+            return None
+
+        relative_path = wildcard_name + '.txt'
+        index = self._cached_index.get(relative_path)
+        if wildcard_name in self._dynamic and relative_path not in self._file_stats:
+            lines = self._dynamic[wildcard_name]
+        elif index is not None and self._cache is not None:
+            lines = self._cache.lines(index)
+        else:
+            lines = self._reload_file(os.path.join(self.wildcards_dir, relative_path))
+        if not lines:
+            self.remove_wildcard(wildcard_name)
+            return None
+        self.set_wildcard(wildcard_name, lines)
+        return self.wildcard_dict_tree.get(wildcard_name)
+
+    def get_alias_table(self, wildcard_name: str) -> Optional[AliasTable]:
+        """[신규] 가중치 와일드카드의 별칭 테이블 (get_lines 이후에 호출). 가중치가 없으면 None (균등 선택)"""
+        entry = self._weighted.get(wildcard_name)
+        return entry[1] if entry is not None else None
+
+    def _raw_lines(self, wildcard_name: str) -> Optional[List[str]]:
+        """메모리에 있는 와일드카드의 파일 원래 줄 목록 (가중치 접두사 포함, 캐시 저장/변경 비교용)"""
+        entry = self._weighted.get(wildcard_name)
+        return entry[0] if entry is not None else self.wildcard_dict_tree.get(wildcard_name)
+
     def activate_wildcards(self):
         """
-        [수정됨] os.walk를 사용하여 모든 하위 폴더를 재귀적으로 탐색하고
-        와일드카드 딕셔너리를 구축합니다.
+        [수정됨] 모든 하위 폴더를 재귀적으로 탐색하고 와일드카드 딕셔너리를 구축합니다.
+        [수정] 이름 인덱스는 다시 만들지 않고 추가/삭제/변경된 와일드카드만 반영합니다.
+        [수정] 파일 크기/수정 시각이 캐시와 같은 파일은 캐시에서 한 번에 불러오고, 바뀐 파일만 다시 읽습니다.
         """
         if not os.path.exists(self.wildcards_dir):
             os.makedirs(self.wildcards_dir)
             print(f"📁 와일드카드 디렉토리 생성: {self.wildcards_dir}")
 
-        self.wildcard_dict_tree.clear() # 매번 새로고침을 위해 초기화
-
-        # os.walk로 wildcards_dir의 모든 파일과 폴더를 순회합니다.
-        for root, dirs, files in os.walk(self.wildcards_dir):
-            for file in files:
-                if file.endswith('.txt'):
-                    file_path = os.path.join(root, file)
-                    
-                    # wildcards_dir를 기준으로 상대 경로를 계산합니다.
-                    # 예: 'wildcards/characters/outfit.txt' -> 'characters/outfit.txt'
-                    relative_path = os.path.relpath(file_path, self.wildcards_dir)
-                    
-                    # 와일드카드 이름 생성 (확장자 제거 및 경로 구분자 통일)
-                    # 예: 'characters\\outfit.txt' -> 'characters/outfit'
-                    wildcard_name = Path(relative_path).with_suffix('').as_posix()
-                    
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            # 비어있지 않은 라인만 리스트에 추가
-                            lines = [line.strip() for line in f if line.strip()]
-                        
-                        if lines:
-                            self.wildcard_dict_tree[wildcard_name] = lines
-                        else:
-                            print(f"⚠️ 와일드카드 파일이 비어있습니다: {file_path}")
-                            
-                    except Exception as e:
-                        print(f"❌ 와일드카드 파일 읽기 오류 {file_path}: {e}")
-
-        print(f"✅ {len(self.wildcard_dict_tree)} 개의 와일드카드 로드 완료.")
\ No newline at end of file
+        start = time.perf_counter()
+        stats = self._scan_files()
+        if self.lazy:
+            self._activate_lazy(stats)
+            self._restore_dynamic(self._dynamic)
+            self.graph.report_cycles()
+            print(f"✅ {self.wildcard_count} 개의 와일드카드 색인 완료. (지연 로드, 캐시 {len(self._cached_index)}개, "
+                  f"{time.perf_counter() - start:.2f}s)")
+            return
+        cached = read_wildcard_cache(self.cache_path)
+
+        loaded = set()
+        reread = 0
+        for relative_path, stat in stats.items():
+            entry = cached.get(relative_path)
+            if entry is not None and entry[:2] == stat:
+                lines = entry[2]
+            else:
+                lines = self._read_wildcard_file(os.path.join(self.wildcards_dir, relative_path)) or []
+                reread += 1
+            self._file_stats[relative_path] = stat
+            if lines:
+                wildcard_name = self._name_for_relative_path(relative_path)
+                self.set_wildcard(wildcard_name, lines)
+                loaded.add(wildcard_name)
+
+        # 매번 새로고침을 위해 사라진 와일드카드 제거
+        for relative_path in [path for path in self._file_stats if path not in stats]:
+            del self._file_stats[relative_path]
+        for wildcard_name in [name for name in self.wildcard_dict_tree if name not in loaded and name not in self._dynamic]:
+            self.remove_wildcard(wildcard_name)
+        self._restore_dynamic(self._dynamic)
+
+        if reread or len(cached) != len(stats):
+            self._cache_dirty = True
+            self.save_cache()
+        self.graph.report_cycles()
+
+        elapsed = time.perf_counter() - start
+        print(f"✅ {len(self.wildcard_dict_tree)} 개의 와일드카드 로드 완료. "
+              f"(캐시 {len(stats) - reread}개, 다시 읽음 {reread}개, {elapsed:.2f}s)")
+
+    def _activate_lazy(self, stats: Dict[str, Tuple[int, int]]):
+        """
+        [신규] 내용을 읽지 않고 이름 인덱스만 구성합니다. 줄 수는 캐시에서 가져오며, 캐시에 없는 파일은 읽을 때 갱신됩니다.
+        [수정] 참조 그래프는 캐시의 참조 목록(캐시에 없는 파일은 참조만 추출)으로 모든 와일드카드에 대해 구성합니다.
+        """
+        self._reopen_cache(stats)
+        for relative_path, stat in stats.items():
+            wildcard_name = self._name_for_relative_path(relative_path)
+            index = self._cached_index.get(relative_path)
+            if self._file_stats.get(relative_path) != stat:
+                self.wildcard_dict_tree.pop(wildcard_name, None) # 바뀐 파일의 메모리 내용은 버림
+                self.graph.set_references(wildcard_name, self._file_references(relative_path, index))
+            self._file_stats[relative_path] = stat
+
+            if index is None:
+                self._cache_dirty = True
+                if wildcard_name not in self.name_index:
+                    self.name_index.set(wildcard_name, 0) # 줄 수는 처음 읽을 때 갱신
+            elif self._cache.line_count(index) > 0:
+                self.name_index.set(wildcard_name, self._cache.line_count(index))
+            elif wildcard_name in self.name_index:
+                self.remove_wildcard(wildcard_name) # 빈 파일
+
+        for relative_path in [path for path in self._file_stats if path not in stats]:
+            del self._file_stats[relative_path]
+            self.remove_wildcard(self._name_for_relative_path(relative_path))
+            self._cache_dirty = True
+
+    def _file_references(self, relative_path: str, index: Optional[int]) -> FrozenSet[str]:
+        """[신규] 파일이 참조하는 와일드카드 이름. 캐시에 있으면 캐시의 참조 목록을, 없으면 파일을 읽어 참조만 추출합니다."""
+        if index is not None and self._cache is not None:
+            return self._cache.references(index)
+        lines = self._read_wildcard_file(os.path.join(self.wildcards_dir, relative_path))
+        return references_in(parse_weighted_lines(lines)[0]) if lines else frozenset()
+
+    def _reopen_cache(self, stats: Dict[str, Tuple[int, int]]):
+        """캐시를 다시 열고, 주어진 파일 목록과 크기/수정 시각이 같은 항목만 캐시 내용을 사용하도록 표시합니다."""
+        if self._cache is not None:
+            self._cache.close()
+        self._cache = WildcardCache.open(self.cache_path)
+        self._cached_index = {}
+        if self._cache is None:
+            return
+        for relative_path, stat in stats.items():
+            entry = self._cache.entry(relative_path)
+            if entry is not None and entry[:2] == stat:
+                self._cached_index[relative_path] = entry[2]
+
+    def _scan_files(self) -> Dict[str, Tuple[int, int]]:
+        """와일드카드 폴더의 모든 .txt 파일의 (크기, 수정 시각 ns)를 내용을 읽지 않고 수집합니다."""
+        stats = {}
+        # (폴더 경로, 와일드카드 폴더 기준 상대 경로 접두사) - 파일마다 relpath를 계산하지 않도록 접두사를 이어 붙임
+        directories = [(self.wildcards_dir, '')]
+        while directories:
+            directory, prefix = directories.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            directories.append((entry.path, f"{prefix}{entry.name}/"))
+                        elif entry.name.endswith('.txt') and entry.is_file():
+                            stat = entry.stat()
+                            stats[prefix + entry.name] = (stat.st_size, stat.st_mtime_ns)
+            except OSError as e:
+                print(f"❌ 와일드카드 폴더 탐색 오류 {directory}: {e}")
+        return stats
+
+    def save_cache(self):
+        """
+        [신규] 변경 사항이 있으면 현재 와일드카드 내용을 캐시 파일에 저장합니다.
+        지연 로드 모드에서는 메모리에 없는 와일드카드를 기존 캐시 또는 파일에서 하나씩 읽어 흘려 씁니다.
+        """
+        if not self._cache_dirty:
+            return
+
+        def entries():
+            for relative_path in sorted(self._file_stats):
+                size, mtime = self._file_stats[relative_path]
+                wildcard_name = self._name_for_relative_path(relative_path)
+                lines = self._raw_lines(wildcard_name)
+                references = self.graph.references(wildcard_name)
+                if lines is None and self.lazy:
+                    index = self._cached_index.get(relative_path)
+                    if index is not None and self._cache is not None:
+                        lines = self._cache.lines(index)
+                        references = self._cache.references(index)
+                    else:
+                        lines = self._read_wildcard_file(os.path.join(self.wildcards_dir, relative_path))
+                        references = None
+                if references is None:
+                    references = references_in(parse_weighted_lines(lines)[0]) if lines else frozenset()
+                yield relative_path, size, mtime, lines or [], references
+
+        temp_path = f"{self.cache_path}.tmp"
+        try:
+            write_wildcard_cache(temp_path, entries())
+            # 열려 있는 캐시를 닫아야 교체할 수 있음 (Windows)
+            if self._cache is not None:
+                self._cache.close()
+                self._cache = None
+            os.replace(temp_path, self.cache_path)
+            self._cache_dirty = False
+        except OSError as e:
+            print(f"⚠️ 와일드카드 캐시 저장 실패: {e}")
+        if self.lazy:
+            self._reopen_cache(self._file_stats)
+
+    def _relative_path(self, file_path: str) -> str:
+        return Path(os.path.relpath(file_path, self.wildcards_dir)).as_posix()
+
+    @staticmethod
+    def _name_for_relative_path(relative_path: str) -> str:
+        """'characters/outfit.txt' -> 'characters/outfit'"""
+        return relative_path[:-4] if relative_path.endswith('.txt') else relative_path
+
+    def wildcard_name_for(self, file_path: str) -> str:
+        """
+        파일 경로를 와일드카드 이름으로 변환합니다.
+        예: 'wildcards/characters/outfit.txt' -> 'characters/outfit'
+        """
+        # wildcards_dir를 기준으로 상대 경로를 계산하고, 확장자 제거 및 경로 구분자 통일
+        return self._name_for_relative_path(self._relative_path(file_path))
+
+    def _read_wildcard_file(self, file_path: str) -> Optional[List[str]]:
+        """비어있지 않은 라인 목록을 읽습니다. 비어있거나 읽을 수 없으면 None"""
+        try:
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                # 비어있지 않은 라인만 리스트에 추가
+                lines = [line.strip() for line in f if line.strip()]
+        except Exception as e:
+            print(f"❌ 와일드카드 파일 읽기 오류 {file_path}: {e}")
+            return None
+
+        if not lines:
+            print(f"⚠️ 와일드카드 파일이 비어있습니다: {file_path}")
+            return None
+        return lines
+
+    def set_wildcard(self, wildcard_name: str, lines: List[str]):
+        """
+        [신규] 와일드카드 하나를 추가하거나 내용을 교체합니다.
+        [수정] lines는 파일의 줄 그대로이며, 가중치 접두사가 있으면 떼어 내고 별칭 테이블을 만듭니다.
+        """
+        choices, weights = parse_weighted_lines(lines)
+        if weights is None:
+            self._weighted.pop(wildcard_name, None)
+        elif choices:
+            self._weighted[wildcard_name] = (lines, AliasTable(weights))
+        else:
+            self._weighted.pop(wildcard_name, None)
+            print(f"⚠️ 와일드카드 '{wildcard_name}'의 모든 줄의 가중치가 0입니다.")
+
+        self.wildcard_dict_tree[wildcard_name] = choices
+        self.graph.update(wildcard_name, choices)
+        if self.lazy:
+            self.wildcard_dict_tree.move_to_end(wildcard_name)
+            while len(self.wildcard_dict_tree) > self.max_resident:
+                evicted_name, _ = self.wildcard_dict_tree.popitem(last=False)
+                self._weighted.pop(evicted_name, None)
+        self.name_index.set(wildcard_name, len(choices))
+
+    def remove_wildcard(self, wildcard_name: str):
+        """[신규] 와일드카드 하나를 제거합니다."""
+        self.wildcard_dict_tree.pop(wildcard_name, None)
+        self._weighted.pop(wildcard_name, None)
+        self.graph.remove(wildcard_name)
+        self.name_index.remove(wildcard_name)
+
+    def set_dynamic_wildcards(self, resolved: Dict[str, List[str]]) -> List[str]:
+        """
+        [신규] 동적 와일드카드 목록 전체를 교체합니다. (이름 → 코퍼스 검색으로 만든 줄 목록)
+        같은 이름의 .txt 파일이 있으면 파일이 우선하며, 파일이 삭제되면 동적 와일드카드로 돌아갑니다.
+        변경된 와일드카드 이름 목록을 반환합니다.
+        """
+        changed = set()
+        for wildcard_name in [name for name in self._dynamic if not resolved.get(name)]:
+            del self._dynamic[wildcard_name]
+            if not self._is_file_backed(wildcard_name) and wildcard_name in self.name_index:
+                self.remove_wildcard(wildcard_name)
+                changed.add(wildcard_name)
+
+        for wildcard_name, lines in resolved.items():
+            if not lines:
+                print(f"⚠️ 동적 와일드카드 '{wildcard_name}'의 검색 결과가 없습니다.")
+                continue
+            if self._dynamic.get(wildcard_name) == lines:
+                continue
+            is_new = wildcard_name not in self._dynamic
+            self._dynamic[wildcard_name] = lines
+            if self._is_file_backed(wildcard_name):
+                if is_new:
+                    print(f"⚠️ 동적 와일드카드 '{wildcard_name}'와 같은 이름의 .txt 파일이 있어 파일을 사용합니다.")
+                continue
+            self.set_wildcard(wildcard_name, lines)
+            changed.add(wildcard_name)
+
+        if changed:
+            self.graph.report_cycles()
+        return sorted(changed)
+
+    def _is_file_backed(self, wildcard_name: str) -> bool:
+        return wildcard_name + '.txt' in self._file_stats
+
+    def _restore_dynamic(self, names: Iterable[str]) -> List[str]:
+        """같은 이름의 파일이 사라진 동적 와일드카드를 다시 적용합니다. 다시 적용한 이름 목록을 반환합니다."""
+        restored = []
+        for wildcard_name in list(names):
+            lines = self._dynamic.get(wildcard_name)
+            if lines is None or self._is_file_backed(wildcard_name):
+                continue
+            if wildcard_name not in self.name_index or self.wildcard_dict_tree.get(wildcard_name, lines) != lines:
+                self.set_wildcard(wildcard_name, lines)
+                restored.append(wildcard_name)
+        return restored
+
+    def _reload_file(self, file_path: str) -> Optional[List[str]]:
+        """파일 하나를 다시 읽고 파일 목록(캐시 매니페스트)을 갱신합니다."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        relative_path = self._relative_path(file_path)
+        self._file_stats[relative_path] = (stat.st_size, stat.st_mtime_ns)
+        self._cached_index.pop(relative_path, None)
+        self._cache_dirty = True
+        return self._read_wildcard_file(file_path)
+
+    def _forget_files(self, relative_paths: Iterable[str]):
+        for relative_path in list(relative_paths):
+            self._cached_index.pop(relative_path, None)
+            if self._file_stats.pop(relative_path, None) is not None:
+                self._cache_dirty = True
+
+    def apply_changes(self, paths: Iterable[str]) -> List[str]:
+        """
+        [신규] 변경된 파일/폴더 경로들만 다시 읽어 반영합니다. (파일 감시용, 전체 재탐색 없음)
+        - 존재하는 .txt 파일: 다시 읽음 (비어있으면 제거)
+        - 존재하는 폴더: 폴더 안의 와일드카드만 다시 탐색 (폴더 생성/이동)
+        - 존재하지 않는 경로: 해당 와일드카드와, 폴더였다면 그 아래의 와일드카드를 모두 제거
+        변경된 와일드카드 이름 목록을 반환합니다.
+        """
+        changed = set()
+        for path in paths:
+            relative_path = self._relative_path(path)
+            if relative_path.startswith('..'):
+                continue # 와일드카드 폴더 밖의 경로
+            wildcard_name = self._name_for_relative_path(relative_path)
+
+            if os.path.isdir(path):
+                found = set()
+                for root, dirs, files in os.walk(path):
+                    for file in files:
+                        if file.endswith('.txt'):
+                            file_path = os.path.join(root, file)
+                            found.add(self._relative_path(file_path))
+                            name = self.wildcard_name_for(file_path)
+                            lines = self._reload_file(file_path)
+                            if lines and self._raw_lines(name) != lines:
+                                self.set_wildcard(name, lines)
+                                changed.add(name)
+                            elif not lines and name in self.name_index:
+                                self.remove_wildcard(name)
+                                changed.add(name)
+                prefix = '' if relative_path == '.' else relative_path.rstrip('/') + '/'
+                stale = [p for p in self._file_stats if p.startswith(prefix) and p not in found]
+            elif os.path.isfile(path):
+                if not path.endswith('.txt'):
+                    continue
+                lines = self._reload_file(path)
+                if lines:
+                    if self._raw_lines(wildcard_name) != lines:
+                        self.set_wildcard(wildcard_name, lines)
+                        changed.add(wildcard_name)
+                    continue
+                stale = []
+                if wildcard_name in self.name_index:
+                    self.remove_wildcard(wildcard_name)
+                    changed.add(wildcard_name)
+            else:
+                # 삭제되었거나 다른 곳으로 이동한 경로 (파일이었는지 폴더였는지 알 수 없으므로 둘 다 확인)
+                folder = relative_path + '/'
+                stale = [p for p in self._file_stats if p.startswith(folder) or p == relative_path]
+
+            self._forget_files(stale)
+            for name in map(self._name_for_relative_path, stale):
+                if name in self.name_index:
+                    self.remove_wildcard(name)
+                    changed.add(name)
+
+        self._restore_dynamic(changed)
+        if changed:
+            self.graph.report_cycles()
+        return sorted(changed)
@@ -0,0 +1,181 @@
+# core/wildcard_name_index.py
+
+import heapq
+import threading
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+
+
+class _PathNode:
+    """경로 세그먼트 하나에 해당하는 트라이 노드"""
+    __slots__ = ('segment', 'parent', 'children', 'name', 'size', 'top')
+
+    def __init__(self, segment: str, parent: Optional['_PathNode']):
+        self.segment = segment
+        self.parent = parent
+        self.children: Dict[str, '_PathNode'] = {}
+        self.name = None # 이 경로에서 끝나는 와일드카드 이름 (없으면 None)
+        self.size = 0 # 와일드카드의 줄 수 (자동완성 점수)
+        self.top = None # 하위 트리의 상위 K개 [(-줄 수, 이름)] 캐시 (None이면 다시 계산 필요)
+
+
+class WildcardNameIndex:
+    """
+    와일드카드 이름 자동완성용 경로 트라이.
+
+    'characters/outfit/casual' 같은 이름을 '/' 세그먼트 단위 트리로 보관하고, 각 노드에 하위 트리의
+    상위 K개(줄 수 내림차순)를 캐시합니다. 모든 세그먼트 문자열은 정렬된 목록으로 따로 유지하여
+    어떤 세그먼트의 접두사로도 검색할 수 있습니다. ('out' → 'characters/outfit/...')
+    파일 추가/삭제/변경 시에는 해당 경로의 노드와 조상 노드의 캐시만 갱신합니다.
+    자동완성 워커 스레드에서 조회하므로 모든 연산은 잠금으로 보호합니다.
+    """
+
+    def __init__(self, top_k: int = 40):
+        self.top_k = top_k
+        self._root = _PathNode('', None)
+        self._sizes: Dict[str, int] = {}
+        self._segment_nodes: Dict[str, set] = {} # 소문자 세그먼트 → 해당 세그먼트의 노드들
+        self._sorted_segments: List[str] = []
+        self._segment_tops: Dict[str, list] = {} # 세그먼트별(같은 이름의 노드 전체) 상위 K개 캐시
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sizes
+
+    # --- 갱신 ---
+    def set(self, name: str, size: int):
+        """와일드카드를 추가하거나 줄 수를 갱신합니다."""
+        with self._lock:
+            if self._sizes.get(name) == size:
+                return
+            node = self._root
+            for segment in name.split('/'):
+                child = node.children.get(segment)
+                if child is None:
+                    child = _PathNode(segment, node)
+                    node.children[segment] = child
+                    self._register_segment(child)
+                node = child
+            node.name = name
+            node.size = size
+            self._sizes[name] = size
+            self._invalidate(node)
+
+    def remove(self, name: str):
+        """와일드카드를 제거합니다. 비게 된 노드는 트리에서 정리합니다."""
+        with self._lock:
+            if self._sizes.pop(name, None) is None:
+                return
+            node = self._find_node(name.split('/'))
+            node.name = None
+            node.size = 0
+            self._invalidate(node)
+            while node is not self._root and node.name is None and not node.children:
+                parent = node.parent
+                del parent.children[node.segment]
+                self._unregister_segment(node)
+                node = parent
+
+    def clear(self):
+        with self._lock:
+            self._root = _PathNode('', None)
+            self._sizes.clear()
+            self._segment_nodes.clear()
+            self._sorted_segments.clear()
+            self._segment_tops.clear()
+
+    def _register_segment(self, node: _PathNode):
+        key = node.segment.lower()
+        nodes = self._segment_nodes.get(key)
+        if nodes is None:
+            nodes = self._segment_nodes[key] = set()
+            insort(self._sorted_segments, key)
+        nodes.add(node)
+
+    def _unregister_segment(self, node: _PathNode):
+        key = node.segment.lower()
+        nodes = self._segment_nodes[key]
+        nodes.discard(node)
+        self._segment_tops.pop(key, None)
+        if not nodes:
+            del self._segment_nodes[key]
+            del self._sorted_segments[bisect_left(self._sorted_segments, key)]
+
+    def _invalidate(self, node: _PathNode):
+        """노드와 조상 노드(및 해당 세그먼트)의 상위 K개 캐시를 무효화합니다."""
+        while node is not None:
+            node.top = None
+            self._segment_tops.pop(node.segment.lower(), None)
+            node = node.parent
+
+    def _find_node(self, segments: List[str]) -> Optional[_PathNode]:
+        node = self._root
+        for segment in segments:
+            node = node.children.get(segment)
+            if node is None:
+                return None
+        return node
+
+    # --- 조회 ---
+    def _top(self, node: _PathNode) -> list:
+        """노드 하위 트리의 상위 K개 (캐시가 무효화된 노드만 자식 캐시를 병합하여 다시 계산)"""
+        if node.top is None:
+            candidates = [(-node.size, node.name)] if node.name is not None else []
+            for child in node.children.values():
+                candidates.extend(self._top(child))
+            node.top = heapq.nsmallest(self.top_k, candidates)
+        return node.top
+
+    def _segment_top(self, segment: str) -> list:
+        """같은 세그먼트를 가진 모든 노드의 상위 K개"""
+        top = self._segment_tops.get(segment)
+        if top is None:
+            top = heapq.nsmallest(self.top_k, set().union(*(self._top(node) for node in self._segment_nodes[segment])))
+            self._segment_tops[segment] = top
+        return top
+
+    def _match_tops(self, query: str) -> List[list]:
+        """
+        쿼리와 일치하는 노드들의 상위 K개 목록.
+        - 'out'           : 'out'으로 시작하는 모든 세그먼트 (세그먼트별 캐시 사용)
+        - 'chars/out'     : 'chars' 세그먼트 바로 아래에서 'out'으로 시작하는 세그먼트 (중간 세그먼트는 정확히 일치)
+        """
+        parts = query.lower().split('/')
+        if len(parts) == 1:
+            prefix = parts[0]
+            tops = []
+            start = bisect_left(self._sorted_segments, prefix)
+            for segment in islice(self._sorted_segments, start, None):
+                if not segment.startswith(prefix):
+                    break
+                tops.append(self._segment_top(segment))
+            return tops
+
+        current = list(self._segment_nodes.get(parts[0], ()))
+        for part in parts[1:-1]:
+            current = [child for node in current for child in node.children.values() if child.segment.lower() == part]
+        last = parts[-1]
+        return [self._top(child) for node in current for child in node.children.values() if child.segment.lower().startswith(last)]
+
+    def complete(self, query: str, limit: int = 40) -> List[Tuple[str, int]]:
+        """쿼리와 일치하는 와일드카드를 (이름, 줄 수) 목록으로 줄 수 내림차순 반환합니다."""
+        query = query.strip().strip('/')
+        with self._lock:
+            if not query:
+                return [(name, -negative) for negative, name in self._top(self._root)[:limit]]
+
+            # 각 노드의 상위 K개는 이미 정렬되어 있으므로 병합하며 중복(상위/하위 노드가 함께 일치)만 제거
+            merged = heapq.merge(*self._match_tops(query))
+            results, seen = [], set()
+            for negative, name in merged:
+                if name in seen:
+                    continue
+                seen.add(name)
+                results.append((name, -negative))
+                if len(results) >= limit:
+                    break
+            return results
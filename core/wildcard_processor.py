@@ -1,10 +1,31 @@
 # core/wildcard_processor.py
 
+import math
 import random
-import re
-from typing import List
+import zlib
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence
 from .prompt_context import PromptContext
 from .wildcard_manager import WildcardManager
+from .weighted_lines import AliasTable
+from .wildcard_template import (
+    compile_template, Composite, InlineChoice, WildcardReference, MODE_RANDOM, MODE_SEQUENTIAL, MODE_OBSERVER
+)
+
+# 조합 열거 모드에서 전체 진행 상황(n / 전체 조합 수)을 기록하는 wildcard_state 키
+COMBINATION_STATE_KEY = '전체 조합'
+
+
+@dataclass
+class ExpandedPrompt:
+    """[신규] 배치 확장 결과 하나 (PromptContext의 와일드카드 관련 결과만 담음)"""
+    tags: List[str]
+    # 프롬프트 뒤로 보낼 태그 (PromptContext.global_append_tags에 해당)
+    append_tags: List[str] = field(default_factory=list)
+    wildcard_history: Dict[str, List[str]] = field(default_factory=dict)
+    wildcard_state: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
 
 class WildcardProcessor:
     def __init__(self, wildcard_manager: WildcardManager):
@@ -14,73 +35,136 @@ class WildcardProcessor:
         """
         태그 리스트를 받아 리스트 내의 모든 와일드카드를 확장합니다.
         이것이 다른 모듈에서 호출할 기본 진입점(entry-point)이 됩니다.
+        [수정] 태그는 템플릿 트리로 한 번만 컴파일(문자열별 캐시)하고, 확장은 트리 평가로만 처리합니다.
         """
         expanded_list = []
         for tag in tag_list:
-            expanded_list.extend(self._expand_recursive(tag, context))
+            expanded_list.extend(compile_template(tag).expand(self, context, 0))
         return expanded_list
 
-    def _expand_recursive(self, tag: str, context: PromptContext, depth=0) -> List[str]:
-        """하나의 태그를 재귀적으로 확장합니다."""
-        if depth > 10: return [tag]
+    def expand_batch(self, tag_list: List[str], count: int, seed: Optional[int] = None,
+                     sequential_counters: Optional[Dict[str, int]] = None) -> List[ExpandedPrompt]:
+        """
+        [신규] 같은 태그 리스트를 count번 확장합니다. (자동 생성용 프롬프트 대기열을 미리 만들 때 사용)
+        무작위 선택은 와일드카드(및 인라인 선택지)별로 시드가 고정된 NumPy 난수 생성기에서 count개씩 한 번에
+        뽑아 두고 차례로 사용하므로, 같은 seed와 같은 와일드카드 내용이면 항상 같은 결과가 나옵니다.
+        순차/종속 와일드카드 카운터는 배치 전체에서 이어집니다. (sequential_counters를 넘기면 그 상태에서 이어감)
+        """
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy % (1 << 63))
+        sampler = _BatchSampler(self.wildcard_manager, count, seed)
+        counters = {} if sequential_counters is None else sequential_counters
 
-        if tag.startswith('<') and tag.endswith('>'):
-            wildcard_name = tag[1:-1]
-            
-            # 인라인 와일드카드 처리
-            if '|' in wildcard_name:
-                options = wildcard_name.split('|')
-                chosen_option = random.choice(options).strip()
-                return self._expand_recursive(chosen_option, context, depth + 1)
-
-            # 파일 기반 와일드카드 처리
-            line = self._get_wildcard_line(wildcard_name, context)
-            if line is None: return [tag]
-            
-            resolved_tags = self._expand_recursive(line, context, depth + 1)
-            
-            final_tags_in_place = []
-            for resolved_tag in resolved_tags:
-                sub_tags = [t.strip() for t in resolved_tag.split(',')]
-                tags_to_keep = [t[1:] for t in sub_tags if t.startswith('*')]
-                tags_to_append = [t for t in sub_tags if not t.startswith('*')]
-
-                if tags_to_keep:
-                    final_tags_in_place.extend(tags_to_keep)
-                    context.global_append_tags.extend(tags_to_append)
-                elif tags_to_append:
-                    final_tags_in_place.append(tags_to_append[0])
-                    context.global_append_tags.extend(tags_to_append[1:])
-            
-            return final_tags_in_place if final_tags_in_place else []
-        
-        # 복합 와일드카드 처리 (__...__)
-        if '__' in tag:
-            parts = re.split(r'(__.*?__)', tag)
-            result_parts = [
-                ', '.join(self._expand_recursive(f"<{p[2:-2]}>", context, depth + 1)) if p.startswith('__') else p
-                for p in parts if p
-            ]
-            return [', '.join(result_parts)]
-
-        return [tag]
-
-    def _get_wildcard_line(self, wildcard_name: str, context: PromptContext) -> str | None:
-        """WildcardManager에서 와일드카드 내용을 가져옵니다. 순차/종속 모드를 처리합니다."""
-        is_sequential = wildcard_name.startswith('*')
-        is_observer = wildcard_name.startswith('$')
-
-        if is_sequential:
-            wildcard_name = wildcard_name[1:]
-        elif is_observer:
-            try:
-                master_name, slave_name = wildcard_name[1:].split(':', 1)
-                wildcard_name = slave_name
-            except ValueError:
-                print(f"경고: 잘못된 종속 와일드카드 구문입니다: {wildcard_name}")
+        results = []
+        for _ in range(count):
+            context = PromptContext(source_row=None, settings={}, sequential_counters=counters)
+            tags = sampler.expand_tags(tag_list, context)
+            results.append(ExpandedPrompt(tags, context.global_append_tags, context.wildcard_history, context.wildcard_state))
+        return results
+
+    def enumerate_combinations(self, tag_list: List[str], shuffle: bool = False, seed: Optional[int] = None,
+                               start: int = 0, sequential_counters: Optional[Dict[str, int]] = None) -> Iterator[ExpandedPrompt]:
+        """
+        [신규] 태그 리스트에 직접 쓰인 무작위 와일드카드(<name>, __name__, <a|b>)를 축으로 하는 데카르트 곱의
+        모든 조합을 하나씩 생성합니다. (예: <outfit> x <pose> x <background>)
+        - 조합 번호는 혼합 기수(mixed-radix)로 각 축의 선택 번호에 대응하며, 첫 번째 축이 가장 느리게 바뀝니다.
+        - shuffle=True이면 조합 번호 공간의 무작위 순열(seed로 고정) 순서로 생성합니다. 전체 조합을 만들어 두지 않습니다.
+        - start부터 이어서 생성할 수 있으며, 진행 상황은 wildcard_state의 COMBINATION_STATE_KEY와 축별 n / 줄 수로 기록됩니다.
+        선택된 줄 안의 와일드카드와 순차/종속 와일드카드는 평소처럼 확장합니다. (무작위 선택은 seed로 재현)
+        """
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy % (1 << 63))
+        sampler = _BatchSampler(self.wildcard_manager, 1024, seed)
+        counters = {} if sequential_counters is None else sequential_counters
+
+        plan, axes = self._plan_combinations(tag_list)
+        radices = [len(options) for _, options in axes]
+        total = math.prod(radices)
+        order = _IndexPermutation(total, seed) if shuffle else None
+
+        for n in range(start, total):
+            index = order(n) if order is not None else n
+            digits = [0] * len(radices)
+            for axis in range(len(radices) - 1, -1, -1):
+                index, digits[axis] = divmod(index, radices[axis])
+
+            context = PromptContext(source_row=None, settings={}, sequential_counters=counters)
+            context.wildcard_state[COMBINATION_STATE_KEY] = {'current': n + 1, 'total': total}
+            tags = []
+            for template, slots in plan:
+                if slots is None:
+                    tags.extend(template.expand(sampler, context, 0))
+                elif type(template) is Composite:
+                    pieces = []
+                    for part, axis in slots:
+                        if type(part) is str:
+                            pieces.append(part)
+                        elif axis is None:
+                            pieces.append(', '.join(part.expand(sampler, context, 1)))
+                        else:
+                            pieces.append(', '.join(self._expand_axis(sampler, context, part, axes[axis][1], digits[axis], 1)))
+                    tags.append(', '.join(pieces))
+                else:
+                    axis = slots
+                    tags.extend(self._expand_axis(sampler, context, template, axes[axis][1], digits[axis], 0))
+            yield ExpandedPrompt(tags, context.global_append_tags, context.wildcard_history, context.wildcard_state)
+
+    def _plan_combinations(self, tag_list: List[str]):
+        """
+        태그별 (템플릿, 축 정보)와 축 목록 [(노드, 선택지)]을 만듭니다.
+        축 정보는 축이 아니면 None, 태그 자체가 축이면 축 번호, 복합 태그면 [(부분, 축 번호 또는 None)]입니다.
+        """
+        axes = []
+
+        def axis_for(node) -> Optional[int]:
+            if type(node) is InlineChoice:
+                axes.append((node, node.options))
+            elif type(node) is WildcardReference and node.mode == MODE_RANDOM:
+                lines = self.wildcard_manager.get_lines(node.name)
+                if not lines:
+                    return None # 없는 와일드카드는 평소처럼 확장 (경고 출력)
+                axes.append((node, lines))
+            else:
                 return None
-        
-        lines = self.wildcard_manager.wildcard_dict_tree.get(wildcard_name)
+            return len(axes) - 1
+
+        plan = []
+        for tag in tag_list:
+            template = compile_template(tag)
+            if type(template) is Composite:
+                slots = [(part, None if type(part) is str else axis_for(part)) for part in template.parts]
+                plan.append((template, slots if any(axis is not None for _, axis in slots) else None))
+            else:
+                plan.append((template, axis_for(template)))
+        return plan, axes
+
+    @staticmethod
+    def _expand_axis(processor: 'WildcardProcessor', context: PromptContext, node, options: Sequence,
+                     digit: int, depth: int) -> List[str]:
+        """조합 축의 digit번째 선택지를 확장합니다."""
+        if type(node) is InlineChoice:
+            return options[digit].expand(processor, context, depth + 1)
+        line = options[digit]
+        context.wildcard_history.setdefault(node.name, []).append(line)
+        context.wildcard_state[node.name] = {'current': digit + 1, 'total': len(options)}
+        return node.expand_line(processor, context, depth, line)
+
+    def _get_flattened(self, wildcard_name: str):
+        """[신규] 결과가 항상 같은 와일드카드의 미리 펼친 결과 (없으면 None, WildcardGraph 참고)"""
+        return self.wildcard_manager.graph.flattened(wildcard_name)
+
+    def _choose(self, key: str, options: Sequence, weights: Optional[AliasTable] = None):
+        """무작위 선택 (key: 와일드카드 이름 또는 인라인 선택지 원문, weights: 가중치 별칭 테이블)"""
+        if weights is None:
+            return random.choice(options)
+        return options[weights.sample()]
+
+    def _get_wildcard_line(self, reference: WildcardReference, context: PromptContext) -> str | None:
+        """WildcardManager에서 와일드카드 내용을 가져옵니다. 순차/종속 모드를 처리합니다."""
+        wildcard_name = reference.name
+
+        # [수정] 지연 로드 모드에서는 처음 참조할 때 읽음
+        lines = self.wildcard_manager.get_lines(wildcard_name)
         if not lines:
             print(f"경고: 와일드카드 '{wildcard_name}'을 찾을 수 없습니다.")
             return None
@@ -88,15 +172,15 @@ class WildcardProcessor:
         chosen_line = ""
         total_lines = len(lines)
         
-        if is_sequential:
+        if reference.mode == MODE_SEQUENTIAL:
             counter = context.sequential_counters.get(wildcard_name, 0)
             chosen_line = lines[counter % total_lines]
             context.sequential_counters[wildcard_name] = counter + 1
             # [상태 관찰] 순차 와일드카드 상태 기록
             context.wildcard_state[wildcard_name] = {'current': counter % total_lines + 1, 'total': total_lines}
 
-        elif is_observer:
-            master_counter = context.sequential_counters.get(master_name, 0)
+        elif reference.mode == MODE_OBSERVER:
+            master_counter = context.sequential_counters.get(reference.master, 0)
             # master가 한 번도 호출되지 않았다면, slave도 첫 번째를 반환
             # master 카운터는 이미 다음 호출을 위해 1 증가된 상태일 수 있으므로 -1
             current_master_index = (master_counter - 1) if master_counter > 0 else 0
@@ -107,7 +191,80 @@ class WildcardProcessor:
             context.wildcard_state[wildcard_name] = {'current': slave_index + 1, 'total': total_lines}
             
         else: # 일반 무작위 모드
-            chosen_line = random.choice(lines)
+            # [수정] 가중치 줄이 있는 와일드카드는 별칭 테이블로 O(1) 추출
+            chosen_line = self._choose(wildcard_name, lines, self.wildcard_manager.get_alias_table(wildcard_name))
         
         context.wildcard_history.setdefault(wildcard_name, []).append(chosen_line)
-        return chosen_line
\ No newline at end of file
+        return chosen_line
+
+
+class _BatchSampler(WildcardProcessor):
+    """
+    expand_batch 전용 처리기. 선택 대상(key)별로 독립된 난수 생성기를 두고 선택 번호를 한 번에 뽑아 둡니다.
+    key별 생성기는 (seed, key) 조합으로 시드를 정하므로 다른 와일드카드의 사용 여부와 무관하게 재현됩니다.
+    """
+
+    def __init__(self, wildcard_manager: WildcardManager, block_size: int, seed: int):
+        super().__init__(wildcard_manager)
+        self.block_size = max(1, block_size)
+        self.seed = seed
+        self._streams = {} # key → [생성기, 선택지 수, 미리 뽑은 번호 목록, 다음 위치]
+
+    def _choose(self, key: str, options: Sequence, weights: Optional[AliasTable] = None):
+        stream = self._streams.get(key)
+        if stream is None:
+            rng = np.random.default_rng([self.seed, zlib.crc32(key.encode('utf-8'))])
+            stream = self._streams[key] = [rng, None, [], 0]
+        rng, source, indexes, position = stream
+        # 균등 선택은 줄 수, 가중치 선택은 별칭 테이블 자체로 뽑아 둔 번호가 아직 유효한지 판단
+        current = len(options) if weights is None else weights
+        if source != current or position >= len(indexes):
+            # 처음 사용하거나, 미리 뽑은 번호를 다 썼거나, 와일드카드 내용이 바뀐 경우 한 블록을 새로 뽑음
+            stream[1] = current
+            if weights is None:
+                indexes = rng.integers(0, len(options), size=self.block_size).tolist()
+            else:
+                indexes = weights.sample_many(rng, self.block_size).tolist()
+            stream[2] = indexes
+            position = 0
+        stream[3] = position + 1
+        return options[indexes[position]]
+
+
+class _IndexPermutation:
+    """
+    [0, total) 범위의 무작위 순열을 목록 없이 계산하는 함수 객체.
+    2의 거듭제곱 크기 공간에서 시드로 고정된 Feistel 네트워크(전단사)를 적용하고, 범위를 벗어나면 다시 적용합니다.
+    (cycle-walking, 공간이 total의 4배 미만이므로 평균 몇 번 안에 범위 안으로 들어옴)
+    """
+    ROUNDS = 4
+    _MASK64 = (1 << 64) - 1
+
+    def __init__(self, total: int, seed: int):
+        self.total = total
+        bits = max(2, (max(total, 2) - 1).bit_length())
+        bits += bits % 2
+        self._half_bits = bits // 2
+        self._half_mask = (1 << self._half_bits) - 1
+        rng = np.random.default_rng(seed)
+        self._keys = [int(key) for key in rng.integers(0, 1 << 63, size=self.ROUNDS)]
+
+    @classmethod
+    def _mix(cls, x: int) -> int:
+        """splitmix64 마무리 단계 (64비트 정수 섞기)"""
+        x &= cls._MASK64
+        x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & cls._MASK64
+        x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & cls._MASK64
+        return x ^ (x >> 31)
+
+    def _permute(self, x: int) -> int:
+        left, right = x >> self._half_bits, x & self._half_mask
+        for key in self._keys:
+            left, right = right, left ^ (self._mix(right ^ key) & self._half_mask)
+        return (left << self._half_bits) | right
+
+    def __call__(self, index: int) -> int:
+        x = self._permute(index)
+        while x >= self.total:
+            x = self._permute(x)
+        return x
@@ -0,0 +1,174 @@
+# core/wildcard_template.py
+
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+# 이 깊이를 넘는 중첩(와일드카드가 서로를 참조하는 경우 등)은 원문 그대로 반환
+MAX_DEPTH = 10
+# 컴파일된 템플릿을 원문 문자열별로 보관할 최대 개수
+TEMPLATE_CACHE_SIZE = 1 << 16
+
+_COMPOSITE_PATTERN = re.compile(r'(__.*?__)')
+
+# 와일드카드 참조 방식
+MODE_RANDOM = 0
+MODE_SEQUENTIAL = 1 # <*name>
+MODE_OBSERVER = 2 # <$master:name>
+
+
+def place_tags(resolved_tags: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    와일드카드에서 뽑은 줄(확장 결과)을 제자리에 남길 태그와 프롬프트 뒤로 보낼 태그로 나눕니다.
+    '*'로 시작하는 태그가 있으면 그 태그들만 제자리에 남고, 없으면 첫 번째 태그만 제자리에 남습니다.
+    """
+    placed, appended = [], []
+    for resolved_tag in resolved_tags:
+        sub_tags = [t.strip() for t in resolved_tag.split(',')]
+        tags_to_keep = [t[1:] for t in sub_tags if t.startswith('*')]
+        tags_to_append = [t for t in sub_tags if not t.startswith('*')]
+
+        if tags_to_keep:
+            placed.extend(tags_to_keep)
+            appended.extend(tags_to_append)
+        elif tags_to_append:
+            placed.append(tags_to_append[0])
+            appended.extend(tags_to_append[1:])
+    return placed, appended
+
+
+class Literal:
+    """와일드카드 구문이 없는 태그 (그대로 반환)"""
+    __slots__ = ('source', '_placement')
+
+    def __init__(self, source: str):
+        self.source = source
+        self._placement = None # 와일드카드 줄로 쓰일 때의 place_tags 결과 (처음 사용할 때 계산)
+
+    def expand(self, processor, context, depth: int) -> List[str]:
+        return [self.source]
+
+    def collect_references(self, names: set):
+        pass
+
+    def placement(self) -> Tuple[List[str], List[str]]:
+        if self._placement is None:
+            self._placement = place_tags([self.source])
+        return self._placement
+
+
+class InlineChoice:
+    """<a|b|c> : 선택지 중 하나를 무작위로 골라 확장"""
+    __slots__ = ('source', 'options')
+
+    def __init__(self, source: str, options: Tuple):
+        self.source = source
+        self.options = options
+
+    def expand(self, processor, context, depth: int) -> List[str]:
+        if depth > MAX_DEPTH:
+            return [self.source]
+        return processor._choose(self.source, self.options).expand(processor, context, depth + 1)
+
+    def collect_references(self, names: set):
+        for option in self.options:
+            option.collect_references(names)
+
+
+class WildcardReference:
+    """<name>, <*name>, <$master:name> : 와일드카드 파일에서 줄 하나를 골라 확장"""
+    __slots__ = ('source', 'name', 'mode', 'master')
+
+    def __init__(self, source: str, name: str, mode: int = MODE_RANDOM, master: Optional[str] = None):
+        self.source = source
+        self.name = name
+        self.mode = mode
+        self.master = master
+
+    def expand(self, processor, context, depth: int) -> List[str]:
+        if depth > MAX_DEPTH:
+            return [self.source]
+        if self.mode == MODE_RANDOM:
+            # 결과가 항상 같은 와일드카드(한 줄짜리 등)는 미리 펼쳐 둔 결과를 재귀 없이 적용
+            # (펼친 체인이 깊이 제한에 걸리는 위치라면 재귀 확장으로 처리하여 제한 동작을 그대로 유지)
+            flattened = processor._get_flattened(self.name)
+            if flattened is not None and depth + flattened[3] <= MAX_DEPTH:
+                placed, appended, history, _ = flattened
+                for wildcard_name, line in history:
+                    context.wildcard_history.setdefault(wildcard_name, []).append(line)
+                context.global_append_tags.extend(appended)
+                return list(placed)
+
+        line = processor._get_wildcard_line(self, context)
+        if line is None:
+            return [self.source]
+        return self.expand_line(processor, context, depth, line)
+
+    def expand_line(self, processor, context, depth: int, line: str) -> List[str]:
+        """이 와일드카드에서 고른 줄을 확장하고, 태그를 제자리/뒤로 보낼 태그로 나눕니다."""
+        template = compile_template(line)
+        if type(template) is Literal:
+            placed, appended = template.placement()
+        else:
+            placed, appended = place_tags(template.expand(processor, context, depth + 1))
+        context.global_append_tags.extend(appended)
+        return list(placed)
+
+    def collect_references(self, names: set):
+        names.add(self.name)
+
+
+class Composite:
+    """'a __name__ b' : 문자열 중간의 __name__ 부분만 <name>으로 확장하여 다시 이어붙임"""
+    __slots__ = ('source', 'parts')
+
+    def __init__(self, source: str, parts: Tuple):
+        self.source = source
+        self.parts = parts # 문자열(그대로) 또는 컴파일된 노드
+
+    def expand(self, processor, context, depth: int) -> List[str]:
+        if depth > MAX_DEPTH:
+            return [self.source]
+        pieces = [part if type(part) is str else ', '.join(part.expand(processor, context, depth + 1))
+                  for part in self.parts]
+        return [', '.join(pieces)]
+
+    def collect_references(self, names: set):
+        for part in self.parts:
+            if type(part) is not str:
+                part.collect_references(names)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(tag: str):
+    """
+    태그 문자열 하나를 템플릿 트리로 컴파일합니다. 같은 문자열은 한 번만 컴파일합니다.
+    (와일드카드 줄도 내용 문자열 기준으로 캐시되므로 파일이 바뀌어도 무효화할 필요가 없음)
+    """
+    if tag.startswith('<') and tag.endswith('>'):
+        wildcard_name = tag[1:-1]
+
+        # 인라인 와일드카드
+        if '|' in wildcard_name:
+            options = tuple(compile_template(option.strip()) for option in wildcard_name.split('|'))
+            return InlineChoice(tag, options)
+
+        # 파일 기반 와일드카드 (순차/종속 모드)
+        if wildcard_name.startswith('*'):
+            return WildcardReference(tag, wildcard_name[1:], MODE_SEQUENTIAL)
+        if wildcard_name.startswith('$'):
+            try:
+                master_name, slave_name = wildcard_name[1:].split(':', 1)
+            except ValueError:
+                print(f"경고: 잘못된 종속 와일드카드 구문입니다: {wildcard_name}")
+                return Literal(tag)
+            return WildcardReference(tag, slave_name, MODE_OBSERVER, master_name)
+        return WildcardReference(tag, wildcard_name)
+
+    # 복합 와일드카드 (__...__)
+    if '__' in tag:
+        parts = tuple(compile_template(f"<{p[2:-2]}>") if p.startswith('__') else p
+                      for p in _COMPOSITE_PATTERN.split(tag) if p)
+        return Composite(tag, parts)
+
+    return Literal(tag)
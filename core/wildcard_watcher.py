@@ -0,0 +1,132 @@
+# core/wildcard_watcher.py
+
+import os
+import threading
+import time
+from typing import List
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from watchdog.events import (
+    FileSystemEventHandler, EVENT_TYPE_CREATED, EVENT_TYPE_DELETED, EVENT_TYPE_MODIFIED, EVENT_TYPE_MOVED, EVENT_TYPE_CLOSED
+)
+from watchdog.observers import Observer
+from core.wildcard_manager import WildcardManager
+from core.dynamic_wildcards import DEFINITION_SUFFIX
+
+# 와일드카드 내용이 바뀔 수 있는 이벤트 (opened / closed_no_write 등은 무시)
+_RELEVANT_EVENTS = {EVENT_TYPE_CREATED, EVENT_TYPE_DELETED, EVENT_TYPE_MODIFIED, EVENT_TYPE_MOVED, EVENT_TYPE_CLOSED}
+
+
+class _WildcardEventHandler(FileSystemEventHandler):
+    """watchdog 감시 스레드에서 호출되며, 관련 경로만 골라 WildcardWatcher에 전달합니다."""
+
+    def __init__(self, watcher: 'WildcardWatcher'):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.event_type not in _RELEVANT_EVENTS:
+            return
+        if event.is_directory and event.event_type in (EVENT_TYPE_MODIFIED, EVENT_TYPE_CLOSED):
+            return # 폴더 안의 파일이 바뀔 때마다 발생하므로 무시 (파일 이벤트로 처리됨)
+
+        paths = [event.src_path]
+        if event.event_type == EVENT_TYPE_MOVED:
+            paths.append(event.dest_path)
+        paths = [os.fsdecode(p) for p in paths]
+        if not event.is_directory:
+            paths = [p for p in paths if p.endswith(('.txt', DEFINITION_SUFFIX))]
+        if paths:
+            self.watcher.notify(paths)
+
+
+class WildcardWatcher(QObject):
+    """
+    [신규] wildcards 폴더를 감시하여 바뀐 와일드카드만 다시 읽는 감시자.
+
+    watchdog 이벤트는 감시 스레드에서 경로 집합에 모아 두고, 마지막 이벤트 후 DEBOUNCE_MS 동안
+    조용하면 메인 스레드에서 WildcardManager.apply_changes로 한 번에 반영합니다.
+    (편집기 저장 시 발생하는 임시 파일/수정/이동 이벤트 묶음을 한 번의 갱신으로 처리)
+    """
+    DEBOUNCE_MS = 150
+    # 이벤트가 계속 이어져도(대량 복사 등) 이 시간이 지나면 모인 변경을 반영
+    MAX_DELAY_MS = 1000
+
+    # 반영된 와일드카드 이름 목록
+    wildcards_changed = pyqtSignal(list)
+    # [신규] 동적 와일드카드 정의 파일(.query)이 바뀜 (다시 검색은 수신하는 쪽에서 백그라운드로 수행)
+    definitions_changed = pyqtSignal()
+    # 감시 스레드 → 메인 스레드 알림 (내부용)
+    _changes_pending = pyqtSignal()
+
+    def __init__(self, wildcard_manager: WildcardManager, parent: QObject = None):
+        super().__init__(parent)
+        self.wildcard_manager = wildcard_manager
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._observer = None
+        self._first_pending = None
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.DEBOUNCE_MS)
+        self._timer.timeout.connect(self._flush)
+        self._changes_pending.connect(self._on_changes_pending)
+
+    @property
+    def is_running(self) -> bool:
+        return self._observer is not None
+
+    def start(self):
+        """감시를 시작합니다. 이미 실행 중이면 아무것도 하지 않습니다."""
+        if self._observer is not None:
+            return
+        observer = Observer()
+        observer.daemon = True
+        observer.schedule(_WildcardEventHandler(self), self.wildcard_manager.wildcards_dir, recursive=True)
+        try:
+            observer.start()
+        except OSError as e:
+            print(f"⚠️ 와일드카드 폴더 감시를 시작하지 못했습니다: {e}")
+            return
+        self._observer = observer
+        print(f"👀 와일드카드 폴더 감시 시작: {self.wildcard_manager.wildcards_dir}")
+
+    def stop(self):
+        """감시를 중지하고, 아직 반영하지 않은 변경이 있으면 바로 반영합니다."""
+        if self._observer is None:
+            return
+        self._observer.stop()
+        self._observer.join(timeout=2)
+        self._observer = None
+        self._timer.stop()
+        self._flush()
+
+    def notify(self, paths: List[str]):
+        """(감시 스레드) 변경된 경로를 모으고 디바운스 타이머를 다시 시작하도록 알립니다."""
+        with self._lock:
+            self._pending.update(paths)
+        self._changes_pending.emit()
+
+    def _on_changes_pending(self):
+        now = time.monotonic()
+        if self._first_pending is None:
+            self._first_pending = now
+        if (now - self._first_pending) * 1000 >= self.MAX_DELAY_MS:
+            self._timer.stop()
+            self._flush()
+        else:
+            self._timer.start()
+
+    def _flush(self):
+        self._first_pending = None
+        with self._lock:
+            paths, self._pending = self._pending, set()
+        if not paths:
+            return
+        definitions = {p for p in paths if p.endswith(DEFINITION_SUFFIX)}
+        if definitions:
+            self.definitions_changed.emit()
+        changed = self.wildcard_manager.apply_changes(sorted(paths - definitions))
+        if changed:
+            print(f"🔄 와일드카드 {len(changed)}개 갱신: {', '.join(changed[:5])}{' ...' if len(changed) > 5 else ''}")
+            self.wildcards_changed.emit(changed)
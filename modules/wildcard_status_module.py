@@ -1,3 +1,7 @@
+import time
+from typing import List, Optional
+from PyQt6.QtCore import QTimer
+from PyQt6.QtGui import QTextCursor
 from PyQt6.QtWidgets import QVBoxLayout, QWidget, QLabel, QTextEdit
 from interfaces.base_module import BaseMiddleModule
 from core.context import AppContext
@@ -7,12 +11,24 @@ from ui.theme import DARK_STYLES # 테마 스타일 import
 class WildcardStatusModule(BaseMiddleModule):
     """
     🎴 프롬프트 생성 시 사용된 와일드카드의 내역과 상태를 표시하는 UI 모듈
+    [수정] 자동화/배치 생성처럼 이벤트가 빠르게 이어지면 REFRESH_INTERVAL_MS마다 최신 컨텍스트만 그리고,
+    텍스트 전체를 다시 설정하지 않고 바뀐 줄만 문서에 반영합니다.
     """
+    REFRESH_INTERVAL_MS = 100
 
     def __init__(self):
         super().__init__()
         self.history_textbox: QTextEdit = None
         self.state_textbox: QTextEdit = None
+        self.count_label: QLabel = None
+        # [신규] 갱신 스로틀: 아직 그리지 않은 최신 컨텍스트와 마지막으로 그린 시각
+        self._refresh_timer: QTimer = None
+        self._pending_context: Optional[PromptContext] = None
+        self._has_pending = False
+        self._last_render = 0.0
+        # 텍스트 상자에 현재 표시된 줄 (바뀐 줄만 반영하기 위한 비교용)
+        self._history_lines: List[str] = []
+        self._state_lines: List[str] = []
 
     def get_title(self) -> str:
         return "🃏 와일드카드 사용 현황"
@@ -24,6 +40,8 @@ class WildcardStatusModule(BaseMiddleModule):
     def initialize_with_context(self, context: AppContext):
         self.context = context
         self.context.subscribe("prompt_generated", self.update_view)
+        # [신규] 와일드카드 파일이 바뀌면 로드된 개수 갱신
+        self.context.subscribe("wildcards_changed", self.update_count)
         print(f"✅ '{self.get_title()}' 모듈이 'prompt_generated' 이벤트를 구독합니다.")
 
     def create_widget(self, parent: QWidget) -> QWidget:
@@ -40,6 +58,7 @@ class WildcardStatusModule(BaseMiddleModule):
 
         self.history_textbox = QTextEdit()
         self.history_textbox.setReadOnly(True)
+        self.history_textbox.setUndoRedoEnabled(False) # 줄 단위 편집이 실행 취소 기록에 쌓이지 않도록
         self.history_textbox.setStyleSheet(DARK_STYLES['compact_textedit'])
         self.history_textbox.setMinimumHeight(100)
         self.history_textbox.setPlaceholderText("랜덤 프롬프트 생성 시 사용된 와일드카드 내역이 표시됩니다.")
@@ -52,48 +71,112 @@ class WildcardStatusModule(BaseMiddleModule):
 
         self.state_textbox = QTextEdit()
         self.state_textbox.setReadOnly(True)
+        self.state_textbox.setUndoRedoEnabled(False)
         self.state_textbox.setStyleSheet(DARK_STYLES['compact_textedit'])
         self.state_textbox.setFixedHeight(80)
         self.state_textbox.setPlaceholderText("활성화된 순차/종속 와일드카드가 없습니다.")
         layout.addWidget(self.state_textbox)
 
-        total_wildcards = len(self.context.wildcard_manager.wildcard_dict_tree)
+        total_wildcards = self.context.wildcard_manager.wildcard_count
         
         self.count_label = QLabel(f"로드된 와일드카드: {total_wildcards}개")
         # 오른쪽 정렬 및 작은 폰트 스타일 적용
         self.count_label.setStyleSheet(DARK_STYLES['label_style'] + "font-size: 12px; color: #B0B0B0;")
         layout.addWidget(self.count_label)
         
+        self._refresh_timer = QTimer(widget)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.timeout.connect(self._flush_pending)
+
         # 초기 메시지 설정
-        self.update_view(None)
+        self._render(None)
 
         return widget
 
+    def update_count(self, changed_names=None):
+        """로드된 와일드카드 개수 표시를 갱신합니다."""
+        if self.count_label:
+            self.count_label.setText(f"로드된 와일드카드: {self.context.wildcard_manager.wildcard_count}개")
+
     def update_view(self, context: PromptContext):
         """
         'prompt_generated' 이벤트 수신 시 호출되는 콜백 함수.
-        context 객체에서 와일드카드 정보를 추출하여 UI를 업데이트합니다.
+        [수정] 바로 그리지 않고 최신 컨텍스트만 보관합니다. 마지막으로 그린 뒤 REFRESH_INTERVAL_MS가 지났으면
+        바로 그리고, 아니면 남은 시간 뒤에 한 번만 그립니다. (그 사이에 들어온 컨텍스트는 건너뜀)
         """
         if not self.history_textbox or not self.state_textbox:
             return
 
-        # 1. 사용 내역 (History) 업데이트
-        if context and context.wildcard_history:
-            history_text = ""
-            for name, values in context.wildcard_history.items():
-                last_value = values[-1] # 마지막으로 선택된 값
-                history_text += f"▶ {name}: {last_value}\n"
-            self.history_textbox.setText(history_text)
+        self._pending_context = context
+        self._has_pending = True
+        if self._refresh_timer.isActive():
+            return
+        elapsed_ms = (time.monotonic() - self._last_render) * 1000
+        if elapsed_ms >= self.REFRESH_INTERVAL_MS:
+            self._flush_pending()
         else:
-            self.history_textbox.setPlaceholderText("사용된 와일드카드 없음")
-            self.history_textbox.clear()
+            self._refresh_timer.start(int(self.REFRESH_INTERVAL_MS - elapsed_ms) + 1)
+
+    def _flush_pending(self):
+        if not self._has_pending:
+            return
+        context, self._pending_context = self._pending_context, None
+        self._has_pending = False
+        self._last_render = time.monotonic()
+        self._render(context)
+
+    def _render(self, context: Optional[PromptContext]):
+        """context 객체에서 와일드카드 정보를 추출하여 UI를 업데이트합니다."""
+        # 1. 사용 내역 (History) 업데이트 - 와일드카드별 마지막으로 선택된 값
+        history_lines = []
+        if context and context.wildcard_history:
+            history_lines = [f"▶ {name}: {values[-1]}" for name, values in context.wildcard_history.items()]
+        self._history_lines = self._patch_lines(self.history_textbox, self._history_lines, history_lines,
+                                                "사용된 와일드카드 없음")
 
         # 2. 상태 (State) 업데이트
+        state_lines = []
         if context and context.wildcard_state:
-            state_text = ""
-            for name, state in context.wildcard_state.items():
-                state_text += f"▶ {name}: {state['current']} / {state['total']}\n"
-            self.state_textbox.setText(state_text)
-        else:
-            self.state_textbox.setPlaceholderText("활성화된 순차 와일드카드 없음")
-            self.state_textbox.clear()
\ No newline at end of file
+            state_lines = [f"▶ {name}: {state['current']} / {state['total']}" for name, state in context.wildcard_state.items()]
+        self._state_lines = self._patch_lines(self.state_textbox, self._state_lines, state_lines,
+                                              "활성화된 순차 와일드카드 없음")
+
+    @staticmethod
+    def _patch_lines(textbox: QTextEdit, old_lines: List[str], new_lines: List[str], empty_placeholder: str) -> List[str]:
+        """
+        [신규] 텍스트 상자의 내용을 old_lines에서 new_lines로 바꿉니다. 바뀐 줄(문서 블록)만 교체하고
+        늘어난 줄은 끝에 추가, 줄어든 줄은 끝에서 삭제하며, 한 번의 편집 블록으로 묶어 레이아웃을 한 번만 갱신합니다.
+        절반 넘는 줄이 바뀌었으면 줄 단위 편집보다 전체 교체가 빠르므로 전체를 교체합니다.
+        """
+        if not new_lines:
+            textbox.setPlaceholderText(empty_placeholder)
+            if old_lines:
+                textbox.clear()
+            return new_lines
+        if new_lines == old_lines:
+            return new_lines
+
+        common = min(len(old_lines), len(new_lines))
+        changed = [i for i in range(common) if old_lines[i] != new_lines[i]]
+        if (len(changed) + abs(len(new_lines) - len(old_lines))) * 2 > len(new_lines):
+            textbox.setPlainText('\n'.join(new_lines))
+            return new_lines
+
+        document = textbox.document()
+        cursor = QTextCursor(document)
+        cursor.beginEditBlock()
+        for i in changed:
+            block = document.findBlockByNumber(i)
+            cursor.setPosition(block.position())
+            cursor.setPosition(block.position() + block.length() - 1, QTextCursor.MoveMode.KeepAnchor)
+            cursor.insertText(new_lines[i])
+        if len(new_lines) > common:
+            cursor.movePosition(QTextCursor.MoveOperation.End)
+            cursor.insertText(('\n' if common else '') + '\n'.join(new_lines[common:]))
+        elif len(old_lines) > common:
+            last = document.findBlockByNumber(common - 1)
+            cursor.setPosition(last.position() + last.length() - 1)
+            cursor.movePosition(QTextCursor.MoveOperation.End, QTextCursor.MoveMode.KeepAnchor)
+            cursor.removeSelectedText()
+        cursor.endEditBlock()
+        return new_lines
@@ -0,0 +1,19 @@
+# tests/test_weighted_lines.py
+
+from core.weighted_lines import parse_weighted_lines
+
+
+def test_weight_prefix_is_split():
+    assert parse_weighted_lines(['5::red dress', '0.5::blue dress', 'green dress']) == (
+        ['red dress', 'blue dress', 'green dress'], [5.0, 0.5, 1.0])
+
+
+def test_nai_emphasis_line_is_unchanged():
+    lines = ['1.2::red dress::', '0.8::blurry::, 1girl', '2::hat::, -1::ribbon::']
+    assert parse_weighted_lines(lines) == (lines, None)
+
+
+def test_nai_emphasis_line_keeps_weight_one_next_to_weighted_lines():
+    choices, weights = parse_weighted_lines(['3::blue dress', '1.2::red dress::'])
+    assert choices == ['blue dress', '1.2::red dress::']
+    assert weights == [3.0, 1.0]
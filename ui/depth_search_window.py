@@ -1,41 +1,126 @@
+import numpy as np
 import pandas as pd
+from collections import OrderedDict
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QPushButton,
     QLineEdit, QCheckBox, QTableView, QHeaderView, QAbstractItemView,
-    QFileDialog, QMessageBox, QSplitter, QFrame, QTextEdit, QMenu
+    QFileDialog, QMessageBox, QSplitter, QFrame, QTextEdit, QMenu,
+    QListWidget, QListWidgetItem, QTabWidget, QApplication
 )
-from PyQt6.QtGui import QCursor, QAction, QIntValidator
-from PyQt6.QtCore import QAbstractTableModel, Qt, pyqtSignal
+from PyQt6.QtGui import QCursor, QAction, QIntValidator, QKeySequence, QShortcut
+from PyQt6.QtCore import QAbstractTableModel, Qt, pyqtSignal, QObject, QThread
 from core.search_result_model import SearchResultModel
 from core.search_engine import SearchEngine
+from core.tag_facet_index import TagFacetIndex
 from ui.theme import DARK_COLORS
 
+class SortWorker(QObject):
+    """[신규] 컬럼 정렬 순열(argsort)을 백그라운드에서 계산하는 워커"""
+    finished = pyqtSignal(object, int, bool, object) # (model, column, ascending, order)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, model: 'PandasModel', column: int, ascending: bool):
+        super().__init__()
+        self.model = model
+        self.column = column
+        self.ascending = ascending
+
+    def run(self):
+        try:
+            order = self.model.compute_sort_order(self.column, self.ascending)
+            self.finished.emit(self.model, self.column, self.ascending, order)
+        except Exception as e:
+            self.error_occurred.emit(f"정렬 중 오류 발생: {e}")
+
+class FacetWorker(QObject):
+    """[신규] 태그 패싯 인덱스 구축 및 개수 갱신을 백그라운드에서 수행하는 워커"""
+    finished = pyqtSignal(object, int, object) # (index, generation, {category: [(tag, count), ...]})
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, df: pd.DataFrame, index: TagFacetIndex, mask: np.ndarray, generation: int, top_n: int):
+        super().__init__()
+        self.df = df
+        self.index = index
+        self.mask = mask
+        self.generation = generation
+        self.top_n = top_n
+
+    def run(self):
+        try:
+            index = self.index or TagFacetIndex(self.df)
+            index.update(self.mask)
+            results = {category: index.top(category, self.top_n) for category in index.CATEGORIES}
+            self.finished.emit(index, self.generation, results)
+        except Exception as e:
+            self.error_occurred.emit(f"태그 분포 계산 중 오류 발생: {e}")
+
 class PandasModel(QAbstractTableModel):
-    """Pandas DataFrame을 QTableView에 표시하기 위한 모델"""
-    def __init__(self, df=pd.DataFrame()):
+    """
+    Pandas DataFrame을 QTableView에 표시하기 위한 모델.
+    [수정] 셀마다 iloc/isna/str을 호출하지 않고, 화면 단위 블록으로 컬럼별 표시 문자열을
+    지연 생성하여 LRU 캐시에 보관합니다. 캐시된 셀 조회는 O(1) 리스트 인덱싱입니다.
+    [수정] rows를 주면 데이터프레임을 복사하지 않고 해당 위치의 행만 표시합니다.
+    """
+    BLOCK_SIZE = 256        # 한 번에 포맷팅할 행 수 (뷰포트 몇 개 분량)
+    MAX_CACHED_BLOCKS = 512 # LRU에 보관할 (컬럼, 블록) 수
+
+    def __init__(self, df=pd.DataFrame(), rows=None):
         super().__init__()
         self._df = df
+        self._rows = rows # [신규] 표시할 행의 위치 배열, None이면 전체 행
+        self._order = None # [신규] 정렬 순열 (뷰 행 -> 필터된 행 번호), None이면 원래 순서
+        self._view_positions = rows # 뷰 행 -> 데이터프레임 위치 (rows와 order를 합성한 결과)
+        self._sort_cache = {} # {(column, ascending): 순열}
+        self._block_cache = OrderedDict() # {(column, block_index): [표시 문자열, ...]}
+        self._numeric_columns = [pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+                                 for dtype in df.dtypes]
 
     def rowCount(self, parent=None):
-        return self._df.shape[0]
+        return self._df.shape[0] if self._rows is None else len(self._rows)
 
     def columnCount(self, parent=None):
         return self._df.shape[1]
 
+    def _format_block(self, column: int, block_index: int) -> list:
+        """한 컬럼의 블록 구간을 한 번에 표시 문자열로 변환합니다."""
+        start = block_index * self.BLOCK_SIZE
+        if self._view_positions is None:
+            series = self._df.iloc[start:start + self.BLOCK_SIZE, column]
+        else:
+            series = self._df.iloc[self._view_positions[start:start + self.BLOCK_SIZE], column]
+        na_mask = series.isna().to_numpy()
+
+        if self._numeric_columns[column]:
+            if not na_mask.any() and pd.api.types.is_integer_dtype(series.dtype):
+                return [str(v) for v in series.to_numpy()]
+            # 숫자 타입이면 정수로 변환하여 소수점 제거, NaN이면 빈 문자열
+            values = series.to_numpy(dtype=float, na_value=float('nan'))
+            return ["" if is_na else str(int(v)) for v, is_na in zip(values, na_mask)]
+
+        return ["" if is_na else str(v) for v, is_na in zip(series.to_numpy(), na_mask)]
+
+    def _get_block(self, column: int, block_index: int) -> list:
+        key = (column, block_index)
+        block = self._block_cache.get(key)
+        if block is not None:
+            self._block_cache.move_to_end(key)
+            return block
+
+        block = self._format_block(column, block_index)
+        self._block_cache[key] = block
+        if len(self._block_cache) > self.MAX_CACHED_BLOCKS:
+            self._block_cache.popitem(last=False)
+        return block
+
+    def invalidate_cache(self):
+        """표시 문자열 캐시를 비웁니다. (행 순서나 데이터가 바뀐 경우)"""
+        self._block_cache.clear()
+
     def data(self, index, role=Qt.ItemDataRole.DisplayRole):
         if index.isValid() and role == Qt.ItemDataRole.DisplayRole:
-            value = self._df.iloc[index.row(), index.column()]
-            
-            # 1. 값이 NaN인지 먼저 확인
-            if pd.isna(value):
-                return ""  # NaN이면 빈 문자열 반환
-            
-            # 2. 숫자 타입이면 정수로 변환하여 소수점 제거
-            if isinstance(value, (int, float)):
-                return str(int(value))
-            
-            # 3. 그 외의 경우 문자열로 변환
-            return str(value)
+            row = index.row()
+            block = self._get_block(index.column(), row // self.BLOCK_SIZE)
+            return block[row % self.BLOCK_SIZE]
         return None
 
     def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
@@ -48,21 +133,57 @@ class PandasModel(QAbstractTableModel):
                     return ""
             if orientation == Qt.Orientation.Vertical:
                 # 행 인덱스 범위 검사 추가
-                if 0 <= section < len(self._df.index):
-                    return str(self._df.index[section] + 1) # 1부터 시작하도록
+                if 0 <= section < self.rowCount():
+                    # 정렬 전 (필터된) 행 번호를 1부터 시작하도록 표시
+                    return str((section if self._order is None else int(self._order[section])) + 1)
                 else:
                     return ""
         return None
 
+    def source_position(self, row: int) -> int:
+        """뷰의 행 번호를 데이터프레임의 위치(iloc) 인덱스로 변환합니다."""
+        return row if self._view_positions is None else int(self._view_positions[row])
+
+    def compute_sort_order(self, column: int, ascending: bool) -> np.ndarray:
+        """
+        [신규] 컬럼 값의 안정 정렬 순열을 계산합니다. (행 데이터는 복사하지 않음)
+        워커 스레드에서 호출되며, 기존 sort_values와 같은 순서(NaN은 마지막)를 만듭니다.
+        """
+        cached = self._sort_cache.get((column, ascending))
+        if cached is not None:
+            return cached
+        if self._rows is None:
+            values = self._df.iloc[:, column].reset_index(drop=True)
+        else:
+            values = self._df.iloc[self._rows, column].reset_index(drop=True)
+        return values.sort_values(ascending=ascending, kind='mergesort').index.to_numpy()
+
+    def get_cached_order(self, column: int, ascending: bool):
+        """이미 계산된 정렬 순열을 반환합니다. 없으면 None"""
+        return self._sort_cache.get((column, ascending))
+
+    def cache_sort_order(self, column: int, ascending: bool, order: np.ndarray):
+        """계산된 정렬 순열을 캐시합니다. (헤더 재클릭 시 재사용)"""
+        self._sort_cache[(column, ascending)] = order
+
+    def apply_sort_order(self, column: int, ascending: bool, order: np.ndarray):
+        """계산된 순열을 캐시하고 뷰 순서를 교체합니다."""
+        self.cache_sort_order(column, ascending, order)
+        self.layoutAboutToBeChanged.emit()
+        self._order = order
+        self._view_positions = order if self._rows is None else self._rows[order]
+        self.invalidate_cache()
+        self.layoutChanged.emit()
+
     def sort(self, column, order):
+        """동기 정렬 (캐시된 순열이 있으면 재사용)"""
+        if not 0 <= column < self.columnCount():
+            return
+        ascending = (order == Qt.SortOrder.AscendingOrder)
         try:
-            self.layoutAboutToBeChanged.emit()
-            col_name = self.dataframe().columns[column]
-            self._df = self.dataframe().sort_values(
-                col_name, ascending=(order == Qt.SortOrder.AscendingOrder), kind='mergesort'
-            )
-            self.layoutChanged.emit()
-        except: pass
+            self.apply_sort_order(column, ascending, self.compute_sort_order(column, ascending))
+        except Exception as e:
+            print(f"⚠️ 정렬 실패: {e}")
 
     def dataframe(self):
         return self._df
@@ -70,17 +191,66 @@ class PandasModel(QAbstractTableModel):
 class DepthSearchWindow(QWidget):
     """심층 검색 탭 UI 및 기능 클래스"""
     results_assigned = pyqtSignal(SearchResultModel)
+    MAX_UNDO_DEPTH = 100        # 실행 취소 기록 최대 개수
+    MAX_CACHED_PREDICATES = 64  # 캐시할 조건 마스크 최대 개수
+    FACET_TOP_N = 30            # 패싯 패널에 표시할 카테고리별 태그 수
+    FACET_CATEGORIES = {'artist': "작가", 'character': "캐릭터", 'copyright': "작품", 'general': "일반"}
 
     def __init__(self, search_result: SearchResultModel, parent=None):
         super().__init__(parent)
         self.main_window = parent
         self.setStyleSheet(f"background-color: {DARK_COLORS['bg_primary']};")
         self.original_model = search_result
-        self.current_model = SearchResultModel(search_result.get_dataframe().copy())
         self.search_engine = SearchEngine()
+
+        # [신규] 필터 결과는 데이터프레임 복사본 대신 기준 데이터프레임 위의 불리언 마스크로 관리
+        self.base_df: pd.DataFrame = None
+        self.view_mask: np.ndarray = None
+        self._tags_string: pd.Series = None # 텍스트 검색용 결합 태그 (지연 생성)
+        self._predicate_masks = OrderedDict() # {조건 키: 마스크} 변경되지 않은 조건은 재평가하지 않음
+        self._undo_stack = [] # [(packbits 마스크, 길이), ...]
+        self._redo_stack = []
+
+        # [신규] 태그 패싯 상태 (인덱스는 백그라운드에서 기준 데이터당 한 번 구축)
+        self._facet_index = None
+        self._facet_generation = 0 # 기준 데이터가 바뀔 때마다 증가하여 오래된 결과를 무시
+        self._facet_thread = None
+        self._facet_worker = None
+        self._facet_pending = False
+        self._base_is_original = True # 기준 데이터가 원본 결과인지 (Parquet 병합 후에는 False)
+        self._reset_base(search_result.get_dataframe(), is_original=True)
+
         self.init_ui()
         self.update_view()
 
+        # [신규] 탭을 닫지 않고 앱을 종료해도 실행 중인 정렬/패싯 스레드를 정리
+        app_instance = QApplication.instance()
+        if app_instance:
+            app_instance.aboutToQuit.connect(self.stop_workers)
+
+    def closeEvent(self, event):
+        self.stop_workers()
+        super().closeEvent(event)
+
+    def stop_workers(self):
+        """
+        [신규] 실행 중인 정렬/패싯 스레드를 정리합니다. (탭을 닫거나 앱을 종료할 때)
+        닫힌 창과 삭제된 모델로 결과가 전달되지 않도록 연결을 먼저 끊고, 스레드가 끝날 때까지 기다립니다.
+        """
+        self._facet_pending = False
+        workers = list(self._sort_workers.items())
+        if self._facet_thread is not None:
+            self._facet_thread.finished.disconnect(self._on_facet_thread_finished)
+            workers.append((self._facet_thread, self._facet_worker))
+        for thread, worker in workers:
+            worker.finished.disconnect()
+            worker.error_occurred.disconnect()
+            thread.quit()
+            thread.wait()
+        self._sort_workers.clear()
+        self._facet_thread = None
+        self._facet_worker = None
+
     def init_ui(self):
         main_layout = QVBoxLayout(self)
         main_splitter = QSplitter(Qt.Orientation.Vertical)
@@ -134,9 +304,14 @@ class DepthSearchWindow(QWidget):
         self.table_view.setSortingEnabled(False)
         self.table_view.horizontalHeader().sectionClicked.connect(self.on_header_clicked)
         self.current_sort_order = {} # {columnIndex: order}
+        self._pending_sort = None # 가장 최근 정렬 요청 (model, column, ascending)
+        self._sort_workers = {} # {QThread: SortWorker} 실행 중인 정렬 작업
         self.table_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
         self.table_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         self.table_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        # [신규] 행 높이를 고정하여 대용량 결과에서도 스크롤/리사이즈 시 행별 높이 계산을 생략
+        self.table_view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table_view.verticalHeader().setDefaultSectionSize(24)
 
         # [수정] 테이블 뷰 스타일 변경
         self.table_view.setStyleSheet("""
@@ -154,8 +329,40 @@ class DepthSearchWindow(QWidget):
             }
         """)
 
+        # [신규] 테이블 오른쪽에 태그 패싯 패널 배치
+        viewer_splitter = QSplitter(Qt.Orientation.Horizontal)
+        viewer_splitter.addWidget(self.table_view)
+        viewer_splitter.addWidget(self._create_facet_layout())
+        viewer_splitter.setStretchFactor(0, 4)
+        viewer_splitter.setStretchFactor(1, 1)
+
         layout.addWidget(self.info_label)
-        layout.addWidget(self.table_view)
+        layout.addWidget(viewer_splitter)
+        return container
+
+    def _create_facet_layout(self) -> QWidget:
+        """[신규] 현재 뷰의 카테고리별 상위 태그를 보여주는 패싯 패널"""
+        container = QFrame()
+        container.setStyleSheet("border: none;")
+        layout = QVBoxLayout(container)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.facet_status_label = QLabel("태그 분포 (클릭하여 필터 추가)")
+        self.facet_status_label.setStyleSheet(f"color: {DARK_COLORS['text_secondary']};")
+        layout.addWidget(self.facet_status_label)
+
+        self.facet_tabs = QTabWidget()
+        self.facet_lists = {}
+        list_style = f"""
+            background-color: {DARK_COLORS['bg_secondary']}; border: 1px solid {DARK_COLORS['border']};
+            border-radius: 4px; color: {DARK_COLORS['text_primary']};
+        """
+        for category, title in self.FACET_CATEGORIES.items():
+            facet_list = QListWidget(styleSheet=list_style)
+            facet_list.itemClicked.connect(self.on_facet_clicked)
+            self.facet_tabs.addTab(facet_list, title)
+            self.facet_lists[category] = facet_list
+        layout.addWidget(self.facet_tabs)
         return container
 
     def _create_search_layout(self) -> QWidget:
@@ -309,8 +516,20 @@ class DepthSearchWindow(QWidget):
         self.restore_btn = QPushButton("초기 상태로 복원", styleSheet=button_style)
         self.restore_btn.clicked.connect(self.restore_to_original)
 
+        # [신규] 필터 실행 취소/다시 실행
+        history_layout = QHBoxLayout()
+        self.undo_btn = QPushButton("↶ 실행 취소", styleSheet=button_style)
+        self.undo_btn.clicked.connect(self.undo_filter)
+        self.redo_btn = QPushButton("↷ 다시 실행", styleSheet=button_style)
+        self.redo_btn.clicked.connect(self.redo_filter)
+        history_layout.addWidget(self.undo_btn)
+        history_layout.addWidget(self.redo_btn)
+        QShortcut(QKeySequence.StandardKey.Undo, self, activated=self.undo_filter)
+        QShortcut(QKeySequence.StandardKey.Redo, self, activated=self.redo_filter)
+
         layout.addWidget(self.assign_btn)
         layout.addWidget(self.restore_btn)
+        layout.addLayout(history_layout)
         return container
 
     def _create_stacker_layout(self) -> QWidget:
@@ -359,12 +578,11 @@ class DepthSearchWindow(QWidget):
             return
 
         current_index = indexes[0]
-        row = current_index.row()
-        df = self.table_view.model().dataframe()
+        model = self.table_view.model()
+        df = model.dataframe()
         
         try:
-            original_index = df.index[row]
-            general_text = df.loc[original_index, 'general']
+            general_text = df['general'].iloc[model.source_position(current_index.row())]
             self.general_text_edit.setText(general_text)
         except (KeyError, IndexError):
             self.general_text_edit.setText("'general' 컬럼을 찾을 수 없거나 행이 잘못되었습니다.")
@@ -373,64 +591,159 @@ class DepthSearchWindow(QWidget):
         self.table_view.setFocus()
     
     def update_view(self):
-        """현재 모델 데이터로 테이블 뷰와 정보 레이블을 업데이트"""
-        df = self.current_model.get_dataframe()
-        model = PandasModel(df)
+        """현재 마스크로 테이블 뷰와 정보 레이블을 업데이트"""
+        count = int(self.view_mask.sum())
+        # 전체 행이 보이는 경우 위치 배열 없이 그대로 표시
+        rows = None if count == len(self.base_df) else np.flatnonzero(self.view_mask)
+        model = PandasModel(self.base_df, rows)
         self.table_view.setModel(model) # 모델 설정
         
         # [핵심 수정] 모델이 설정된 직후에 selectionModel의 시그널을 연결합니다.
         self.table_view.selectionModel().selectionChanged.connect(self.on_selection_changed)
 
-        self.info_label.setText(f"표시된 행: {len(df)} / 원본 행: {self.original_model.get_count()}")
+        self.info_label.setText(f"표시된 행: {count} / 원본 행: {self.original_model.get_count()}")
+        self.undo_btn.setEnabled(bool(self._undo_stack))
+        self.redo_btn.setEnabled(bool(self._redo_stack))
+        self._request_facet_update()
 
-        if 'tags_string' in df.columns:
+        if 'tags_string' in self.base_df.columns:
             try:
-                tags_string_index = df.columns.get_loc('tags_string')
+                tags_string_index = self.base_df.columns.get_loc('tags_string')
                 self.table_view.setColumnHidden(tags_string_index, True)
             except KeyError:
                 pass
 
+    # --- [신규] 마스크 기반 필터 상태 관리 ---
+    def _reset_base(self, df: pd.DataFrame, is_original: bool = False):
+        """기준 데이터프레임을 교체하고 마스크 캐시와 실행 취소 기록을 초기화합니다."""
+        self.base_df = df.reset_index(drop=True)
+        self._base_is_original = is_original
+        self.view_mask = np.ones(len(self.base_df), dtype=bool)
+        self._tags_string = None
+        self._predicate_masks.clear()
+        self._facet_index = None
+        self._facet_generation += 1
+        self._undo_stack.clear()
+        self._redo_stack.clear()
+
+    def _pack_mask(self, mask: np.ndarray) -> tuple:
+        """마스크를 비트 단위로 압축합니다. (행당 1비트)"""
+        return np.packbits(mask), len(mask)
+
+    def _unpack_mask(self, packed: tuple) -> np.ndarray:
+        bits, length = packed
+        return np.unpackbits(bits, count=length).astype(bool)
+
+    def _set_view_mask(self, mask: np.ndarray):
+        """현재 마스크를 실행 취소 기록에 남기고 새 마스크를 적용합니다."""
+        self._undo_stack.append(self._pack_mask(self.view_mask))
+        if len(self._undo_stack) > self.MAX_UNDO_DEPTH:
+            self._undo_stack.pop(0)
+        self._redo_stack.clear()
+        self.view_mask = mask
+        self.update_view()
+
+    def undo_filter(self):
+        """직전 필터 상태로 되돌립니다."""
+        if not self._undo_stack:
+            return
+        self._redo_stack.append(self._pack_mask(self.view_mask))
+        self.view_mask = self._unpack_mask(self._undo_stack.pop())
+        self.update_view()
+
+    def redo_filter(self):
+        """실행 취소한 필터 상태를 다시 적용합니다."""
+        if not self._redo_stack:
+            return
+        self._undo_stack.append(self._pack_mask(self.view_mask))
+        self.view_mask = self._unpack_mask(self._redo_stack.pop())
+        self.update_view()
+
+    def _current_dataframe(self) -> pd.DataFrame:
+        """현재 마스크에 해당하는 행을 데이터프레임으로 만듭니다. (내보내기/할당 시에만 복사)"""
+        return self.base_df[self.view_mask].reset_index(drop=True)
+
+    def _get_tags_string(self) -> pd.Series:
+        if self._tags_string is None:
+            if 'tags_string' in self.base_df.columns:
+                self._tags_string = self.base_df['tags_string']
+            else:
+                self._tags_string = self.search_engine.build_tags_string(self.base_df)
+        return self._tags_string
+
+    def _predicate_mask(self, key: tuple, compute) -> np.ndarray:
+        """조건 키에 해당하는 마스크를 캐시에서 가져오거나, 없으면 한 번만 계산합니다."""
+        mask = self._predicate_masks.get(key)
+        if mask is not None:
+            self._predicate_masks.move_to_end(key)
+            return mask
+        mask = np.asarray(compute(), dtype=bool)
+        self._predicate_masks[key] = mask
+        if len(self._predicate_masks) > self.MAX_CACHED_PREDICATES:
+            self._predicate_masks.popitem(last=False)
+        return mask
+
+    def _collect_predicates(self) -> list:
+        """UI에 입력된 필터 조건을 (캐시 키, 마스크 계산 함수) 목록으로 변환합니다."""
+        df = self.base_df
+        predicates = []
+
+        # [신규] 등급 필터링 로직 추가
+        enabled_ratings = frozenset(key for key, cb in self.d_rating_checkboxes.items() if cb.isChecked())
+        predicates.append((('rating', enabled_ratings), lambda: df['rating'].isin(enabled_ratings).to_numpy()))
+
+        query, exclude_query = self.d_search_input.text(), self.d_exclude_input.text()
+        if query.strip() or exclude_query.strip():
+            predicates.append((('query', query, exclude_query),
+                               lambda: self.search_engine.query_mask(self._get_tags_string(), query, exclude_query)))
+
+        # [신규] 추가 필터 로직: (체크박스, 입력창, 컬럼, 비교 방향)
+        range_filters = [
+            (self.w_min_check, self.w_min_input, 'image_width', 'ge'),
+            (self.w_max_check, self.w_max_input, 'image_width', 'le'),
+            (self.h_min_check, self.h_min_input, 'image_height', 'ge'),
+            (self.h_max_check, self.h_max_input, 'image_height', 'le'),
+            (self.token_min_check, self.token_min_input, 'tokens', 'ge'),
+            (self.token_max_check, self.token_max_input, 'tokens', 'le'),
+            (self.id_min_check, self.id_min_input, 'id', 'ge'),
+            (self.id_max_check, self.id_max_input, 'id', 'le'),
+            (self.score_min_check, self.score_min_input, 'score', 'ge'),
+        ]
+        for check, line_edit, column, op in range_filters:
+            if not check.isChecked():
+                continue
+            value = int(line_edit.text())
+            if column not in df.columns:
+                raise KeyError(column)
+            predicates.append((('range', column, op, value),
+                               lambda column=column, op=op, value=value: getattr(df[column], op)(value).to_numpy()))
+
+        if self.rem_char_check.isChecked() and self.only_empty_char_check.isChecked():
+            # 두 옵션이 모두 체크된 경우, 결과는 0이 되므로 빈 마스크
+            predicates.append((('character', 'none'), lambda: np.zeros(len(df), dtype=bool)))
+        elif self.rem_char_check.isChecked():
+            predicates.append((('character', 'notna'), lambda: df['character'].notna().to_numpy()))
+        elif self.only_empty_char_check.isChecked():
+            predicates.append((('character', 'isna'), lambda: df['character'].isna().to_numpy()))
+
+        return predicates
+
     def apply_filters(self):
         """입력된 모든 필터 조건에 따라 필터링하고 뷰 업데이트"""
         # [수정] 현재 결과가 있으면 그 안에서, 없으면 원본에서 검색 시작
-        if not self.current_model.is_empty():
-            temp_df = self.current_model.get_dataframe().copy()
+        if self.view_mask.any():
+            start_mask = self.view_mask
         else:
-            temp_df = self.original_model.get_dataframe().copy()
-        
-        # [신규] 등급 필터링 로직 추가
-        enabled_ratings = {key for key, cb in self.d_rating_checkboxes.items() if cb.isChecked()}
-        temp_df = temp_df[temp_df['rating'].isin(enabled_ratings)]
-        temp_df = self.search_engine._apply_filters(
-            temp_df, self.d_search_input.text(), self.d_exclude_input.text()
-        )
+            start_mask = np.ones(len(self.base_df), dtype=bool)
 
-        # [신규] 추가 필터 로직
         try:
-            if self.w_min_check.isChecked(): temp_df = temp_df[temp_df['image_width'] >= int(self.w_min_input.text())]
-            if self.w_max_check.isChecked(): temp_df = temp_df[temp_df['image_width'] <= int(self.w_max_input.text())]
-            if self.h_min_check.isChecked(): temp_df = temp_df[temp_df['image_height'] >= int(self.h_min_input.text())]
-            if self.h_max_check.isChecked(): temp_df = temp_df[temp_df['image_height'] <= int(self.h_max_input.text())]
-            
-            if self.token_min_check.isChecked(): temp_df = temp_df[temp_df['tokens'] >= int(self.token_min_input.text())]
-            if self.token_max_check.isChecked(): temp_df = temp_df[temp_df['tokens'] <= int(self.token_max_input.text())]
-            if self.id_min_check.isChecked(): temp_df = temp_df[temp_df['id'] >= int(self.id_min_input.text())]
-            if self.id_max_check.isChecked(): temp_df = temp_df[temp_df['id'] <= int(self.id_max_input.text())]
-            if self.score_min_check.isChecked(): temp_df = temp_df[temp_df['score'] >= int(self.score_min_input.text())]
-            if self.rem_char_check.isChecked() and self.only_empty_char_check.isChecked():
-                # 두 옵션이 모두 체크된 경우, 결과는 0이 되므로 빈 데이터프레임 반환
-                temp_df = pd.DataFrame(columns=temp_df.columns)
-            elif self.rem_char_check.isChecked():
-                temp_df = temp_df[temp_df['character'].notna()]
-            elif self.only_empty_char_check.isChecked():
-                temp_df = temp_df[temp_df['character'].isna()]
-                
+            masks = [self._predicate_mask(key, compute) for key, compute in self._collect_predicates()]
         except (ValueError, KeyError) as e:
             QMessageBox.warning(self, "입력 오류", f"필터 값에 유효한 숫자를 입력해주세요.\n오류: {e}")
             return
 
-        self.current_model = SearchResultModel(temp_df)
-        self.update_view()
+        # 모든 조건 마스크를 한 번에 결합
+        self._set_view_mask(np.logical_and.reduce([start_mask, *masks]))
 
     # [신규] 스태커 기능 메서드
     def import_parquet(self):
@@ -439,41 +752,105 @@ class DepthSearchWindow(QWidget):
             return
         try:
             import_df = pd.read_parquet(path)
-            self.current_model.append_dataframe(import_df)
-            self.current_model.deduplicate() # 합친 후 중복 제거
+            merged_model = SearchResultModel(self._current_dataframe())
+            merged_model.append_dataframe(import_df)
+            merged_model.deduplicate() # 합친 후 중복 제거
+            # 행 구성이 바뀌므로 합친 결과를 새 기준 데이터로 사용
+            self._reset_base(merged_model.get_dataframe())
             self.update_view()
             #QMessageBox.information(self, "성공", "데이터를 성공적으로 불러와 합쳤습니다.")
         except Exception as e:
             QMessageBox.critical(self, "오류", f"파일을 불러오는 중 오류 발생:\n{e}")
             
     def clear_current_view(self):
-        self.current_model = SearchResultModel()
-        self.update_view()
+        self._set_view_mask(np.zeros(len(self.base_df), dtype=bool))
 
     def assign_results_to_main(self):
         """현재 필터링된 결과를 메인 윈도우로 보냄"""
-        self.results_assigned.emit(self.current_model)
+        self.results_assigned.emit(SearchResultModel(self._current_dataframe()))
         #QMessageBox.information(self, "완료", f"{self.current_model.get_count()}개의 결과가 메인 UI에 할당되었습니다.")
 
     def restore_to_original(self):
         """뷰를 초기 데이터 상태로 되돌림"""
-        self.current_model = SearchResultModel(self.original_model.get_dataframe().copy())
-        self.update_view()
+        if self._base_is_original:
+            self._set_view_mask(np.ones(len(self.base_df), dtype=bool))
+        else:
+            # Parquet 병합 등으로 기준 데이터가 바뀐 경우 원본으로 다시 구성 (행 수가 같아도 내용이 다름)
+            self._reset_base(self.original_model.get_dataframe(), is_original=True)
+            self.update_view()
 
     def export_to_parquet(self):
         """현재 뷰의 데이터를 Parquet 파일로 저장"""
-        if self.current_model.is_empty():
+        if not self.view_mask.any():
             QMessageBox.warning(self, "경고", "내보낼 데이터가 없습니다.")
             return
 
         path, _ = QFileDialog.getSaveFileName(self, "Parquet 파일로 저장", "", "Parquet Files (*.parquet)")
         if path:
             try:
-                self.current_model.get_dataframe().to_parquet(path)
+                self._current_dataframe().to_parquet(path)
                 QMessageBox.information(self, "성공", f"'{path}'에 성공적으로 저장했습니다.")
             except Exception as e:
                 QMessageBox.critical(self, "오류", f"파일 저장 중 오류 발생:\n{e}")
 
+    # --- [신규] 태그 패싯 ---
+    def _request_facet_update(self):
+        """현재 마스크로 패싯 계산을 요청합니다. 계산 중이면 끝난 뒤 최신 마스크로 한 번 더 실행합니다."""
+        if self._facet_thread is not None:
+            self._facet_pending = True
+            return
+        self._facet_pending = False
+        self.facet_status_label.setText("태그 분포 계산 중...")
+
+        self._facet_thread = QThread()
+        self._facet_worker = FacetWorker(self.base_df, self._facet_index, self.view_mask,
+                                         self._facet_generation, self.FACET_TOP_N)
+        self._facet_worker.moveToThread(self._facet_thread)
+
+        self._facet_thread.started.connect(self._facet_worker.run)
+        self._facet_worker.finished.connect(self.on_facets_ready)
+        self._facet_worker.error_occurred.connect(self.on_facet_error)
+        self._facet_worker.finished.connect(self._facet_thread.quit)
+        self._facet_worker.error_occurred.connect(self._facet_thread.quit)
+        self._facet_thread.finished.connect(self._on_facet_thread_finished)
+        self._facet_thread.finished.connect(self._facet_thread.deleteLater)
+        self._facet_thread.start()
+
+    def _on_facet_thread_finished(self):
+        self._facet_thread = None
+        self._facet_worker = None
+        if self._facet_pending:
+            self._request_facet_update()
+
+    def on_facets_ready(self, index, generation: int, results: dict):
+        """계산된 패싯을 목록에 표시합니다. (기준 데이터가 바뀐 뒤의 결과는 무시)"""
+        if generation != self._facet_generation:
+            return
+        self._facet_index = index
+        if self._facet_pending:
+            return # 곧 최신 마스크로 다시 계산됨
+
+        for category, facet_list in self.facet_lists.items():
+            facet_list.clear()
+            for tag, count in results.get(category, []):
+                item = QListWidgetItem(f"{tag}  ({count:,})")
+                item.setData(Qt.ItemDataRole.UserRole, tag)
+                facet_list.addItem(item)
+        self.facet_status_label.setText("태그 분포 (클릭하여 필터 추가)")
+
+    def on_facet_error(self, message: str):
+        self.facet_status_label.setText("태그 분포 계산 실패")
+        print(f"⚠️ {message}")
+
+    def on_facet_clicked(self, item):
+        """클릭한 태그를 정확 일치(*) 검색 키워드로 추가하고 결과 내 재검색"""
+        tag = item.data(Qt.ItemDataRole.UserRole)
+        if not tag:
+            return
+        current_query = self.d_search_input.text().strip()
+        self.d_search_input.setText(f"{current_query}, *{tag}" if current_query else f"*{tag}")
+        self.apply_filters()
+
     def on_header_clicked(self, logicalIndex):
         """헤더 클릭 시 커스텀 정렬 수행 (내림차순 우선)"""
         current_order = self.current_sort_order.get(logicalIndex, Qt.SortOrder.DescendingOrder)
@@ -484,22 +861,63 @@ class DepthSearchWindow(QWidget):
             new_order = Qt.SortOrder.DescendingOrder
             
         self.current_sort_order = {logicalIndex: new_order} # 다른 컬럼 정렬 상태 초기화
-        self.table_view.model().sort(logicalIndex, new_order)
         self.table_view.horizontalHeader().setSortIndicator(logicalIndex, new_order)
 
+        # [수정] 캐시된 순열이 있으면 즉시 교체, 없으면 백그라운드에서 argsort 계산
+        model = self.table_view.model()
+        ascending = (new_order == Qt.SortOrder.AscendingOrder)
+        self._pending_sort = (model, logicalIndex, ascending)
+        cached_order = model.get_cached_order(logicalIndex, ascending)
+        if cached_order is not None:
+            model.apply_sort_order(logicalIndex, ascending, cached_order)
+            return
+        self._start_sort_worker(model, logicalIndex, ascending)
+
+    def _start_sort_worker(self, model: PandasModel, column: int, ascending: bool):
+        """정렬 순열 계산을 별도 스레드에서 시작합니다."""
+        self.setCursor(Qt.CursorShape.BusyCursor)
+        thread = QThread()
+        worker = SortWorker(model, column, ascending)
+        worker.moveToThread(thread)
+
+        thread.started.connect(worker.run)
+        worker.finished.connect(self.on_sort_finished)
+        worker.error_occurred.connect(self.on_sort_error)
+        worker.finished.connect(thread.quit)
+        worker.error_occurred.connect(thread.quit)
+        thread.finished.connect(lambda: self._sort_workers.pop(thread, None))
+        thread.finished.connect(thread.deleteLater)
+
+        # 스레드가 끝날 때까지 참조를 유지
+        self._sort_workers[thread] = worker
+        thread.start()
+
+    def on_sort_finished(self, model: PandasModel, column: int, ascending: bool, order):
+        """계산된 순열을 캐시하고, 가장 최근 요청과 일치할 때만 뷰에 적용합니다."""
+        model.cache_sort_order(column, ascending, order)
+        if len(self._sort_workers) <= 1:
+            self.unsetCursor()
+        if self._pending_sort == (model, column, ascending) and model is self.table_view.model():
+            model.apply_sort_order(column, ascending, order)
+
+    def on_sort_error(self, message: str):
+        self.unsetCursor()
+        print(f"⚠️ {message}")
+
     def show_table_context_menu(self, position):
         """테이블 위에서 우클릭 시 컨텍스트 메뉴 표시"""
         index = self.table_view.indexAt(position)
         if not index.isValid():
             return
 
-        df = self.table_view.model().dataframe()
+        model = self.table_view.model()
+        df = model.dataframe()
         col_name = df.columns[index.column()]
         
         if col_name not in ['copyright', 'character', 'artist']:
             return
 
-        value = df.iloc[index.row(), index.column()]
+        value = df.iloc[model.source_position(index.row()), index.column()]
         if not value or pd.isna(value):
             return
 
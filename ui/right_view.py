@@ -193,5 +193,7 @@ class RightView(QWidget):
         
         # API 관리 또는 심층 검색 탭만 닫기 허용
         if isinstance(widget_to_close, (APIManagementWindow, DepthSearchWindow)):
+            if isinstance(widget_to_close, DepthSearchWindow):
+                widget_to_close.stop_workers() # [신규] 실행 중인 정렬/패싯 스레드 정리
             self.tab_widget.removeTab(index)
             widget_to_close.deleteLater()
\ No newline at end of file